@@ -0,0 +1,249 @@
+import threading
+import numpy as np
+from database import CategoryTotal, MonthlyTrend
+from utils import day_number, shift_month
+
+def month_start(month):
+    return day_number(f"{month}-01")
+
+class LedgerAnalytics:
+    """The ledger table held in memory as NumPy columns, for aggregates without SQL.
+
+    Rows are kept sorted by (day, id) in parallel arrays of the ledger's own day numbers,
+    integer cents and category and type ids; categories and types map those ids back to
+    names. From them
+    a prefix-sum index holds, for every day that has rows, the running totals and row
+    counts per (category, type) up to the end of that day. Any date range is then two
+    lookups and a subtraction, however many rows it covers.
+
+    The object belongs to the thread that owns conn. Other threads report committed
+    writes with note_change(); the next query applies them by re-reading only the
+    changed rows. A PRAGMA data_version change with nothing noted means another
+    process wrote to the database, and the columns are reloaded.
+    """
+    LOAD = 'SELECT id, day, cents, category_id, type_id FROM ledger'
+    NAMES = {'categories': 'SELECT id, name FROM categories', 'types': 'SELECT id, name FROM transaction_types'}
+    # Past this many changed rows one full reload is cheaper than patching the arrays
+    RELOAD_THRESHOLD = 2000
+    IN_CHUNK = 500
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.changed = set()
+        self.stale = True
+        self.data_version = None
+        self.categories, self.category_codes = [], {}
+        self.types, self.type_codes = [], {}
+        self.ids = np.empty(0, np.int64)
+        self.days = np.empty(0, np.int32)
+        self.cents = np.empty(0, np.int64)
+        self.category = np.empty(0, np.int32)
+        self.type = np.empty(0, np.int8)
+        # Built from the columns on first query; see _prefix_sums
+        self.day_keys = None
+        self.prefix = None
+        self.prefix_counts = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def note_change(self, table, row_ids):
+        """Record a committed write; safe to call from any thread."""
+        if table != 'transactions':
+            return
+        with self.lock:
+            if row_ids is None:
+                self.stale = True
+            else:
+                self.changed.update(row_ids)
+
+    def sync(self):
+        """Bring the columns up to date with the database; called by every query."""
+        data_version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        with self.lock:
+            stale, changed = self.stale, self.changed
+            self.stale, self.changed = False, set()
+        if not stale and not changed and data_version != self.data_version:
+            stale = True
+        try:
+            if stale or len(changed) > self.RELOAD_THRESHOLD:
+                self._load()
+            elif changed:
+                self._apply(changed)
+        except Exception:
+            with self.lock:
+                self.stale = True
+            raise
+        self.data_version = data_version
+
+    def _load_names(self):
+        for attribute, sql in self.NAMES.items():
+            rows = self.conn.execute(sql).fetchall()
+            names = [None] * (max((row_id for row_id, _ in rows), default=0) + 1)
+            for row_id, name in rows:
+                names[row_id] = name
+            setattr(self, attribute, names)
+        self.category_codes = {name: code for code, name in enumerate(self.categories) if name is not None}
+        self.type_codes = {name: code for code, name in enumerate(self.types) if name is not None}
+
+    def _columns(self, rows):
+        """Turn (id, day, cents, category_id, type_id) rows into arrays sorted by (day, id)."""
+        if not rows:
+            return (np.empty(0, np.int64), np.empty(0, np.int32), np.empty(0, np.int64),
+                    np.empty(0, np.int32), np.empty(0, np.int8))
+        ids, days, cents, categories, types = np.array(rows, dtype=np.int64).T
+        if categories.max() >= len(self.categories) or types.max() >= len(self.types):
+            self._load_names()
+        order = np.lexsort((ids, days))
+        return (
+            ids.astype(np.int64)[order],
+            days.astype(np.int32)[order],
+            cents.astype(np.int64)[order],
+            categories.astype(np.int32)[order],
+            types.astype(np.int8)[order],
+        )
+
+    def _load(self):
+        self._load_names()
+        rows = self.conn.execute(self.LOAD).fetchall()
+        self.ids, self.days, self.cents, self.category, self.type = self._columns(rows)
+        self.prefix = None
+
+    def _apply(self, changed):
+        changed = sorted(changed)
+        rows = []
+        for start in range(0, len(changed), self.IN_CHUNK):
+            chunk = changed[start:start + self.IN_CHUNK]
+            rows.extend(self.conn.execute(
+                f"{self.LOAD} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        gone = np.flatnonzero(np.isin(self.ids, changed))
+        removed = [column[gone] for column in (self.ids, self.days, self.cents, self.category, self.type)]
+        columns = [np.delete(column, gone) for column in (self.ids, self.days, self.cents, self.category, self.type)]
+        added = self._columns(rows)
+        if rows:
+            ids, days = columns[0], columns[1]
+            positions = []
+            for row_id, day in zip(added[0], added[1]):
+                low = np.searchsorted(days, day, 'left')
+                high = np.searchsorted(days, day, 'right')
+                positions.append(low + np.searchsorted(ids[low:high], row_id))
+            columns = [np.insert(column, positions, values) for column, values in zip(columns, added)]
+        self.ids, self.days, self.cents, self.category, self.type = columns
+        self._update_prefix_sums(removed, added)
+
+    def _prefix_sums(self):
+        """The index as (day_keys, totals, counts).
+
+        day_keys are the distinct days with rows, ascending. totals[k] and counts[k] are
+        [category, type] matrices covering every row dated before day_keys[k], so the
+        rows dated day_keys[i]..day_keys[j] add up to totals[j + 1] - totals[i].
+        """
+        if self.prefix is None:
+            self.day_keys, day_index = np.unique(self.days, return_inverse=True)
+            shape = (len(self.day_keys), len(self.categories), len(self.types))
+            cells = (day_index * shape[1] + self.category) * shape[2] + self.type
+            size = shape[0] * shape[1] * shape[2]
+            totals = np.bincount(cells, weights=self.cents, minlength=size).astype(np.int64).reshape(shape)
+            counts = np.bincount(cells, minlength=size).reshape(shape)
+            self.prefix = np.concatenate((np.zeros((1,) + shape[1:], np.int64), totals.cumsum(axis=0)))
+            self.prefix_counts = np.concatenate((np.zeros((1,) + shape[1:], np.int64), counts.cumsum(axis=0)))
+        return self.day_keys, self.prefix, self.prefix_counts
+
+    def _update_prefix_sums(self, removed, added):
+        """Fold removed and added rows into the index, or drop it when they need a new day or code."""
+        if self.prefix is None:
+            return
+        days = np.concatenate((removed[1], added[1]))
+        categories = np.concatenate((removed[3], added[3]))
+        types = np.concatenate((removed[4], added[4]))
+        slots = np.searchsorted(self.day_keys, days)
+        if (np.any(slots >= len(self.day_keys)) or np.any(self.day_keys[np.minimum(slots, len(self.day_keys) - 1)] != days)
+                or len(self.categories) > self.prefix.shape[1] or len(self.types) > self.prefix.shape[2]):
+            self.prefix = None
+            return
+        cents = np.concatenate((-removed[2], added[2]))
+        signs = np.concatenate((np.full(len(removed[2]), -1), np.ones(len(added[2]), np.int64)))
+        delta = np.zeros_like(self.prefix)
+        delta_counts = np.zeros_like(self.prefix_counts)
+        np.add.at(delta, (slots + 1, categories, types), cents)
+        np.add.at(delta_counts, (slots + 1, categories, types), signs)
+        self.prefix += delta.cumsum(axis=0)
+        self.prefix_counts += delta_counts.cumsum(axis=0)
+
+    def _range_totals(self, start_day, end_day):
+        """Sums in cents and row counts for the rows dated start_day..end_day, as [category, type] matrices."""
+        day_keys, prefix, counts = self._prefix_sums()
+        low, high = np.searchsorted(day_keys, start_day, 'left'), np.searchsorted(day_keys, end_day, 'right')
+        return prefix[high] - prefix[low], counts[high] - counts[low]
+
+    def _type_column(self, matrix, type_):
+        code = self.type_codes.get(type_)
+        return matrix[:, code] if code is not None else np.zeros(len(matrix))
+
+    def category_totals(self, start_date, end_date):
+        """Per-category totals for an inclusive date range, as TransactionsRepo.category_totals."""
+        self.sync()
+        totals, counts = self._range_totals(day_number(start_date), day_number(end_date))
+        totals, present = totals.sum(axis=1), counts.sum(axis=1) > 0
+        return sorted(
+            CategoryTotal(self.categories[code], round(float(totals[code]) / 100, 2))
+            for code in np.flatnonzero(present)
+        )
+
+    def expense_by_category(self):
+        """All-time expense per category, leaving out categories that do not add up to more than zero."""
+        self.sync()
+        _, prefix, _ = self._prefix_sums()
+        expense = self._type_column(prefix[-1], 'Expense')
+        return sorted(
+            CategoryTotal(self.categories[code], round(float(expense[code]) / 100, 2))
+            for code in np.flatnonzero(expense > 0)
+        )
+
+    def monthly_trend(self, first_month, last_month):
+        """Income and expense per 'YYYY-MM' month, for the months that have transactions."""
+        self.sync()
+        months = [first_month]
+        while months[-1] < last_month:
+            months.append(shift_month(months[-1], 1))
+        bounds = np.array([month_start(month) for month in months] + [month_start(shift_month(last_month, 1))])
+        day_keys, prefix, counts = self._prefix_sums()
+        slots = np.searchsorted(day_keys, bounds, 'left')
+        totals = np.diff(prefix[slots], axis=0).sum(axis=1)
+        present = np.diff(counts[slots], axis=0).sum(axis=(1, 2)) > 0
+        income, expense = self._type_column(totals, 'Income'), self._type_column(totals, 'Expense')
+        return [
+            MonthlyTrend(months[index], round(float(income[index]) / 100, 2), round(float(expense[index]) / 100, 2))
+            for index in np.flatnonzero(present)
+        ]
+
+    def budget_vs_actual(self, month, budgets):
+        """Fill in the actual expense of each BudgetLine from the month's transactions."""
+        self.sync()
+        totals, _ = self._range_totals(month_start(month), month_start(shift_month(month, 1)) - 1)
+        expense = self._type_column(totals, 'Expense')
+        return [
+            line._replace(actual=round(float(expense[self.category_codes[line.category]]) / 100, 2)
+                          if line.category in self.category_codes else 0)
+            for line in budgets
+        ]
+
+    def type_totals(self, start_date, end_date):
+        """{type: total} for the transactions dated start_date..end_date."""
+        self.sync()
+        totals, counts = self._range_totals(day_number(start_date), day_number(end_date))
+        totals, present = totals.sum(axis=0), counts.sum(axis=0) > 0
+        return {self.types[code]: round(float(totals[code]) / 100, 2) for code in np.flatnonzero(present)}
+
+    def range_sum(self, start_date, end_date, type_=None, category=None):
+        """Sum of the amounts dated start_date..end_date, optionally for one type and/or category."""
+        self.sync()
+        totals, _ = self._range_totals(day_number(start_date), day_number(end_date))
+        if type_ is not None:
+            totals = self._type_column(totals, type_)[:, None]
+        if category is not None:
+            code = self.category_codes.get(category)
+            totals = totals[code] if code is not None else np.zeros(1)
+        return round(float(totals.sum()) / 100, 2)
@@ -0,0 +1,511 @@
+"""Performance benchmarks for the finance dashboard.
+
+Run `python benchmark.py <name>`; every benchmark works on a throwaway database
+in a temporary directory and never touches finance.db.
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from database import Database, PERFORMANCE_PROFILES
+from utils import day_range
+
+CATEGORIES = ["Housing", "Food", "Transport", "Entertainment", "Utilities", "Healthcare"]
+# Words that sample descriptions are built from, so description searches have realistic hit rates
+DESCRIPTION_WORDS = (
+    "grocery store coffee shop rent payment salary taxi fuel station electric bill water internet "
+    "cinema streaming pharmacy doctor gym restaurant pizza sushi online order refund transfer bonus insurance"
+).split()
+
+def generate_transactions(count, seed=42):
+    """Yield reproducible (date, amount, category, type, description) rows spread over ten years."""
+    rng = random.Random(seed)
+    first_day = date(2015, 1, 1)
+    for _ in range(count):
+        day = first_day + timedelta(days=rng.randrange(3650))
+        type_ = "Income" if rng.random() < 0.15 else "Expense"
+        words = " ".join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(1, 4)))
+        yield (day.isoformat(), round(rng.uniform(1, 500), 2), rng.choice(CATEGORIES), type_, f"{words} #{rng.randrange(100000)}")
+
+def seed_database(db, count):
+    db.conn.executemany('''
+        INSERT INTO transactions (date, amount, category, type, description)
+        VALUES (?, ?, ?, ?, ?)
+    ''', generate_transactions(count))
+    db.conn.commit()
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def bench_profiles(args):
+    """Commit latency and read throughput under each PRAGMA preset."""
+    print(f"{'profile':<10} {'commit p50':>11} {'commit p95':>11} {'reads/s':>9}")
+    for profile in PERFORMANCE_PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"), profile=profile)
+            seed_database(db, args.rows)
+            rows = list(generate_transactions(args.commits, seed=7))
+            latencies = []
+            for row in rows:
+                started = time.perf_counter()
+                db.transactions.add(*row)
+                latencies.append(time.perf_counter() - started)
+
+            reads = 0
+            deadline = time.perf_counter() + args.seconds
+            while time.perf_counter() < deadline:
+                start_day = date(2015, 1, 1) + timedelta(days=random.randrange(3600))
+                db.transactions.page(start_day.isoformat(), (start_day + timedelta(days=30)).isoformat())
+                reads += 1
+            db.close()
+        print(f"{profile:<10} {statistics.median(latencies) * 1000:>9.2f}ms "
+              f"{percentile(latencies, 0.95) * 1000:>9.2f}ms {reads / args.seconds:>9.0f}")
+
+# Modules that must not be loaded before the login window is shown
+STARTUP_FORBIDDEN = ("matplotlib", "tkcalendar", "numpy")
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us, depth)} from `python -X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+def bench_startup(args):
+    """Import cost of everything loaded before the login window, via -X importtime."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=here, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stdout + result.stderr)
+        sys.exit(result.returncode)
+    modules = parse_importtime(result.stderr)
+    total_ms = sum(cumulative for _, cumulative, depth in modules.values() if depth == 0) / 1000
+    print(f"startup imports: {total_ms:.1f}ms across {len(modules)} modules")
+    print("slowest top-level imports:")
+    top_level = [(cumulative, name) for name, (_, cumulative, depth) in modules.items() if depth == 0]
+    for cumulative, name in sorted(top_level, reverse=True)[:10]:
+        print(f"  {cumulative / 1000:>8.1f}ms  {name}")
+    failures = [f"{name} is imported at startup" for name in STARTUP_FORBIDDEN if name in modules]
+    if args.budget_ms and total_ms > args.budget_ms:
+        failures.append(f"startup imports took {total_ms:.1f}ms, budget is {args.budget_ms:.1f}ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+# Palette used by the chart benchmarks; mirrors FinanceDashboard.colors
+CHART_COLORS = {
+    "primary": "#00796B", "secondary": "#004D40", "accent": "#26A69A", "bg_panel": "#FFFFFF",
+    "border": "#E0E0E0", "success": "#4CAF50", "danger": "#F44336",
+    "text_primary": "#212121", "text_secondary": "#757575",
+}
+
+def dashboard_chart_data(db, iteration):
+    """Chart inputs for one dashboard refresh, shifting the trend window each iteration."""
+    expenses = db.transactions.expense_by_category()
+    last_month = f"{2015 + (iteration % 10)}-12"
+    trend = db.transactions.monthly_trend(f"{2015 + (iteration % 10)}-01", last_month)
+    return (
+        [row.category for row in expenses], [row.total for row in expenses],
+        [row.month for row in trend], [row.income for row in trend], [row.expense for row in trend],
+    )
+
+def bench_dashboard(args):
+    """Dashboard chart refresh: a new figure per refresh against in-place artist updates."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from charts import ExpensePieChart, TrendLineChart
+
+    def rebuild(data):
+        categories, amounts, months, income, expense = data
+        for draw in (lambda ax: ax.pie(amounts, labels=categories),
+                     lambda ax: (ax.plot(months, income, label="Income"), ax.plot(months, expense, label="Expense"),
+                                 ax.legend(), ax.grid(True))):
+            fig, ax = plt.subplots(figsize=(4, 3))
+            draw(ax)
+            ax.set_title("Chart")
+            FigureCanvasAgg(fig).draw()
+            plt.close(fig)
+
+    pie, trend = ExpensePieChart(CHART_COLORS), TrendLineChart(CHART_COLORS)
+    canvases = (FigureCanvasAgg(pie.figure), FigureCanvasAgg(trend.figure))
+
+    def update(data):
+        categories, amounts, months, income, expense = data
+        pie.update(categories, amounts)
+        trend.update(months, income, expense)
+        for canvas in canvases:
+            canvas.draw()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        seed_database(db, args.rows)
+        print(f"{'approach':<10} {'refresh p50':>12} {'refresh p95':>12} {'refreshes':>10}")
+        for name, render in (("rebuild", rebuild), ("in-place", update)):
+            render(dashboard_chart_data(db, 0))
+            timings = []
+            deadline = time.perf_counter() + args.seconds
+            while time.perf_counter() < deadline:
+                data = dashboard_chart_data(db, len(timings) + 1)
+                started = time.perf_counter()
+                render(data)
+                timings.append(time.perf_counter() - started)
+            print(f"{name:<10} {statistics.median(timings) * 1000:>10.1f}ms "
+                  f"{percentile(timings, 0.95) * 1000:>10.1f}ms {len(timings):>10}")
+        db.close()
+
+def bench_import(args):
+    """Statement import: the chunked importer, a repeated import of the same file and one add() per commit."""
+    import csv
+    from importer import import_statement
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "statement.csv")
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Date", "Description", "Amount", "Category"])
+            for day, amount, category, type_, description in generate_transactions(args.rows, seed=11):
+                year, month, day = day.split("-")
+                writer.writerow([f"{month}/{day}/{year}", description, f"{-amount if type_ == 'Expense' else amount:,.2f}", category])
+        db = Database(os.path.join(tmp, "bench.db"))
+        started = time.perf_counter()
+        summary = import_statement(db, path)
+        imported = time.perf_counter() - started
+        print(f"import {summary.imported} rows ({len(summary.rejected)} rejected): {imported:.2f}s, "
+              f"{summary.imported / imported:,.0f} rows/s")
+        started = time.perf_counter()
+        summary = import_statement(db, path)
+        again = time.perf_counter() - started
+        print(f"import the same file again: {summary.imported} rows added, {summary.duplicates} skipped "
+              f"as duplicates: {again:.2f}s")
+        started = time.perf_counter()
+        for row in generate_transactions(args.commits, seed=12):
+            db.transactions.add(*row)
+        single = time.perf_counter() - started
+        print(f"add() one row per commit, {args.commits} rows: {single:.2f}s, {args.commits / single:,.0f} rows/s")
+        db.close()
+
+def bench_categorize(args):
+    """Category rules: the combined matcher against trying every rule on every row, and re-categorize all."""
+    import re
+    from categorizer import Categorizer, keyword_phrases, recategorize_all
+    rows = list(generate_transactions(args.rows, seed=13))
+    descriptions = [row[4] for row in rows]
+    amounts = [round(row[1] * 100) for row in rows]
+
+    def make_rules(count):
+        # A few rules that hit the sample descriptions, padded with merchants that never occur
+        rules = [("Keyword", f"{word}, {word} plus", None, None, CATEGORIES[index % len(CATEGORIES)])
+                 for index, word in enumerate(DESCRIPTION_WORDS[:8])]
+        rules += [("Regex", r"^(?:online|streaming)\b.*#\d{3}$", None, None, "Entertainment"),
+                  ("Amount", "", 40000, None, "Large")]
+        for index in range(count - len(rules)):
+            if index % 5 == 4:
+                rules.append(("Regex", rf"store\s*#{index}\d+", None, None, "Shopping"))
+            else:
+                rules.append(("Keyword", f"merchant{index}, shop {index}", 100, 20000, "Shopping"))
+        return rules
+
+    def one_by_one(rules):
+        compiled = []
+        for kind, pattern, lo, hi, category in rules:
+            if kind == "Keyword":
+                pattern = "|".join(r"\b" + r"\W+".join(map(re.escape, phrase)) + r"\b" for phrase in keyword_phrases(pattern))
+            compiled.append((re.compile(pattern, re.IGNORECASE if kind == "Keyword" else 0) if kind != "Amount" else None,
+                             lo if lo is not None else 0, hi if hi is not None else float("inf"), category))
+        return [next((category for regex, lo, hi, category in compiled
+                      if lo <= cents <= hi and (regex is None or regex.search(description))), None)
+                for description, cents in zip(descriptions, amounts)]
+
+    print(f"{'rules':>6} {'combined':>10} {'one by one':>11} {'speedup':>8}")
+    for count in (10, 50, 200):
+        rules = make_rules(count)
+        started = time.perf_counter()
+        combined = Categorizer(rules).match_many(descriptions, amounts)
+        fast = time.perf_counter() - started
+        started = time.perf_counter()
+        expected = one_by_one(rules)
+        slow = time.perf_counter() - started
+        if combined != expected:
+            raise SystemExit(f"combined matcher disagrees with the rule-by-rule loop at {count} rules")
+        print(f"{count:>6} {fast:>9.2f}s {slow:>10.2f}s {slow / fast:>7.1f}x")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        seed_database(db, args.rows)
+        for kind, pattern, lo, hi, category in make_rules(50):
+            db.rules.add(kind, pattern, category, None if lo is None else lo / 100, None if hi is None else hi / 100)
+        started = time.perf_counter()
+        updated = recategorize_all(db)
+        print(f"re-categorize all {args.rows} rows with 50 rules: {updated} updated in {time.perf_counter() - started:.2f}s")
+        db.close()
+
+def bench_bulk_edit(args):
+    """Batch edits of selected rows: one transaction each, against delete() with one commit per row."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        seed_database(db, args.rows)
+        rng = random.Random(14)
+        print(f"{'selected':>9} {'delete':>9} {'undo':>9} {'category':>9} {'undo':>9} {'per-row delete':>15}")
+        for count in (10, 100, 1000):
+            transaction_ids = rng.sample(range(1, args.rows + 1), count)
+            timings = []
+            for edit in (db.transactions.delete_many,
+                         lambda ids: db.transactions.update_many(ids, category="Bulk", type_="Savings")):
+                started = time.perf_counter()
+                snapshot = edit(transaction_ids)
+                timings.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                db.transactions.restore(snapshot)
+                timings.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            for transaction_id in transaction_ids:
+                db.transactions.delete(transaction_id)
+            single = time.perf_counter() - started
+            db.transactions.restore(snapshot)
+            print(f"{count:>9} " + " ".join(f"{timing * 1000:>7.1f}ms" for timing in timings) + f" {single * 1000:>13.1f}ms")
+        db.close()
+
+def bench_paging(args):
+    """Transaction grid: loading the whole range against keyset pages and jumps."""
+    import tracemalloc
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        seed_database(db, args.rows)
+        start_date, end_date = "1900-01-01", "9999-12-31"
+        print(f"{'query':<14} {'p50':>9} {'p95':>9} {'peak memory':>12}")
+
+        def report(name, timings, peak):
+            print(f"{name:<14} {statistics.median(timings) * 1000:>7.2f}ms "
+                  f"{percentile(timings, 0.95) * 1000:>7.2f}ms {peak / 1024:>10.0f}KB")
+
+        def measure(name, runs, query):
+            timings = []
+            tracemalloc.start()
+            for run in range(runs):
+                started = time.perf_counter()
+                query(run)
+                timings.append(time.perf_counter() - started)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            report(name, timings, peak)
+
+        measure("full fetch", 3, lambda run: db.transactions.in_range(start_date, end_date))
+        measure("count", 20, lambda run: db.transactions.count_in_range(start_date, end_date))
+        after = [None]
+
+        def next_page(run):
+            rows = db.transactions.page(start_date, end_date, after[0], 0, 100)
+            after[0] = (rows[-1].date, rows[-1].id) if len(rows) == 100 else None
+        measure("next page", 200, next_page)
+
+        # A drag on the scrollbar with no known keys: skip from whichever end is closer
+        total = db.transactions.count_in_range(start_date, end_date)
+        positions = [random.randrange(max(total - 100, 1)) for _ in range(50)]
+
+        def jump(run):
+            position = positions[run]
+            if position < total - position - 100:
+                db.transactions.page(start_date, end_date, None, position, 100)
+            else:
+                db.transactions.page_from_end(start_date, end_date, total - position - 100, 100)
+        measure("jump", len(positions), jump)
+        db.close()
+
+def bench_search(args):
+    """Description search: FTS5 ranking plus paging against a LIKE scan."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        seed_database(db, args.rows)
+        start_date, end_date = "2016-01-01", "2018-12-31"
+        print(f"{'search':<18} {'matches':>8} {'first page':>11} {'next page':>10} {'LIKE scan':>10}")
+        for text in ("sushi", "grocery store", "pizza refund taxi", "12345", "insur"):
+            timings = []
+            for _ in range(3):
+                started = time.perf_counter()
+                matches = db.transactions.search(text, start_date, end_date)
+                db.transactions.search_page(0, 100)
+                timings.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            db.transactions.search_page(matches // 2, 100)
+            next_page = time.perf_counter() - started
+            started = time.perf_counter()
+            db.cursor.execute(
+                "SELECT id FROM ledger WHERE description LIKE ? AND day BETWEEN ? AND ? ORDER BY day DESC LIMIT 100",
+                (f"%{text}%", *day_range(start_date, end_date))
+            ).fetchall()
+            like = time.perf_counter() - started
+            print(f"{text:<18} {matches:>8} {statistics.median(timings) * 1000:>9.1f}ms "
+                  f"{next_page * 1000:>8.2f}ms {like * 1000:>8.1f}ms")
+        db.close()
+
+def bench_analytics(args):
+    """Dashboard, report and budget aggregates: SQL on the rollup table against the in-memory prefix sums."""
+    from database import connect
+    from db_worker import WorkerRepositories
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        seed_database(db, args.rows)
+        repos = WorkerRepositories(connect(db.db_name, db.profile))
+        started = time.perf_counter()
+        analytics = repos.analytics
+        analytics.sync()
+        print(f"load {len(analytics)} rows: {(time.perf_counter() - started) * 1000:.1f}ms")
+        queries = [
+            ("category totals, 1 year", lambda source: source.category_totals("2016-01-01", "2016-12-31")),
+            ("category totals, all", lambda source: source.category_totals("1900-01-01", "9999-12-31")),
+            # Partial months at both ends are summed row by row in SQL
+            ("category totals, uneven", lambda source: source.category_totals("2016-01-15", "2019-03-20")),
+            ("expense by category", lambda source: source.expense_by_category()),
+            ("monthly trend, 12 months", lambda source: source.monthly_trend("2023-01", "2023-12")),
+        ]
+        print(f"{'query':<26} {'SQL':>9} {'NumPy':>9}")
+        for label, query in queries:
+            timings = []
+            for source in (db.transactions, analytics):
+                samples = []
+                for _ in range(50):
+                    started = time.perf_counter()
+                    query(source)
+                    samples.append(time.perf_counter() - started)
+                timings.append(statistics.median(samples))
+            print(f"{label:<26} {timings[0] * 1000:>7.3f}ms {timings[1] * 1000:>7.3f}ms")
+        row_ids = {db.transactions.add("2020-01-01", 10.0, "Food", "Expense", "benchmark") for _ in range(args.commits)}
+        analytics.note_change("transactions", row_ids)
+        started = time.perf_counter()
+        analytics.sync()
+        print(f"apply {len(row_ids)} new rows: {(time.perf_counter() - started) * 1000:.1f}ms")
+        db.close()
+
+def bench_reports(args):
+    """Report views: the category GROUP BY on every view against the ReportsTab result cache."""
+    from utils import LruCache
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        seed_database(db, args.rows)
+        rng = random.Random(3)
+        ranges = []
+        for _ in range(12):
+            start_day = date(2015, 1, 1) + timedelta(days=rng.randrange(3000))
+            ranges.append((start_day.isoformat(), (start_day + timedelta(days=rng.randrange(30, 700))).isoformat()))
+        cache = LruCache(32)
+        hits, misses = [], []
+        for view in range(args.commits * 5):
+            # A new transaction every 50 views invalidates everything cached so far
+            if view and view % 50 == 0:
+                db.transactions.add("2020-01-01", 10.0, "Food", "Expense", "benchmark")
+            started = time.perf_counter()
+            start_date, end_date = rng.choice(ranges)
+            key = (start_date, end_date, db.ledger_version())
+            data = cache.get(key)
+            if data is None:
+                cache.put(key, db.transactions.category_totals(start_date, end_date))
+                misses.append(time.perf_counter() - started)
+            else:
+                hits.append(time.perf_counter() - started)
+        stats = cache.stats()
+        print(f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), {stats['evictions']} evictions")
+        print(f"miss (GROUP BY): p50 {statistics.median(misses) * 1000:.3f}ms  p95 {percentile(misses, 0.95) * 1000:.3f}ms")
+        print(f"hit:             p50 {statistics.median(hits) * 1000:.3f}ms  p95 {percentile(hits, 0.95) * 1000:.3f}ms")
+        db.close()
+
+def bench_schema(args):
+    """File size and aggregate query times of the schema 6 text layout against the compact ledger."""
+    from database import MIGRATIONS, connect
+    start_date, end_date = "2018-01-01", "2018-12-31"
+    # (name, schema 6 query, ledger query, schema 6 params, ledger params)
+    queries = [
+        ("year by category",
+         "SELECT category, SUM(amount) FROM transactions WHERE date BETWEEN ? AND ? GROUP BY category",
+         "SELECT category_id, SUM(cents) FROM ledger WHERE day BETWEEN ? AND ? GROUP BY category_id",
+         (start_date, end_date), day_range(start_date, end_date)),
+        ("all by category+type",
+         "SELECT category, type, SUM(amount) FROM transactions GROUP BY category, type",
+         "SELECT category_id, type_id, SUM(cents) FROM ledger GROUP BY category_id, type_id",
+         (), ()),
+        ("year count",
+         "SELECT COUNT(*) FROM transactions WHERE date BETWEEN ? AND ?",
+         "SELECT COUNT(*) FROM ledger WHERE day BETWEEN ? AND ?",
+         (start_date, end_date), day_range(start_date, end_date)),
+    ]
+
+    def measure(conn, path, layout):
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        results = [os.path.getsize(path) / 1024 / 1024]
+        for query in queries:
+            timings = []
+            for _ in range(5):
+                started = time.perf_counter()
+                conn.execute(query[1 + layout], query[3 + layout]).fetchall()
+                timings.append(time.perf_counter() - started)
+            results.append(statistics.median(timings) * 1000)
+        return results
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        conn = connect(path)
+        conn.execute("BEGIN")
+        for step in MIGRATIONS[:6]:
+            step(conn.cursor())
+        conn.execute("PRAGMA user_version = 6")
+        conn.commit()
+        conn.executemany('''
+            INSERT INTO transactions (date, amount, category, type, description)
+            VALUES (?, ?, ?, ?, ?)
+        ''', generate_transactions(args.rows))
+        conn.commit()
+        before = measure(conn, path, 0)
+        conn.close()
+
+        started = time.perf_counter()
+        db = Database(path)
+        migrated = time.perf_counter() - started
+        after = measure(db.conn, path, 1)
+        db.close()
+    print(f"migrating {args.rows} rows to schema 7 (including VACUUM): {migrated:.1f}s")
+    print(f"{'':<26} {'schema 6':>10} {'ledger':>10} {'ratio':>7}")
+    names = ["file size (MiB)"] + [f"{query[0]} (ms)" for query in queries]
+    for name, old, new in zip(names, before, after):
+        print(f"{name:<26} {old:>10.2f} {new:>10.2f} {new / old:>6.2f}x")
+
+BENCHMARKS = {
+    "analytics": bench_analytics,
+    "bulk-edit": bench_bulk_edit,
+    "categorize": bench_categorize,
+    "dashboard": bench_dashboard,
+    "import": bench_import,
+    "paging": bench_paging,
+    "profiles": bench_profiles,
+    "reports": bench_reports,
+    "schema": bench_schema,
+    "search": bench_search,
+    "startup": bench_startup,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rows", type=int, default=100000, help="transactions to seed the database with")
+    parser.add_argument("--commits", type=int, default=200, help="single-row commits to time")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of throughput loops")
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail the startup benchmark above this import time")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+if __name__ == "__main__":
+    main()
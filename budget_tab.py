@@ -4,12 +4,12 @@ from tkinter import ttk, messagebox
 import logging
 import re
 from datetime import datetime
+from utils import TreeviewSync
 
 class BudgetTab:
-    def __init__(self, app):
+    def __init__(self, app, frame):
         self.app = app
-        self.frame = ttk.Frame(self.app.notebook)
-        self.app.notebook.add(self.frame, text="Budget")
+        self.frame = frame
         logging.debug(f"Initializing BudgetTab with current date: {datetime.now()}")
         self.setup_ui()
         self.refresh()
@@ -80,6 +80,7 @@ class BudgetTab:
         self.budget_tree.column("Difference ($)", width=100, anchor='center')
         self.budget_tree.column("Progress", width=100, anchor='center')
         self.budget_tree.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+        self.budget_sync = TreeviewSync(self.budget_tree)
 
     def set_budget(self):
         month = self.month_var.get()
@@ -93,12 +94,7 @@ class BudgetTab:
                 messagebox.showerror("Error", "Please enter a valid number for Amount (e.g., 50, 12.34)")
                 return
             amount = float(amount)
-            self.app.db.cursor.execute('''
-                INSERT OR REPLACE INTO budgets (month, category, amount)
-                VALUES (?, ?, ?)
-            ''', (month, category, amount))
-            self.app.db.conn.commit()
-            self.refresh()
+            self.app.db.budgets.set(month, category, amount)
             self.clear_form()
             messagebox.showinfo("Success", "Budget set successfully")
         except Exception as e:
@@ -113,42 +109,39 @@ class BudgetTab:
     def clear_budget(self):
         month = self.month_var.get()
         try:
-            self.app.db.cursor.execute('DELETE FROM budgets WHERE month = ?', (month,))
-            self.app.db.conn.commit()
-            self.refresh()
+            self.app.db.budgets.clear_month(month)
             messagebox.showinfo("Success", "Budget cleared successfully")
         except Exception as e:
             logging.error(f"Failed to clear budget: {str(e)}")
             messagebox.showerror("Error", f"Failed to clear budget: {str(e)}")
 
     def refresh(self):
+        month = self.month_var.get() or datetime.now().strftime('%Y-%m')
+        # Validate month format to avoid day out of range errors
         try:
-            for item in self.budget_tree.get_children():
-                self.budget_tree.delete(item)
-            month = self.month_var.get() or datetime.now().strftime('%Y-%m')
-            # Validate month format to avoid day out of range errors
-            try:
-                datetime.strptime(month + '-01', '%Y-%m-%d')  # Use a safe day (1st)
-            except ValueError:
-                logging.error(f"Invalid month format: {month}, defaulting to current month")
-                month = datetime.now().strftime('%Y-%m')
-            self.app.db.cursor.execute('''
-                SELECT b.category, b.amount, COALESCE(t.total, 0) as actual
-                FROM budgets b
-                LEFT JOIN (
-                    SELECT category, SUM(amount) as total
-                    FROM transactions
-                    WHERE strftime('%Y-%m', date) = ?
-                    AND type = 'Expense'
-                    GROUP BY category
-                ) t ON b.category = t.category
-                WHERE b.month = ?
-            ''', (month, month))
-            for row in self.app.db.cursor.fetchall():
-                category, budget, actual = row
-                difference = budget - actual
-                progress = f"{(actual / budget * 100):.1f}%" if budget > 0 else "N/A"
-                self.budget_tree.insert('', tk.END, values=(category, f"{budget:.2f}", f"{actual:.2f}", f"{difference:.2f}", progress))
+            datetime.strptime(month + '-01', '%Y-%m-%d')  # Use a safe day (1st)
+        except ValueError:
+            logging.error(f"Invalid month format: {month}, defaulting to current month")
+            month = datetime.now().strftime('%Y-%m')
+        self.app.worker.submit(
+            'budget.refresh',
+            lambda repos: repos.analytics.budget_vs_actual(month, repos.budgets.planned(month)),
+            self.show_budget,
+            self.refresh_failed
+        )
+
+    def show_budget(self, lines):
+        try:
+            rows = []
+            for line in lines:
+                difference = line.budget - line.actual
+                progress = f"{(line.actual / line.budget * 100):.1f}%" if line.budget > 0 else "N/A"
+                # Keyed by category: replacing a budget gives it a new id but it is the same line
+                rows.append((line.category, (line.category, f"{line.budget:.2f}", f"{line.actual:.2f}", f"{difference:.2f}", progress), ()))
+            self.budget_sync.apply(rows)
         except Exception as e:
-            logging.error(f"Failed to refresh Budget data: {str(e)}")
-            messagebox.showerror("Error", f"Failed to refresh Budget data: {str(e)}")
\ No newline at end of file
+            self.refresh_failed(e)
+
+    def refresh_failed(self, error):
+        logging.error(f"Failed to refresh Budget data: {str(error)}")
+        messagebox.showerror("Error", f"Failed to refresh Budget data: {str(error)}")
\ No newline at end of file
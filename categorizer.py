@@ -0,0 +1,171 @@
+import re
+
+RULE_KINDS = ("Keyword", "Regex", "Amount")
+SCAN_BATCH = 50000
+WORD = re.compile(r'\w+')
+LINE_WORDS = re.compile(r'\w+|\n')
+# Anchors and negative lookarounds can see the line breaks between joined descriptions and
+# miss a row; regexes that use them are searched row by row instead
+JOIN_SENSITIVE = re.compile(r'\\[AZ]|\(\?<?!')
+
+def keyword_phrases(pattern):
+    """Comma-separated keywords as tuples of case-folded words; punctuation is ignored."""
+    return [tuple(WORD.findall(keyword.casefold())) for keyword in pattern.split(',') if WORD.search(keyword)]
+
+def check_rule(kind, pattern):
+    """Raise ValueError if a rule of this kind cannot use pattern."""
+    if kind not in RULE_KINDS:
+        raise ValueError(f"Unknown rule kind '{kind}'")
+    if kind == "Keyword" and not keyword_phrases(pattern):
+        raise ValueError("Enter at least one keyword")
+    if kind == "Regex":
+        if not pattern.strip():
+            raise ValueError("Enter a regular expression")
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}") from None
+
+class Categorizer:
+    """Category rules compiled for matching whole batches of descriptions, first rule wins.
+
+    Rules are (kind, pattern, min_cents, max_cents, category) in priority order; a rule
+    applies when its pattern is found in the description and the unsigned amount is
+    within its bounds, where None means unbounded. Keyword rules match whole words,
+    ignoring case and punctuation; their words are kept in a trie, so a batch is
+    tokenized once and each word costs a lookup or two however many rules there are.
+    Regex rules are case-sensitive unless they say (?i); each one searches the joined
+    batch once and is only confirmed on the rows it hits. Amount rules have no pattern.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.categories = [rule[4] for rule in self.rules]
+        self.bounds = [(lo if lo is not None else 0, hi if hi is not None else float('inf'))
+                       for _, _, lo, hi, _ in self.rules]
+        self.keywords = {}
+        self.regexes = {}
+        self.always = []
+        for index, (kind, pattern, *_) in enumerate(self.rules):
+            check_rule(kind, pattern)
+            if kind == "Keyword":
+                for phrase in keyword_phrases(pattern):
+                    # Each trie node is (rules whose keyword ends here, next words)
+                    children = self.keywords
+                    for word in phrase:
+                        node = children.setdefault(word, ([], {}))
+                        children = node[1]
+                    node[0].append(index)
+            elif kind == "Regex":
+                joined = None if JOIN_SENSITIVE.search(pattern) else re.compile(pattern, re.MULTILINE)
+                self.regexes[index] = (re.compile(pattern), joined)
+            else:
+                self.always.append(index)
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def _add_keyword_rules(self, words, found):
+        # found maps a row to the rules that matched it; a '\n' word starts the next row
+        keywords = self.keywords
+        if keywords.keys().isdisjoint(words):
+            return
+        row, end = 0, len(words)
+        for position, word in enumerate(words):
+            if word == '\n':
+                row += 1
+                continue
+            node = keywords.get(word)
+            following = position + 1
+            while node is not None:
+                if node[0]:
+                    found.setdefault(row, set()).update(node[0])
+                node = node[1].get(words[following]) if node[1] and following < end else None
+                following += 1
+
+    def _first_applying(self, candidates, cents):
+        for index in sorted(candidates):
+            lo, hi = self.bounds[index]
+            if lo <= cents <= hi:
+                return self.categories[index]
+        return None
+
+    def match(self, description, cents):
+        """The category of the first rule that applies, or None."""
+        return self.match_many([description], [cents])[0]
+
+    def match_many(self, descriptions, amounts):
+        """match() for parallel sequences of descriptions and unsigned cents."""
+        categories = [None] * len(descriptions)
+        if not self.rules:
+            return categories
+        text = '\n'.join(description or '' for description in descriptions)
+        everywhere = ()
+        if text.count('\n') != len(descriptions) - 1:
+            everywhere = [row for row, description in enumerate(descriptions) if description and '\n' in description]
+            text = '\n'.join((description or '').replace('\n', ' ') for description in descriptions)
+        found = {}
+        if self.keywords:
+            self._add_keyword_rules(LINE_WORDS.findall(text.casefold()), found)
+        for index, (regex, joined) in self.regexes.items():
+            rows = self._rows_hit(joined, text) if joined else range(len(descriptions))
+            for row in set(rows).union(everywhere):
+                if regex.search(descriptions[row] or ''):
+                    found.setdefault(row, set()).add(index)
+        if self.always:
+            for row, cents in enumerate(amounts):
+                if row not in found:
+                    categories[row] = self._first_applying(self.always, cents)
+        for row, candidates in found.items():
+            categories[row] = self._first_applying(candidates.union(self.always), amounts[row])
+        return categories
+
+    @staticmethod
+    def _rows_hit(regex, text):
+        # Rows of the '\n'-joined text with a match, resuming the search at the next row after each
+        rows, row, counted, position = [], 0, 0, 0
+        while True:
+            hit = regex.search(text, position)
+            if hit is None:
+                return rows
+            row += text.count('\n', counted, hit.start())
+            counted = hit.start()
+            rows.append(row)
+            position = text.find('\n', hit.start()) + 1
+            if not position:
+                return rows
+
+    def apply(self, rows):
+        """(day, cents, category, type, description) rows with their category replaced where a rule applies."""
+        if not self.rules:
+            return rows
+        matched = self.match_many([row[4] for row in rows], [row[1] for row in rows])
+        return [(day, cents, new or category, type_, description)
+                for (day, cents, category, type_, description), new in zip(rows, matched)]
+
+def recategorize_all(repos, report=lambda value: True):
+    """Run the saved rules over every transaction and update the ones whose category changes.
+
+    Rows no rule applies to keep their category. report((scanned, total)) is called after
+    every SCAN_BATCH rows; when it returns False nothing is changed. Returns the number of
+    transactions updated.
+    """
+    categorizer = Categorizer(repos.rules.for_categorizer())
+    if not categorizer:
+        return 0
+    total = repos.transactions.count_in_range("1900-01-01", "9999-12-31")
+    changes, scanned = [], 0
+    cursor = repos.transactions.stream_for_categorizer()
+    try:
+        while True:
+            rows = cursor.fetchmany(SCAN_BATCH)
+            if not rows:
+                break
+            matched = categorizer.match_many([row[2] for row in rows], [row[1] for row in rows])
+            changes.extend((row[0], new) for row, new in zip(rows, matched) if new is not None and new != row[3])
+            scanned += len(rows)
+            if not report((scanned, total)):
+                return 0
+    finally:
+        cursor.close()
+    return repos.transactions.set_categories(changes)
@@ -0,0 +1,170 @@
+import logging
+import queue
+import threading
+import tkinter as tk
+
+class ChartRenderer:
+    """Draws matplotlib charts with the Agg backend on a background thread.
+
+    Each chart is registered under a name with a factory that builds it; the chart
+    object (and its Figure) only ever lives on the render thread. render() queues an
+    update for a chart, and the finished frame comes back to the Tk thread as an
+    RGBA array that views the Agg buffer itself. A chart is not drawn again until
+    the Tk thread has released its previous frame, so the render thread never copies it.
+    Like DatabaseWorker, a newer render for the same chart supersedes older ones.
+    """
+    POLL_MS = 15
+
+    def __init__(self, root):
+        self.root = root
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.factories = {}
+        self.generations = {}
+        self.released = {}
+        self.pending = 0
+        self.poll_id = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="chart-renderer", daemon=True)
+        self.thread.start()
+
+    def register(self, name, factory):
+        """factory() builds the chart object on the render thread the first time name is drawn."""
+        self.factories[name] = factory
+        self.released[name] = threading.Event()
+        self.released[name].set()
+
+    def render(self, name, update, on_frame, size=None, on_error=None):
+        """Run update(chart) and draw it at size (width, height) in pixels; on_frame(pixels) runs on the Tk thread."""
+        generation = self.generations.get(name, 0) + 1
+        self.generations[name] = generation
+        self.pending += 1
+        self.jobs.put((name, generation, update, size, on_frame, on_error))
+        self._schedule_poll()
+
+    def stop(self):
+        self.stopped.set()
+        for released in self.released.values():
+            released.set()
+        self.jobs.put(None)
+        if self.poll_id is not None:
+            try:
+                self.root.after_cancel(self.poll_id)
+            except Exception:
+                pass
+            self.poll_id = None
+        self.thread.join(timeout=2)
+
+    def _is_current(self, name, generation):
+        return self.generations.get(name) == generation
+
+    def _run(self):
+        charts = {}
+        canvases = {}
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            name, generation, update, size, on_frame, on_error = job
+            if not self._is_current(name, generation):
+                self.results.put((name, generation, None, on_frame, on_error))
+                continue
+            # Wait until the Tk thread is done with the last frame drawn into this chart's buffer
+            self.released[name].wait()
+            if self.stopped.is_set():
+                break
+            try:
+                if name not in charts:
+                    from matplotlib.backends.backend_agg import FigureCanvasAgg
+                    charts[name] = self.factories[name]()
+                    canvases[name] = FigureCanvasAgg(charts[name].figure)
+                chart, canvas = charts[name], canvases[name]
+                if size:
+                    dpi = chart.figure.dpi
+                    chart.figure.set_size_inches(size[0] / dpi, size[1] / dpi, forward=False)
+                update(chart)
+                canvas.draw()
+                self.released[name].clear()
+                outcome = (True, canvas.buffer_rgba())
+            except Exception as e:
+                outcome = (False, e)
+            self.results.put((name, generation, outcome, on_frame, on_error))
+
+    def _schedule_poll(self):
+        if self.poll_id is None:
+            self.poll_id = self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        self.poll_id = None
+        while True:
+            try:
+                name, generation, outcome, on_frame, on_error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            try:
+                if outcome is None or not self._is_current(name, generation):
+                    continue
+                ok, value = outcome
+                if ok:
+                    on_frame(value)
+                elif on_error:
+                    on_error(value)
+                else:
+                    logging.error(f"Rendering chart '{name}' failed: {str(value)}")
+            except Exception as e:
+                logging.error(f"Callback for chart '{name}' failed: {str(e)}", exc_info=True)
+            finally:
+                if outcome is not None and outcome[0]:
+                    self.released[name].set()
+        if self.pending > 0:
+            self._schedule_poll()
+
+def ppm_frame(pixels):
+    """Binary PPM (P6) bytes for the RGB channels of a (height, width, 4) RGBA buffer."""
+    import numpy as np
+    pixels = np.asarray(pixels)
+    height, width = pixels.shape[:2]
+    return b'P6 %d %d 255\n' % (width, height) + pixels[:, :, :3].tobytes()
+
+class ChartView:
+    """Tk label that shows frames from a ChartRenderer chart and re-renders when resized."""
+    RESIZE_DELAY_MS = 100
+
+    def __init__(self, master, renderer, name, factory, background):
+        self.renderer = renderer
+        self.name = name
+        self.image = tk.PhotoImage(master=master)
+        self.label = tk.Label(master, image=self.image, background=background, borderwidth=0, highlightthickness=0)
+        self.size = None
+        self.last_update = None
+        self.resize_id = None
+        renderer.register(name, factory)
+        self.label.bind('<Configure>', self.on_configure)
+
+    def pack(self, **kwargs):
+        self.label.pack(**kwargs)
+
+    def draw(self, update):
+        """Queue update(chart) on the render thread; the label shows the result when it is ready."""
+        self.last_update = update
+        self.renderer.render(self.name, update, self.show_frame, self.size)
+
+    def show_frame(self, pixels):
+        # The figures are opaque, so the RGB channels go to the photo as a binary PPM through
+        # its public data option; the photo takes the frame's size
+        self.image.configure(data=ppm_frame(pixels), format='PPM')
+
+    def on_configure(self, event):
+        size = (event.width, event.height)
+        if size == self.size or min(size) < 50:
+            return
+        self.size = size
+        if self.resize_id is not None:
+            self.label.after_cancel(self.resize_id)
+        self.resize_id = self.label.after(self.RESIZE_DELAY_MS, self.redraw)
+
+    def redraw(self):
+        self.resize_id = None
+        if self.last_update is not None:
+            self.draw(self.last_update)
@@ -0,0 +1,133 @@
+import math
+from matplotlib.figure import Figure
+
+class ExpensePieChart:
+    """Expense distribution pie that keeps its figure and updates wedges in place."""
+
+    def __init__(self, colors, figsize=(4, 3)):
+        self.colors = colors
+        self.figure = Figure(figsize=figsize)
+        self.figure.patch.set_facecolor(colors["bg_panel"])
+        self.ax = self.figure.add_subplot()
+        self.ax.set_title("Expense Distribution", fontfamily='Roboto', fontsize=12, fontweight='bold', color=colors["text_primary"])
+        self.message = self.ax.text(0.5, 0.5, "", ha='center', va='center', transform=self.ax.transAxes,
+                                    fontfamily='Roboto', fontsize=12, color=colors["text_secondary"], visible=False)
+        self.categories = None
+        self.wedges = []
+        self.texts = []
+
+    def update(self, categories, amounts):
+        """Show new data; returns True when the existing wedges could be reused."""
+        self.message.set_visible(False)
+        if list(categories) == self.categories and self.wedges:
+            self._move_wedges(amounts)
+            return True
+        for artist in self.wedges + self.texts:
+            artist.remove()
+        self.wedges, self.texts = self.ax.pie(
+            amounts,
+            labels=categories,
+            colors=[self.colors["primary"], self.colors["accent"], self.colors["secondary"], self.colors["success"]],
+            textprops={'fontfamily': 'Roboto', 'fontsize': 10, 'color': self.colors["text_primary"]}
+        )
+        self.categories = list(categories)
+        return False
+
+    def _move_wedges(self, amounts):
+        # Same geometry as Axes.pie with its defaults (startangle 0, counterclockwise, labeldistance 1.1)
+        total = float(sum(amounts))
+        theta = 0.0
+        for wedge, text, amount in zip(self.wedges, self.texts, amounts):
+            share = amount / total if total else 0.0
+            wedge.set_theta1(360 * theta)
+            wedge.set_theta2(360 * (theta + share))
+            middle = 2 * math.pi * (theta + share / 2)
+            x, y = 1.1 * math.cos(middle), 1.1 * math.sin(middle)
+            text.set_position((x, y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            theta += share
+
+    def show_message(self, text):
+        for artist in self.wedges + self.texts:
+            artist.remove()
+        self.wedges, self.texts, self.categories = [], [], None
+        self.message.set_text(text)
+        self.message.set_visible(True)
+
+class TrendLineChart:
+    """Monthly income/expense lines that keep their figure and update line data in place."""
+
+    def __init__(self, colors, figsize=(4, 3)):
+        self.colors = colors
+        self.figure = Figure(figsize=figsize)
+        self.figure.patch.set_facecolor(colors["bg_panel"])
+        self.ax = self.figure.add_subplot()
+        self.income_line, = self.ax.plot([], [], label="Income", color=colors["success"], linewidth=2)
+        self.expense_line, = self.ax.plot([], [], label="Expense", color=colors["danger"], linewidth=2)
+        self.ax.set_xlabel("Month", fontfamily='Roboto', fontsize=10, color=colors["text_primary"])
+        self.ax.set_ylabel("Amount ($)", fontfamily='Roboto', fontsize=10, color=colors["text_primary"])
+        self.ax.set_title("Monthly Trends", fontfamily='Roboto', fontsize=12, fontweight='bold', color=colors["text_primary"])
+        self.ax.legend(prop={'family': 'Roboto', 'size': 10})
+        self.ax.grid(True, color=colors["border"])
+        self.ax.set_facecolor(colors["bg_panel"])
+        self.message = self.ax.text(0.5, 0.5, "", ha='center', va='center', transform=self.ax.transAxes,
+                                    fontfamily='Roboto', fontsize=12, color=colors["text_secondary"], visible=False)
+        self.months = None
+
+    def update(self, months, income, expense):
+        self.message.set_visible(False)
+        x = range(len(months))
+        self.income_line.set_data(x, income)
+        self.expense_line.set_data(x, expense)
+        if list(months) != self.months:
+            self.months = list(months)
+            self.ax.set_xticks(list(x))
+            self.ax.set_xticklabels(self.months)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        for label in self.ax.get_xticklabels() + self.ax.get_yticklabels():
+            label.set_fontfamily('Roboto')
+            label.set_fontsize(10)
+            label.set_color(self.colors["text_primary"])
+
+    def show_message(self, text):
+        self.income_line.set_data([], [])
+        self.expense_line.set_data([], [])
+        self.message.set_text(text)
+        self.message.set_visible(True)
+
+class CategoryBarChart:
+    """Spending per category as bars on a persistent figure."""
+
+    def __init__(self, colors, figsize=(8, 4)):
+        self.colors = colors
+        self.figure = Figure(figsize=figsize)
+        self.ax = self.figure.add_subplot()
+        self.bars = None
+        self.message = self.ax.text(0.5, 0.5, "", ha='center', va='center', transform=self.ax.transAxes, visible=False)
+        self.ax.set_title("Spending by Category")
+        self.ax.set_xlabel("Category")
+        self.ax.set_ylabel("Total Amount")
+
+    def update(self, categories, totals):
+        self.message.set_visible(False)
+        if self.bars is not None and len(self.bars) == len(categories):
+            for bar, total in zip(self.bars, totals):
+                bar.set_height(total)
+        else:
+            if self.bars is not None:
+                self.bars.remove()
+            self.bars = self.ax.bar(range(len(categories)), totals, color=self.colors["primary"], width=0.5)
+        self.ax.set_xticks(range(len(categories)))
+        self.ax.set_xticklabels(categories, rotation=90)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.figure.tight_layout()
+
+    def show_message(self, text):
+        if self.bars is not None:
+            self.bars.remove()
+            self.bars = None
+        self.ax.set_xticks([])
+        self.message.set_text(text)
+        self.message.set_visible(True)
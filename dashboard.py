@@ -1,14 +1,60 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database import Database
-from dashboard_tab import DashboardTab
-from transactions_tab import TransactionsTab
-from budget_tab import BudgetTab
-from reports_tab import ReportsTab
-from reminders_tab import RemindersTab
-from goals_tab import GoalsTab
+from db_worker import DatabaseWorker
+from chart_renderer import ChartRenderer
+import importlib
 import logging
 
+# (attribute, notebook title, "module:Class", tables the tab renders). Tab modules pull in
+# tkcalendar and matplotlib, so they are imported only when the tab is first shown.
+TAB_SPECS = [
+    ("dashboard_tab", "Dashboard", "dashboard_tab:DashboardTab", ("transactions", "reminders")),
+    ("transactions_tab", "Transactions", "transactions_tab:TransactionsTab", ("transactions",)),
+    ("budget_tab", "Budget", "budget_tab:BudgetTab", ("budgets", "transactions")),
+    ("reports_tab", "Reports", "reports_tab:ReportsTab", ("transactions",)),
+    ("reminders_tab", "Reminders", "reminders_tab:RemindersTab", ("reminders",)),
+    ("goals_tab", "Goals", "goals_tab:GoalsTab", ("goals",)),
+]
+
+class ChangeBus:
+    """Delivers table change notifications to the tabs that render those tables.
+
+    Notifications published during one Tk event are coalesced and dispatched once
+    from after_idle, so a batch of writes triggers a single refresh per tab.
+    Each subscriber receives {table: row_ids}; row_ids is None when the changed
+    rows are not known individually.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.subscribers = []
+        self.pending = {}
+        self.scheduled = False
+
+    def subscribe(self, tables, callback):
+        self.subscribers.append((frozenset(tables), callback))
+
+    def publish(self, table, row_ids=None):
+        if row_ids is None or self.pending.get(table, set()) is None:
+            self.pending[table] = None
+        else:
+            self.pending.setdefault(table, set()).update(row_ids)
+        if not self.scheduled:
+            self.scheduled = True
+            self.root.after_idle(self.dispatch)
+
+    def dispatch(self):
+        changes, self.pending, self.scheduled = self.pending, {}, False
+        for tables, callback in self.subscribers:
+            relevant = {table: row_ids for table, row_ids in changes.items() if table in tables}
+            if not relevant:
+                continue
+            try:
+                callback(relevant)
+            except Exception as e:
+                logging.error(f"Change handler failed for {sorted(relevant)}: {str(e)}", exc_info=True)
+
 class PersonalFinanceDashboard:
     def __init__(self, root):
         self.root = root
@@ -16,6 +62,11 @@ class PersonalFinanceDashboard:
         try:
             self.db = Database('finance.db')
             logging.debug("Database initialized successfully in PersonalFinanceDashboard")
+            self.worker = DatabaseWorker(self.root, self.db.db_name, self.db.profile, self.db.pragmas, on_busy=self.set_busy)
+            self.renderer = ChartRenderer(self.root)
+            self.events = ChangeBus(self.root)
+            self.db.add_change_listener(self.events.publish)
+            self.db.add_change_listener(self.worker.note_change)
         except Exception as e:
             logging.error(f"Database connection failed: {str(e)}")
             messagebox.showerror("Error", f"Failed to connect to database: {str(e)}")
@@ -176,34 +227,72 @@ class PersonalFinanceDashboard:
         if self.tabs_initialized:
             logging.debug("Tabs already initialized, skipping")
             return
+        # Busy indicator shown while the database worker has queries outstanding
+        self.status_frame = ttk.Frame(self.root)
+        self.status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=12, pady=(0, 8))
+        self.busy_label = ttk.Label(self.status_frame, text="", font=('Roboto', 10), foreground=self.colors["text_secondary"])
+        self.busy_label.pack(side=tk.LEFT)
+        self.busy_bar = ttk.Progressbar(self.status_frame, mode='indeterminate', length=120)
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         try:
             logging.debug("Starting tab initialization")
-            self.dashboard_tab = DashboardTab(self, self.current_user)
-            logging.debug("DashboardTab instantiated")
-            self.transactions_tab = TransactionsTab(self)
-            logging.debug("TransactionsTab instantiated")
-            self.budget_tab = BudgetTab(self)
-            logging.debug("BudgetTab instantiated")
-            self.reports_tab = ReportsTab(self)
-            logging.debug("ReportsTab instantiated")
-            self.reminders_tab = RemindersTab(self)
-            logging.debug("RemindersTab instantiated")
-            self.goals_tab = GoalsTab(self)
-            logging.debug("GoalsTab instantiated")
+            # Tabs are placeholders until first shown; see build_tab
+            self.tabs = {}
+            for attr, title, target, tables in TAB_SPECS:
+                frame = ttk.Frame(self.notebook)
+                self.notebook.add(frame, text=title)
+                setattr(self, attr, None)
+                self.tabs[str(frame)] = {"attr": attr, "title": title, "target": target, "frame": frame, "tab": None, "dirty": False}
+                self.events.subscribe(tables, lambda changes, name=str(frame): self.on_data_changed(name))
             self.tabs_initialized = True
-            self.refresh_data()
-            if hasattr(self.reminders_tab, 'check_reminders'):
-                logging.debug("Calling check_reminders")
-                self.reminders_tab.check_reminders()
-            else:
-                logging.warning("check_reminders method not found in RemindersTab")
+            self.on_tab_changed()
         except Exception as e:
             logging.error(f"Failed to initialize tabs: {str(e)}", exc_info=True)
             messagebox.showerror("Error", f"Failed to initialize tabs: {str(e)}. Please check logs and restart the application if needed.")
             return
 
+    def build_tab(self, entry):
+        """Construct a tab the first time it is shown; construction loads its data."""
+        logging.debug(f"Building {entry['title']} tab")
+        module_name, class_name = entry["target"].split(":")
+        tab_class = getattr(importlib.import_module(module_name), class_name)
+        entry["tab"] = tab_class(self, entry["frame"])
+        entry["dirty"] = False
+        setattr(self, entry["attr"], entry["tab"])
+        logging.debug(f"{entry['title']} tab instantiated")
+        if hasattr(entry["tab"], 'check_reminders'):
+            logging.debug("Calling check_reminders")
+            entry["tab"].check_reminders()
+
+    def visible_tab(self):
+        return self.tabs.get(self.notebook.select())
+
+    def on_tab_changed(self, event=None):
+        entry = self.visible_tab()
+        if entry is None:
+            return
+        try:
+            if entry["tab"] is None:
+                self.build_tab(entry)
+            elif entry["dirty"]:
+                entry["dirty"] = False
+                entry["tab"].refresh()
+        except Exception as e:
+            logging.error(f"Failed to load {entry['title']} tab: {str(e)}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load {entry['title']} tab: {str(e)}")
+
+    def on_data_changed(self, name):
+        """Refresh a tab whose tables changed if it is showing, otherwise mark it dirty."""
+        entry = self.tabs[name]
+        if entry["tab"] is None:
+            return
+        if entry is self.visible_tab():
+            entry["tab"].refresh()
+        else:
+            entry["dirty"] = True
+
     def set_user(self, username):
         self.current_user = username
         logging.debug(f"Setting user: {username}")
@@ -214,26 +303,38 @@ class PersonalFinanceDashboard:
             logging.error("Root window already destroyed in set_user")
 
     def refresh_data(self):
+        """Refresh the visible tab now and every other built tab when it is next shown."""
         if not self.tabs_initialized:
             logging.debug("Tabs not initialized, skipping refresh_data")
             return
+        visible = self.visible_tab()
+        for entry in self.tabs.values():
+            if entry["tab"] is None:
+                continue
+            if entry is not visible:
+                entry["dirty"] = True
+                continue
+            try:
+                entry["tab"].refresh()
+            except Exception as e:
+                logging.error(f"Failed to refresh {entry['title']} tab: {str(e)}")
+                messagebox.showwarning("Warning", f"Failed to refresh {entry['title']} data: {str(e)}")
+
+    def set_busy(self, busy):
+        """Show or hide the loading indicator while background queries run."""
+        if not hasattr(self, 'busy_bar'):
+            return
         try:
-            for tab_name, tab in [
-                ("Dashboard", self.dashboard_tab),
-                ("Transactions", self.transactions_tab),
-                ("Budget", self.budget_tab),
-                ("Reports", self.reports_tab),
-                ("Reminders", self.reminders_tab),
-                ("Goals", self.goals_tab)
-            ]:
-                try:
-                    tab.refresh()
-                except Exception as e:
-                    logging.error(f"Failed to refresh {tab_name} tab: {str(e)}")
-                    messagebox.showwarning("Warning", f"Failed to refresh {tab_name} data: {str(e)}")
-        except Exception as e:
-            logging.error(f"Unexpected error in refresh_data: {str(e)}")
-            messagebox.showerror("Error", f"Failed to refresh data: {str(e)}")
+            if busy:
+                self.busy_label.config(text="Loading…")
+                self.busy_bar.pack(side=tk.LEFT, padx=8)
+                self.busy_bar.start(15)
+            else:
+                self.busy_bar.stop()
+                self.busy_bar.pack_forget()
+                self.busy_label.config(text="")
+        except tk.TclError as e:
+            logging.debug(f"Busy indicator unavailable: {str(e)}")
 
     def on_resize(self, event):
         """Handle window resize to adjust font sizes and padding dynamically."""
@@ -259,6 +360,14 @@ class PersonalFinanceDashboard:
             logging.error(f"Error in on_resize: {str(e)}")
 
     def on_close(self):
+        try:
+            self.worker.stop()
+        except Exception as e:
+            logging.error(f"Failed to stop database worker: {str(e)}")
+        try:
+            self.renderer.stop()
+        except Exception as e:
+            logging.error(f"Failed to stop chart renderer: {str(e)}")
         try:
             self.db.close()
             logging.debug("Database closed successfully")
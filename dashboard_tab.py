@@ -1,17 +1,19 @@
 import tkinter as tk
 from tkinter import ttk
 from datetime import datetime
-from utils import get_motivational_quote, success_message, error_message
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import logging
+from utils import get_motivational_quote, success_message, error_message, shift_month, TreeviewSync
+
+# Number of months, ending with the current one, shown on the trend chart
+TREND_MONTHS = 12
 
 class DashboardTab:
-    def __init__(self, app, username):
+    def __init__(self, app, tab):
         self.app = app
-        self.username = username
-        self.tab = ttk.Frame(self.app.notebook)
-        self.app.notebook.add(self.tab, text="Dashboard")
+        self.username = app.current_user
+        self.tab = tab
         self.create_widgets()
+        self.refresh()
 
     def create_widgets(self):
         main_frame = ttk.Frame(self.tab)
@@ -58,6 +60,7 @@ class DashboardTab:
             self.recent_transactions_tree.heading(col, text=col.capitalize())
             self.recent_transactions_tree.column(col, width=120, anchor='center', stretch=True)
         self.recent_transactions_tree.pack(fill=tk.X, expand=True, padx=5, pady=5)
+        self.recent_sync = TreeviewSync(self.recent_transactions_tree)
 
         reminders_frame = ttk.LabelFrame(main_frame, text="Upcoming Reminders ⏰", style='Card.TFrame')
         reminders_frame.grid(row=4, column=0, sticky='ew', padx=12, pady=5)
@@ -75,6 +78,7 @@ class DashboardTab:
         self.reminders_tree.column("status", width=120, anchor='center', stretch=True)
         self.reminders_tree.pack(fill=tk.X, expand=True, padx=5, pady=5)
         self.reminders_tree.tag_configure('overdue', background=self.app.colors["danger"], foreground='#FFFFFF')
+        self.reminders_sync = TreeviewSync(self.reminders_tree)
 
     def fade_in_quote(self):
         self.quote_label.configure(foreground=self.app.colors["accent"])
@@ -85,105 +89,68 @@ class DashboardTab:
         self.tab.after(10000, self.update_quote)
 
     def refresh(self):
-        for widget in self.pie_frame.winfo_children():
-            if isinstance(widget, ttk.Label) or isinstance(widget, tk.Canvas):
-                widget.destroy()
-        for widget in self.line_frame.winfo_children():
-            if isinstance(widget, ttk.Label) or isinstance(widget, tk.Canvas):
-                widget.destroy()
-
-        for item in self.recent_transactions_tree.get_children():
-            self.recent_transactions_tree.delete(item)
-        self.app.db.cursor.execute('''
-            SELECT date, amount, category, type, description 
-            FROM transactions 
-            ORDER BY date DESC 
-            LIMIT 5
-        ''')
-        for trans in self.app.db.cursor.fetchall():
-            self.recent_transactions_tree.insert("", tk.END, values=trans)
-
-        for item in self.reminders_tree.get_children():
-            self.reminders_tree.delete(item)
         today = datetime.now().date().strftime("%Y-%m-%d")
-        self.app.db.cursor.execute('''
-            SELECT name, due_date, amount, 
-                   CASE WHEN paid=1 THEN 'Paid' ELSE 'Pending' END as status
-            FROM reminders
-            WHERE due_date >= ? OR paid=0
-            ORDER BY due_date
-            LIMIT 5
-        ''', (today,))
-        for rem in self.app.db.cursor.fetchall():
-            name, due_date, amount, status = rem
-            due_date_obj = datetime.strptime(due_date, "%Y-%m-%d").date()
-            tag = 'overdue' if status == 'Pending' and due_date_obj <= datetime.now().date() else ''
-            self.reminders_tree.insert("", tk.END, values=(name, due_date, f"${amount:,.2f}", status), tags=(tag,))
-
-        self.update_expense_chart()
-        self.update_trend_chart()
-
-    def update_expense_chart(self):
-        self.app.db.cursor.execute('''
-            SELECT category, SUM(amount) 
-            FROM transactions 
-            WHERE type='Expense' 
-            GROUP BY category
-            HAVING SUM(amount) > 0
-        ''')
-        expense_data = self.app.db.cursor.fetchall()
-        if not expense_data:
-            ttk.Label(self.pie_frame, text="No expense data available", font=('Roboto', 12), foreground=self.app.colors["text_secondary"]).pack(pady=8)
+        current_month = datetime.now().strftime('%Y-%m')
+        first_month = shift_month(current_month, 1 - TREND_MONTHS)
+        # The lists are cheap and go first; the worker runs jobs in order, so they are not
+        # held up while the analytics columns load on the first refresh
+        self.app.worker.submit(
+            'dashboard.lists',
+            lambda repos: (repos.transactions.recent(5), repos.reminders.upcoming(today, 5)),
+            lambda lists: self.show_lists(*lists),
+            lambda e: logging.error(f"Failed to refresh dashboard: {str(e)}")
+        )
+        self.app.worker.submit(
+            'dashboard.charts',
+            lambda repos: (repos.analytics.expense_by_category(),
+                           repos.analytics.monthly_trend(first_month, current_month)),
+            lambda charts: self.show_charts(*charts),
+            lambda e: logging.error(f"Failed to refresh dashboard charts: {str(e)}")
+        )
+
+    def ensure_charts(self):
+        """Create both chart views once; the figures themselves are drawn on the chart renderer thread."""
+        if hasattr(self, 'expense_view'):
             return
-        categories = [row[0] for row in expense_data]
-        amounts = [row[1] for row in expense_data]
-
-        fig, ax = plt.subplots(figsize=(4, 3))
-        ax.pie(
-            amounts, 
-            labels=categories, 
-            colors=[self.app.colors["primary"], self.app.colors["accent"], self.app.colors["secondary"], self.app.colors["success"]],
-            textprops={'fontfamily': 'Roboto', 'fontsize': 10, 'color': self.app.colors["text_primary"]}
+        from chart_renderer import ChartView
+        from charts import ExpensePieChart, TrendLineChart
+        colors = self.app.colors
+        self.expense_view = ChartView(self.pie_frame, self.app.renderer, 'dashboard.expenses', lambda: ExpensePieChart(colors), colors["bg_panel"])
+        self.expense_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.trend_view = ChartView(self.line_frame, self.app.renderer, 'dashboard.trend', lambda: TrendLineChart(colors), colors["bg_panel"])
+        self.trend_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def show_lists(self, recent, reminders):
+        self.recent_sync.apply(
+            (trans.id, (trans.date, trans.amount, trans.category, trans.type, trans.description), ())
+            for trans in recent
         )
-        ax.set_title("Expense Distribution", fontfamily='Roboto', fontsize=12, fontweight='bold', color=self.app.colors["text_primary"])
-        fig.patch.set_facecolor(self.app.colors["bg_panel"])
-        canvas = FigureCanvasTkAgg(fig, master=self.pie_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        plt.close(fig)
-
-    def update_trend_chart(self):
-        self.app.db.cursor.execute('''
-            SELECT strftime('%Y-%m', date) as month, 
-                   SUM(CASE WHEN type='Income' THEN amount ELSE 0 END) as income,
-                   SUM(CASE WHEN type='Expense' THEN amount ELSE 0 END) as expense
-            FROM transactions
-            GROUP BY month
-            ORDER BY month
-        ''')
-        trend_data = self.app.db.cursor.fetchall()
+
+        reminder_rows = []
+        for rem in reminders:
+            due_date_obj = datetime.strptime(rem.due_date, "%Y-%m-%d").date()
+            tag = 'overdue' if rem.status == 'Pending' and due_date_obj <= datetime.now().date() else ''
+            reminder_rows.append((rem.id, (rem.name, rem.due_date, f"${rem.amount:,.2f}", rem.status), (tag,)))
+        self.reminders_sync.apply(reminder_rows)
+
+    def show_charts(self, expenses, trend):
+        self.ensure_charts()
+        self.update_expense_chart(expenses)
+        self.update_trend_chart(trend)
+
+    def update_expense_chart(self, expense_data):
+        if not expense_data:
+            self.expense_view.draw(lambda chart: chart.show_message("No expense data available"))
+            return
+        categories = [row.category for row in expense_data]
+        amounts = [row.total for row in expense_data]
+        self.expense_view.draw(lambda chart: chart.update(categories, amounts))
+
+    def update_trend_chart(self, trend_data):
         if len(trend_data) < 2:
-            ttk.Label(self.line_frame, text="Not enough data for trends", font=('Roboto', 12), foreground=self.app.colors["text_secondary"]).pack(pady=8)
+            self.trend_view.draw(lambda chart: chart.show_message("Not enough data for trends"))
             return
-        months = [row[0] for row in trend_data]
-        income = [row[1] for row in trend_data]
-        expense = [row[2] for row in trend_data]
-
-        fig, ax = plt.subplots(figsize=(4, 3))
-        ax.plot(months, income, label="Income", color=self.app.colors["success"], linewidth=2)
-        ax.plot(months, expense, label="Expense", color=self.app.colors["danger"], linewidth=2)
-        ax.set_xlabel("Month", fontfamily='Roboto', fontsize=10, color=self.app.colors["text_primary"])
-        ax.set_ylabel("Amount ($)", fontfamily='Roboto', fontsize=10, color=self.app.colors["text_primary"])
-        ax.set_title("Monthly Trends", fontfamily='Roboto', fontsize=12, fontweight='bold', color=self.app.colors["text_primary"])
-        ax.legend(prop={'family': 'Roboto', 'size': 10})
-        ax.grid(True, color=self.app.colors["border"])
-        ax.set_facecolor(self.app.colors["bg_panel"])
-        fig.patch.set_facecolor(self.app.colors["bg_panel"])
-        for label in ax.get_xticklabels() + ax.get_yticklabels():
-            label.set_fontfamily('Roboto')
-            label.set_fontsize(10)
-            label.set_color(self.app.colors["text_primary"])
-        canvas = FigureCanvasTkAgg(fig, master=self.line_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        plt.close(fig)
\ No newline at end of file
+        months = [row.month for row in trend_data]
+        income = [row.income for row in trend_data]
+        expense = [row.expense for row in trend_data]
+        self.trend_view.draw(lambda chart: chart.update(months, income, expense))
@@ -1,7 +1,12 @@
 import sqlite3
 import bcrypt
+import hashlib
+import json
 import logging
 import os
+import re
+from collections import namedtuple
+from utils import day_number, day_range, split_date_range
 
 # Setup logging for database errors
 logging.basicConfig(
@@ -10,129 +15,1341 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-class Database:
-    def __init__(self, db_name):
+# Connection PRAGMA presets. "durable" fsyncs every commit; "balanced" survives application
+# crashes but may lose the last commits on power loss; "fast" never fsyncs and can corrupt
+# the database if the OS crashes, so it is meant for imports and benchmarks.
+PERFORMANCE_PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+DEFAULT_PROFILE = "balanced"
+
+# Prepared statements kept per connection; repositories reuse identical SQL text so they hit this cache
+STATEMENT_CACHE_SIZE = 256
+
+_PRAGMA_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+_PRAGMA_INTEGERS = {"cache_size", "mmap_size", "busy_timeout"}
+
+def resolve_profile(profile=DEFAULT_PROFILE, **overrides):
+    """Return the validated PRAGMA settings for a named profile with any overrides applied."""
+    if profile not in PERFORMANCE_PROFILES:
+        raise ValueError(f"Unknown performance profile '{profile}'. Choose from: {', '.join(PERFORMANCE_PROFILES)}")
+    settings = dict(PERFORMANCE_PROFILES[profile])
+    for name, value in overrides.items():
+        if name in _PRAGMA_CHOICES:
+            value = str(value).upper()
+            if value not in _PRAGMA_CHOICES[name]:
+                raise ValueError(f"Invalid value '{value}' for PRAGMA {name}")
+        elif name in _PRAGMA_INTEGERS:
+            value = int(value)
+        else:
+            raise ValueError(f"Unsupported PRAGMA '{name}'")
+        settings[name] = value
+    return settings
+
+def transaction_fingerprint(day, cents, description):
+    """Signed 64-bit hash of a day number, amount in cents and description; case, punctuation and spacing are ignored."""
+    text = ' '.join(re.findall(r'\w+', (description or '').casefold()))
+    digest = hashlib.blake2b(f"{day}|{cents}|{text}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def connect(db_name, profile=DEFAULT_PROFILE, **overrides):
+    """Open a connection to db_name configured with the given performance profile."""
+    settings = resolve_profile(profile, **overrides)
+    conn = sqlite3.connect(db_name, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign key support
+    conn.create_function('transaction_fingerprint', 3, transaction_fingerprint, deterministic=True)
+    for name, value in settings.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal_mode.upper() != settings["journal_mode"]:
+        logging.warning(f"Requested journal_mode {settings['journal_mode']} but database is using {journal_mode}")
+    logging.debug(f"Opened {db_name} with profile '{profile}': {settings}")
+    return conn
+
+def _table_columns(cursor, table):
+    cursor.execute(f'PRAGMA table_info({table})')
+    return [row[1] for row in cursor.fetchall()]
+
+def _migrate_v1_base_schema(cursor):
+    """Create the original tables and fold in the columns older builds added at runtime."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password BLOB NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            type TEXT NOT NULL CHECK(type IN ('Income', 'Expense', 'Savings')),
+            description TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS budgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,
+            amount REAL NOT NULL,
+            month TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            target_date TEXT NOT NULL,
+            progress REAL DEFAULT 0.0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL DEFAULT 'General',
+            due_date TEXT NOT NULL,
+            status TEXT DEFAULT 'Pending',
+            paid INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Databases created by earlier builds may predate these columns
+    goal_columns = _table_columns(cursor, 'goals')
+    if 'progress' not in goal_columns:
+        cursor.execute('ALTER TABLE goals ADD COLUMN progress REAL DEFAULT 0.0')
+        logging.info("Added 'progress' column to goals table")
+
+    reminder_columns = _table_columns(cursor, 'reminders')
+    if 'category' not in reminder_columns:
+        cursor.execute("ALTER TABLE reminders ADD COLUMN category TEXT NOT NULL DEFAULT 'General'")
+        logging.info("Added 'category' column to reminders table")
+    if 'status' not in reminder_columns:
+        cursor.execute("ALTER TABLE reminders ADD COLUMN status TEXT DEFAULT 'Pending'")
+        logging.info("Added 'status' column to reminders table")
+    if 'paid' not in reminder_columns:
+        cursor.execute('ALTER TABLE reminders ADD COLUMN paid INTEGER DEFAULT 0')
+        cursor.execute("UPDATE reminders SET paid = (CASE WHEN status = 'Paid' THEN 1 ELSE 0 END)")
+        logging.info("Added 'paid' column to reminders table and migrated status")
+
+def _migrate_v2_query_indexes(cursor):
+    """Index the columns the tabs filter, sort and aggregate on; make budgets unique per month/category."""
+    # Range filters, ORDER BY date and per-category report sums (covering)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_date_category ON transactions(date, category, amount)')
+    # Expense breakdown by category (covering)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_type_category ON transactions(type, category, amount)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_due_date ON reminders(due_date)')
+    # Unpaid reminders in due order, for the upcoming list
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_paid_due_date ON reminders(paid, due_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_goals_target_date ON goals(target_date)')
+
+    # INSERT OR REPLACE in BudgetTab only replaces with a unique key; keep the latest duplicate
+    cursor.execute('''
+        DELETE FROM budgets
+        WHERE id NOT IN (SELECT MAX(id) FROM budgets GROUP BY month, category)
+    ''')
+    if cursor.rowcount > 0:
+        logging.info(f"Removed {cursor.rowcount} duplicate budget rows")
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_budgets_month_category ON budgets(month, category)')
+
+def _migrate_v3_month_range_index(cursor):
+    """Cover the per-type date-range sums used by the budget and trend views."""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_type_date ON transactions(type, date, category, amount)')
+
+def _migrate_v4_monthly_rollup(cursor):
+    """Maintain per-month, per-category totals so aggregate views never re-scan transactions."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS monthly_category_totals (
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            type TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, category, type)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('DELETE FROM monthly_category_totals')
+    cursor.execute('''
+        INSERT INTO monthly_category_totals (month, category, type, total, count)
+        SELECT substr(date, 1, 7), category, type, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY substr(date, 1, 7), category, type
+    ''')
+    add_row = '''
+            INSERT INTO monthly_category_totals (month, category, type, total, count)
+            VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.type, NEW.amount, 1)
+            ON CONFLICT (month, category, type) DO UPDATE
+            SET total = total + excluded.total, count = count + 1;
+    '''
+    remove_row = '''
+            UPDATE monthly_category_totals
+            SET total = total - OLD.amount, count = count - 1
+            WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND type = OLD.type;
+            DELETE FROM monthly_category_totals
+            WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND type = OLD.type
+            AND count <= 0;
+    '''
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_insert
+        AFTER INSERT ON transactions
+        BEGIN {add_row}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_delete
+        AFTER DELETE ON transactions
+        BEGIN {remove_row}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_update
+        AFTER UPDATE OF date, amount, category, type ON transactions
+        BEGIN {remove_row} {add_row}
+        END
+    ''')
+    # Month-scoped budget and trend sums now read the rollup instead
+    cursor.execute('DROP INDEX IF EXISTS idx_transactions_type_date')
+
+def _migrate_v5_keyset_index(cursor):
+    """Index transactions on (date, rowid) so the transaction grid can page by (date, id) keys."""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_date_id ON transactions(date)')
+
+def _migrate_v6_description_search(cursor):
+    """Full-text index over transaction descriptions, kept in sync by triggers."""
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+                description,
+                content='transactions',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite builds without FTS5 fall back to LIKE searches
+        logging.warning(f"Full-text search unavailable, searches will scan descriptions: {str(e)}")
+        return
+    cursor.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert
+        AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete
+        AFTER DELETE ON transactions
+        BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+        AFTER UPDATE OF description ON transactions
+        BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+            INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    ''')
+
+# Columns of the transactions view, which presents the ledger in the original layout
+LEDGER_VIEW_COLUMNS = '''
+    l.id, date(l.day + 0.5) AS date, l.cents / 100.0 AS amount, c.name AS category, t.name AS type, l.description
+'''
+LEDGER_JOINS = '''
+    JOIN categories c ON c.id = l.category_id
+    JOIN transaction_types t ON t.id = l.type_id
+'''
+
+# Writes through the transactions view go to ledger; date() drops any time of day first, since
+# julianday() of a time after noon would round up to the next day number
+VIEW_LEDGER_VALUES = '''
+            CAST(julianday(date(NEW.date)) AS INTEGER),
+            CAST(ROUND(NEW.amount * 100) AS INTEGER),
+            (SELECT id FROM categories WHERE name = NEW.category),
+            (SELECT id FROM transaction_types WHERE name = NEW.type),
+            NEW.description
+'''
+
+def _create_transactions_view_triggers(cursor):
+    # Edited rows lose their fingerprint; begin_import() fills in missing ones from the new content
+    for action in ('insert', 'delete', 'update'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS trg_transactions_view_{action}')
+    cursor.execute(f'''
+        CREATE TRIGGER trg_transactions_view_insert
+        INSTEAD OF INSERT ON transactions
+        BEGIN
+            INSERT OR IGNORE INTO categories (name) VALUES (NEW.category);
+            INSERT INTO ledger (id, day, cents, category_id, type_id, description)
+            VALUES (NEW.id, {VIEW_LEDGER_VALUES});
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_transactions_view_delete
+        INSTEAD OF DELETE ON transactions
+        BEGIN
+            DELETE FROM ledger WHERE id = OLD.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER trg_transactions_view_update
+        INSTEAD OF UPDATE ON transactions
+        BEGIN
+            INSERT OR IGNORE INTO categories (name) VALUES (NEW.category);
+            UPDATE ledger SET (id, day, cents, category_id, type_id, description, fingerprint) = (NEW.id, {VIEW_LEDGER_VALUES}, NULL)
+            WHERE id = OLD.id;
+        END
+    ''')
+
+def _migrate_v7_compact_ledger(cursor):
+    """Store transactions compactly in ledger and keep a transactions view in the old layout.
+
+    Dates become integer day numbers (CAST(julianday(date(date)) AS INTEGER), so a time
+    of day never moves a row to the next day; date(day + 0.5) turns one back), amounts become integer cents, and category and type become ids
+    into the categories and transaction_types dictionaries. Row ids are kept, so the
+    full-text index stays valid. Rows whose date cannot be parsed are moved to
+    transactions_unmigrated rather than dropped.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transaction_types (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE CHECK(name IN ('Income', 'Expense', 'Savings'))
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO transaction_types (id, name) VALUES (1, 'Income'), (2, 'Expense'), (3, 'Savings')")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day INTEGER NOT NULL,
+            cents INTEGER NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories(id),
+            type_id INTEGER NOT NULL REFERENCES transaction_types(id),
+            description TEXT
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO categories (name) SELECT DISTINCT category FROM transactions ORDER BY category')
+    cursor.execute('''
+        INSERT INTO ledger (id, day, cents, category_id, type_id, description)
+        SELECT t.id, CAST(julianday(date(t.date)) AS INTEGER), CAST(ROUND(t.amount * 100) AS INTEGER), c.id, y.id, t.description
+        FROM transactions t
+        JOIN categories c ON c.name = t.category
+        JOIN transaction_types y ON y.name = t.type
+        WHERE date(t.date) IS NOT NULL
+        ORDER BY t.id
+    ''')
+    logging.info(f"Copied {cursor.rowcount} transactions into ledger")
+    cursor.execute('SELECT COUNT(*) FROM transactions WHERE date(date) IS NULL')
+    unparsed = cursor.fetchone()[0]
+    if unparsed:
+        cursor.execute('CREATE TABLE transactions_unmigrated AS SELECT * FROM transactions WHERE date(date) IS NULL')
+        # The full-text index outlives the table; drop the moved rows from it while it can still read them
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'")
+        if cursor.fetchone():
+            cursor.execute('''
+                INSERT INTO transactions_fts (transactions_fts, rowid, description)
+                SELECT 'delete', id, description FROM transactions_unmigrated
+            ''')
+        logging.warning(f"Moved {unparsed} transactions with unreadable dates to transactions_unmigrated")
+    # Keep AUTOINCREMENT from handing out ids that deleted transactions once used
+    cursor.execute('''
+        UPDATE sqlite_sequence
+        SET seq = MAX(seq, (SELECT seq FROM sqlite_sequence WHERE name = 'transactions'))
+        WHERE name = 'ledger' AND EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'transactions')
+    ''')
+    # Dropping the table also drops its indexes and the rollup and full-text triggers
+    cursor.execute('DROP TABLE transactions')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_day ON ledger(day)')
+    # Covers the per-range totals; paging needs (day, id) order and keeps idx_ledger_day
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_day_totals ON ledger(day, category_id, type_id, cents)')
+
+    cursor.execute(f'''
+        CREATE VIEW transactions AS
+        SELECT {LEDGER_VIEW_COLUMNS}
+        FROM ledger l {LEDGER_JOINS}
+    ''')
+    _create_transactions_view_triggers(cursor)
+
+    # The monthly rollup moves to integer cents and dictionary ids as well
+    cursor.execute('DROP TABLE IF EXISTS monthly_category_totals')
+    cursor.execute('''
+        CREATE TABLE monthly_category_totals (
+            month TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            type_id INTEGER NOT NULL,
+            cents INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, category_id, type_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT INTO monthly_category_totals (month, category_id, type_id, cents, count)
+        SELECT strftime('%Y-%m', day + 0.5), category_id, type_id, SUM(cents), COUNT(*)
+        FROM ledger
+        GROUP BY 1, category_id, type_id
+    ''')
+    add_row = '''
+            INSERT INTO monthly_category_totals (month, category_id, type_id, cents, count)
+            VALUES (strftime('%Y-%m', NEW.day + 0.5), NEW.category_id, NEW.type_id, NEW.cents, 1)
+            ON CONFLICT (month, category_id, type_id) DO UPDATE
+            SET cents = cents + excluded.cents, count = count + 1;
+    '''
+    remove_row = '''
+            UPDATE monthly_category_totals
+            SET cents = cents - OLD.cents, count = count - 1
+            WHERE month = strftime('%Y-%m', OLD.day + 0.5) AND category_id = OLD.category_id AND type_id = OLD.type_id;
+            DELETE FROM monthly_category_totals
+            WHERE month = strftime('%Y-%m', OLD.day + 0.5) AND category_id = OLD.category_id AND type_id = OLD.type_id
+            AND count <= 0;
+    '''
+    cursor.execute(f'''
+        CREATE TRIGGER trg_ledger_rollup_insert
+        AFTER INSERT ON ledger
+        BEGIN {add_row}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER trg_ledger_rollup_delete
+        AFTER DELETE ON ledger
+        BEGIN {remove_row}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER trg_ledger_rollup_update
+        AFTER UPDATE OF day, cents, category_id, type_id ON ledger
+        BEGIN {remove_row} {add_row}
+        END
+    ''')
+
+    # transactions_fts keeps the view as its content table; only its triggers move to ledger
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'")
+    if cursor.fetchone():
+        cursor.execute('''
+            CREATE TRIGGER trg_ledger_fts_insert
+            AFTER INSERT ON ledger
+            BEGIN
+                INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, NEW.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER trg_ledger_fts_delete
+            AFTER DELETE ON ledger
+            BEGIN
+                INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER trg_ledger_fts_update
+            AFTER UPDATE OF id, description ON ledger
+            BEGIN
+                INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+                INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, NEW.description);
+            END
+        ''')
+
+def _migrate_v8_bulk_load(cursor):
+    """Let bulk inserts maintain the rollup and full-text index once per batch instead of per row.
+
+    While ledger_bulk_load holds a row, the per-row insert triggers stand aside; the
+    writer adds the row and removes it again inside its own transaction, so no other
+    connection ever sees it.
+    """
+    cursor.execute('CREATE TABLE IF NOT EXISTS ledger_bulk_load (active INTEGER NOT NULL)')
+    cursor.execute('DROP TRIGGER IF EXISTS trg_ledger_rollup_insert')
+    cursor.execute('''
+        CREATE TRIGGER trg_ledger_rollup_insert
+        AFTER INSERT ON ledger
+        WHEN NOT EXISTS (SELECT 1 FROM ledger_bulk_load)
+        BEGIN
+            INSERT INTO monthly_category_totals (month, category_id, type_id, cents, count)
+            VALUES (strftime('%Y-%m', NEW.day + 0.5), NEW.category_id, NEW.type_id, NEW.cents, 1)
+            ON CONFLICT (month, category_id, type_id) DO UPDATE
+            SET cents = cents + excluded.cents, count = count + 1;
+        END
+    ''')
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_ledger_fts_insert'")
+    if cursor.fetchone():
+        cursor.execute('DROP TRIGGER trg_ledger_fts_insert')
+        cursor.execute('''
+            CREATE TRIGGER trg_ledger_fts_insert
+            AFTER INSERT ON ledger
+            WHEN NOT EXISTS (SELECT 1 FROM ledger_bulk_load)
+            BEGIN
+                INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, NEW.description);
+            END
+        ''')
+
+def _migrate_v9_fingerprints(cursor):
+    """Fingerprint every ledger row so imports can recognise transactions they already hold.
+
+    Needs the transaction_fingerprint() SQL function that connect() registers. Rows
+    written later without one (through the transactions view, or by other tools) are
+    fingerprinted when the next import starts.
+    """
+    cursor.execute('ALTER TABLE ledger ADD COLUMN fingerprint INTEGER')
+    cursor.execute('UPDATE ledger SET fingerprint = transaction_fingerprint(day, cents, description)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_fingerprint ON ledger(fingerprint)')
+
+def _migrate_v10_category_rules(cursor):
+    """Keep the auto-categorization rules, tried in position order, with amounts in cents and the category as an id."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS category_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            position INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            pattern TEXT NOT NULL DEFAULT '',
+            min_cents INTEGER,
+            max_cents INTEGER,
+            category_id INTEGER NOT NULL REFERENCES categories(id)
+        )
+    ''')
+
+def _migrate_v11_unmigrated_search_entries(cursor):
+    """Remove the full-text entries that schema 7 left behind for rows moved to transactions_unmigrated."""
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('transactions_fts', 'transactions_unmigrated')")
+    if cursor.fetchone()[0] < 2:
+        return
+    cursor.execute('''
+        INSERT INTO transactions_fts (transactions_fts, rowid, description)
+        SELECT 'delete', u.id, u.description
+        FROM transactions_unmigrated u
+        WHERE u.id NOT IN (SELECT id FROM ledger)
+        AND EXISTS (SELECT 1 FROM transactions_fts_docsize d WHERE d.id = u.id)
+    ''')
+    logging.info(f"Removed {cursor.rowcount} orphaned full-text entries")
+
+def _migrate_v12_view_dates_without_time(cursor):
+    """Recreate the transactions view triggers so dates with a time of day keep their day number."""
+    _create_transactions_view_triggers(cursor)
+
+def _migrate_v13_view_edits_clear_fingerprints(cursor):
+    """Recreate the transactions view triggers so an edited row is fingerprinted again from its new content."""
+    _create_transactions_view_triggers(cursor)
+
+# Ordered schema migrations; step N upgrades a database from user_version N-1 to N.
+# Append new steps to the end and never edit a step that has already shipped.
+MIGRATIONS = [
+    _migrate_v1_base_schema,
+    _migrate_v2_query_indexes,
+    _migrate_v3_month_range_index,
+    _migrate_v4_monthly_rollup,
+    _migrate_v5_keyset_index,
+    _migrate_v6_description_search,
+    _migrate_v7_compact_ledger,
+    _migrate_v8_bulk_load,
+    _migrate_v9_fingerprints,
+    _migrate_v10_category_rules,
+    _migrate_v11_unmigrated_search_entries,
+    _migrate_v12_view_dates_without_time,
+    _migrate_v13_view_edits_clear_fingerprints,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+# Steps that rewrite most of an existing database; a VACUUM afterwards returns the freed pages
+REWRITING_MIGRATIONS = {_migrate_v7_compact_ledger}
+
+def fts_query(text):
+    """Turn free text into an FTS5 query that prefix-matches every word, or '' if there are none."""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+# Lightweight row objects returned by the repositories
+Transaction = namedtuple('Transaction', 'id date amount category type description')
+SearchHit = namedtuple('SearchHit', 'position id date amount category type description')
+BudgetLine = namedtuple('BudgetLine', 'id category budget actual')
+Goal = namedtuple('Goal', 'id name amount category target_date progress')
+Reminder = namedtuple('Reminder', 'id name amount category due_date status')
+CategoryTotal = namedtuple('CategoryTotal', 'category total')
+MonthlyTrend = namedtuple('MonthlyTrend', 'month income expense')
+CategoryRule = namedtuple('CategoryRule', 'id kind pattern min_amount max_amount category')
+
+class Repository:
+    """Base for the table repositories: each owns a cursor on the shared connection.
+
+    notify(table, row_ids) is called after every committed write; row_ids is None
+    when the affected rows are not known individually.
+    """
+
+    def __init__(self, conn, notify=None):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.notify = notify
+
+    def _fetch_all(self, row_type, sql, params=()):
+        self.cursor.execute(sql, params)
+        return [row_type._make(row) for row in self.cursor.fetchall()]
+
+    def _stream(self, row_type, sql, params=()):
+        """Execute sql on a fresh cursor that yields row_type rows, for fetchmany() streaming."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = lambda _, row: row_type._make(row)
+        return cursor.execute(sql, params)
+
+    def _fetch_one(self, row_type, sql, params=()):
+        self.cursor.execute(sql, params)
+        row = self.cursor.fetchone()
+        return row_type._make(row) if row else None
+
+    def _write(self, sql, params=()):
+        """Execute a single write statement and commit; returns the cursor for rowcount/lastrowid."""
+        try:
+            self.cursor.execute(sql, params)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return self.cursor
+
+    def _changed(self, table, row_ids=None):
+        if self.notify:
+            self.notify(table, row_ids)
+
+class TransactionsRepo(Repository):
+    """Transactions stored in ledger; dates are passed in and returned as 'YYYY-MM-DD' text."""
+    IN_RANGE = f'''
+        SELECT {LEDGER_VIEW_COLUMNS}
+        FROM ledger l {LEDGER_JOINS}
+        WHERE l.day BETWEEN ? AND ?
+        ORDER BY l.day DESC
+    '''
+    RECENT = f'''
+        SELECT {LEDGER_VIEW_COLUMNS}
+        FROM ledger l {LEDGER_JOINS}
+        ORDER BY l.day DESC, l.id DESC
+        LIMIT ?
+    '''
+    COUNT_IN_RANGE = 'SELECT COUNT(*) FROM ledger WHERE day BETWEEN ? AND ?'
+    # Newest first; PAGE_AFTER continues strictly after a (day, id) key from a previous page
+    # Pages pick their ids from idx_ledger_day alone, so skipped rows never touch the joins
+    PAGE = f'''
+        SELECT {LEDGER_VIEW_COLUMNS}
+        FROM (
+            SELECT id FROM ledger
+            WHERE day BETWEEN ? AND ?
+            ORDER BY day DESC, id DESC
+            LIMIT ? OFFSET ?
+        ) p
+        JOIN ledger l ON l.id = p.id {LEDGER_JOINS}
+        ORDER BY l.day DESC, l.id DESC
+    '''
+    PAGE_AFTER = f'''
+        SELECT {LEDGER_VIEW_COLUMNS}
+        FROM (
+            SELECT id FROM ledger
+            WHERE day BETWEEN ? AND ? AND (day, id) < (?, ?)
+            ORDER BY day DESC, id DESC
+            LIMIT ? OFFSET ?
+        ) p
+        JOIN ledger l ON l.id = p.id {LEDGER_JOINS}
+        ORDER BY l.day DESC, l.id DESC
+    '''
+    # Oldest first, for pages that are closer to the end of the range than to any known key
+    PAGE_FROM_END = f'''
+        SELECT {LEDGER_VIEW_COLUMNS}
+        FROM (
+            SELECT id FROM ledger
+            WHERE day BETWEEN ? AND ?
+            ORDER BY day, id
+            LIMIT ? OFFSET ?
+        ) p
+        JOIN ledger l ON l.id = p.id {LEDGER_JOINS}
+        ORDER BY l.day, l.id
+    '''
+    # Search results are ranked once into a temp table on the searching connection, then paged by position
+    # (text, start_date, end_date) of the search whose hits are in search_hits on this connection
+    searched = None
+    SEARCH_TABLE = 'CREATE TEMP TABLE IF NOT EXISTS search_hits (position INTEGER PRIMARY KEY, id INTEGER NOT NULL)'
+    SEARCH_CLEAR = 'DELETE FROM search_hits'
+    SEARCH_RANKED = '''
+        INSERT INTO search_hits (id)
+        SELECT l.id
+        FROM transactions_fts f
+        JOIN ledger l ON l.id = f.rowid
+        WHERE transactions_fts MATCH ? AND l.day BETWEEN ? AND ?
+        ORDER BY f.rank, l.id
+    '''
+    SEARCH_LIKE = '''
+        INSERT INTO search_hits (id)
+        SELECT id
+        FROM ledger
+        WHERE description LIKE ? ESCAPE '\\' AND day BETWEEN ? AND ?
+        ORDER BY day DESC, id DESC
+    '''
+    SEARCH_PAGE = f'''
+        SELECT h.position, {LEDGER_VIEW_COLUMNS}
+        FROM search_hits h
+        JOIN ledger l ON l.id = h.id {LEDGER_JOINS}
+        WHERE h.position > ?
+        ORDER BY h.position
+        LIMIT ?
+    '''
+    HAS_FTS = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'"
+    EXPORT = f'''
+        SELECT {LEDGER_VIEW_COLUMNS}
+        FROM ledger l {LEDGER_JOINS}
+        WHERE l.day BETWEEN ? AND ?
+        ORDER BY l.day, l.id
+    '''
+    ADD_CATEGORY = 'INSERT OR IGNORE INTO categories (name) VALUES (?)'
+    LAST_ID = "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'ledger'), 0)"
+    BULK_START = 'INSERT INTO ledger_bulk_load (active) VALUES (1)'
+    BULK_END = 'DELETE FROM ledger_bulk_load'
+    BULK_ROLLUP = '''
+        INSERT INTO monthly_category_totals (month, category_id, type_id, cents, count)
+        SELECT strftime('%Y-%m', day + 0.5), category_id, type_id, SUM(cents), COUNT(*)
+        FROM ledger
+        WHERE id > ?
+        GROUP BY 1, 2, 3
+        ON CONFLICT (month, category_id, type_id) DO UPDATE
+        SET cents = cents + excluded.cents, count = count + excluded.count
+    '''
+    BULK_FTS = 'INSERT INTO transactions_fts (rowid, description) SELECT id, description FROM ledger WHERE id > ?'
+    INSERT = '''
+        INSERT INTO ledger (day, cents, category_id, type_id, description, fingerprint)
+        VALUES (?, ?, (SELECT id FROM categories WHERE name = ?), (SELECT id FROM transaction_types WHERE name = ?), ?, ?)
+    '''
+    # Deduplicating imports stage each chunk in a temp table on the importing connection. A staged
+    # row is new when its copy number among the import's rows with the same fingerprint is higher
+    # than the number of ledger rows that had that fingerprint before the import began.
+    STAGING_TABLE = '''
+        CREATE TEMP TABLE IF NOT EXISTS import_staging (
+            seq INTEGER PRIMARY KEY,
+            day INTEGER, cents INTEGER, category TEXT, type TEXT, description TEXT, fingerprint INTEGER
+        )
+    '''
+    STAGING_INDEX = 'CREATE INDEX IF NOT EXISTS temp.idx_import_staging_fingerprint ON import_staging(fingerprint, seq)'
+    STAGING_CLEAR = 'DELETE FROM import_staging'
+    STAGING_LAST = 'SELECT COALESCE(MAX(seq), 0) FROM import_staging'
+    STAGE = '''
+        INSERT INTO import_staging (day, cents, category, type, description, fingerprint)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    FILL_FINGERPRINTS = 'UPDATE ledger SET fingerprint = transaction_fingerprint(day, cents, description) WHERE fingerprint IS NULL'
+    INSERT_NEW_STAGED = '''
+        WITH chunk AS (
+            SELECT * FROM import_staging WHERE seq > ?
+        ),
+        copies AS (
+            SELECT seq, ROW_NUMBER() OVER (PARTITION BY fingerprint ORDER BY seq) AS copy
+            FROM import_staging
+            WHERE fingerprint IN (SELECT fingerprint FROM chunk)
+        ),
+        known AS (
+            SELECT fingerprint, COUNT(*) AS count
+            FROM ledger
+            WHERE fingerprint IN (SELECT fingerprint FROM chunk) AND id <= ?
+            GROUP BY fingerprint
+        )
+        INSERT INTO ledger (day, cents, category_id, type_id, description, fingerprint)
+        SELECT s.day, s.cents, c.id, y.id, s.description, s.fingerprint
+        FROM chunk s
+        JOIN copies USING (seq)
+        LEFT JOIN known k USING (fingerprint)
+        JOIN categories c ON c.name = s.category
+        JOIN transaction_types y ON y.name = s.type
+        WHERE copies.copy > COALESCE(k.count, 0)
+        ORDER BY s.seq
+    '''
+    DELETE = 'DELETE FROM ledger WHERE id = ?'
+    # Batch edits snapshot the rows they touch; RESTORE puts a snapshot back in one statement,
+    # re-inserting deleted rows and undoing edits to the others
+    SNAPSHOT = '''
+        SELECT id, day, cents, category_id, type_id, description, fingerprint
+        FROM ledger
+        WHERE id IN (SELECT value FROM json_each(?))
+    '''
+    RESTORE = '''
+        INSERT INTO ledger (id, day, cents, category_id, type_id, description, fingerprint)
+        SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]'),
+               json_extract(value, '$[3]'), json_extract(value, '$[4]'), json_extract(value, '$[5]'),
+               json_extract(value, '$[6]')
+        FROM json_each(?)
+        WHERE true
+        ON CONFLICT (id) DO UPDATE
+        SET day = excluded.day, cents = excluded.cents, category_id = excluded.category_id,
+            type_id = excluded.type_id, description = excluded.description, fingerprint = excluded.fingerprint
+    '''
+    SET_TYPE = 'UPDATE ledger SET type_id = (SELECT id FROM transaction_types WHERE name = ?) WHERE id = ?'
+    CATEGORIZER_ROWS = 'SELECT l.id, l.cents, l.description, c.name FROM ledger l JOIN categories c ON c.id = l.category_id'
+    SET_CATEGORY = 'UPDATE ledger SET category_id = (SELECT id FROM categories WHERE name = ?) WHERE id = ?'
+    EXPENSE_BY_CATEGORY = '''
+        SELECT c.name, ROUND(SUM(r.cents) / 100.0, 2) as amount
+        FROM monthly_category_totals r
+        JOIN categories c ON c.id = r.category_id
+        WHERE r.type_id = (SELECT id FROM transaction_types WHERE name = 'Expense')
+        GROUP BY c.name
+        HAVING amount > 0
+    '''
+    MONTHLY_TREND = '''
+        SELECT r.month,
+               ROUND(SUM(CASE WHEN y.name='Income' THEN r.cents ELSE 0 END) / 100.0, 2) as income,
+               ROUND(SUM(CASE WHEN y.name='Expense' THEN r.cents ELSE 0 END) / 100.0, 2) as expense
+        FROM monthly_category_totals r
+        JOIN transaction_types y ON y.id = r.type_id
+        WHERE r.month BETWEEN ? AND ?
+        GROUP BY r.month
+        ORDER BY r.month
+    '''
+    ROLLUP_PART = "SELECT category_id, cents FROM monthly_category_totals WHERE month BETWEEN ? AND ?"
+    EDGE_PART = "SELECT category_id, cents FROM ledger WHERE day BETWEEN ? AND ?"
+
+    def in_range(self, start_date, end_date):
+        return self._fetch_all(Transaction, self.IN_RANGE, day_range(start_date, end_date))
+
+    def count_in_range(self, start_date, end_date):
+        self.cursor.execute(self.COUNT_IN_RANGE, day_range(start_date, end_date))
+        return self.cursor.fetchone()[0]
+
+    def page(self, start_date, end_date, after=None, offset=0, limit=100):
+        """Up to limit transactions, newest first, skipping offset rows after the (date, id) key after."""
+        if after is None:
+            return self._fetch_all(Transaction, self.PAGE, (*day_range(start_date, end_date), limit, offset))
+        return self._fetch_all(Transaction, self.PAGE_AFTER,
+                               (*day_range(start_date, end_date), day_number(after[0]), after[1], limit, offset))
+
+    def page_from_end(self, start_date, end_date, offset=0, limit=100):
+        """Like page() but counting from the oldest transaction; rows are returned newest first."""
+        rows = self._fetch_all(Transaction, self.PAGE_FROM_END, (*day_range(start_date, end_date), limit, offset))
+        rows.reverse()
+        return rows
+
+    def has_full_text_search(self):
+        if not hasattr(self, '_has_fts'):
+            self.cursor.execute(self.HAS_FTS)
+            self._has_fts = self.cursor.fetchone() is not None
+        return self._has_fts
+
+    def search(self, text, start_date, end_date):
+        """Rank the transactions whose description matches text and return how many matched.
+
+        Matches are ordered by bm25 relevance (or newest first without FTS5) and kept in a
+        temp table, so search_page() can fetch any page by position without ranking again.
+        """
+        self.searched = None
+        self.cursor.execute(self.SEARCH_TABLE)
+        self.cursor.execute(self.SEARCH_CLEAR)
+        if self.has_full_text_search():
+            query = fts_query(text)
+            sql = self.SEARCH_RANKED
+        else:
+            query = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            sql = self.SEARCH_LIKE
+        if not query:
+            self.conn.commit()
+            self.searched = (text, start_date, end_date)
+            return 0
+        matched = self._write(sql, (query, *day_range(start_date, end_date))).rowcount
+        self.searched = (text, start_date, end_date)
+        return matched
+
+    def search_page(self, after_position=0, limit=100):
+        """Up to limit hits from the last search() that rank after after_position."""
+        return self._fetch_all(SearchHit, self.SEARCH_PAGE, (after_position, limit))
+
+    def recent(self, limit=5):
+        return self._fetch_all(Transaction, self.RECENT, (limit,))
+
+    def stream_for_export(self, start_date, end_date):
+        return self._stream(Transaction, self.EXPORT, day_range(start_date, end_date))
+
+    def add(self, date, amount, category, type_, description):
+        day, cents = day_number(date), round(float(amount) * 100)
+        params = (day, cents, category, type_, description, transaction_fingerprint(day, cents, description))
+        self.cursor.execute(self.ADD_CATEGORY, (category,))
+        transaction_id = self._write(self.INSERT, params).lastrowid
+        self._changed('transactions', {transaction_id})
+        return transaction_id
+
+    def begin_import(self):
+        """Start a deduplicating import; add_many(rows, deduplicate=True) then skips known rows.
+
+        A row counts as known while the ledger, as it stood here, holds at least as many
+        rows with its fingerprint as the import has produced so far, so importing an
+        overlapping statement again adds only the missing rows and repeated identical
+        rows within one statement are all kept.
+        """
+        self.cursor.execute(self.STAGING_TABLE)
+        self.cursor.execute(self.STAGING_INDEX)
+        self.cursor.execute(self.STAGING_CLEAR)
+        try:
+            self.cursor.execute(self.FILL_FINGERPRINTS)
+            # Read in the same write transaction, so no other writer can add unfingerprinted rows below the base
+            self.cursor.execute(self.LAST_ID)
+            self.import_base_id = self.cursor.fetchone()[0]
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def end_import(self):
+        self._write(self.STAGING_CLEAR)
+        self.import_base_id = None
+
+    def add_many(self, rows, deduplicate=False):
+        """Insert (day, cents, category, type, description) rows in one transaction; returns the count added.
+
+        Unlike add(), dates must already be day numbers and amounts integer cents. The
+        rollup and full-text index are updated once for the whole batch. With deduplicate,
+        rows already in the ledger are skipped; see begin_import().
+        """
+        rows = [(*row, transaction_fingerprint(row[0], row[1], row[4])) for row in rows]
+        try:
+            # Take the write lock before reading the last id, so rows other connections commit meanwhile
+            # are not counted into the rollup and full-text index a second time
+            self.cursor.execute(self.BULK_START)
+            self.cursor.execute(self.LAST_ID)
+            last_id = self.cursor.fetchone()[0]
+            self.cursor.executemany(self.ADD_CATEGORY, [(name,) for name in {row[2] for row in rows}])
+            if deduplicate:
+                self.cursor.execute(self.STAGING_LAST)
+                staged = self.cursor.fetchone()[0]
+                self.cursor.executemany(self.STAGE, rows)
+                self.cursor.execute(self.INSERT_NEW_STAGED, (staged, self.import_base_id))
+                # rowcount is not set for statements that start with WITH
+                added = self.cursor.execute('SELECT changes()').fetchone()[0]
+            else:
+                self.cursor.executemany(self.INSERT, rows)
+                added = len(rows)
+            self.cursor.execute(self.BULK_ROLLUP, (last_id,))
+            if self.has_full_text_search():
+                self.cursor.execute(self.BULK_FTS, (last_id,))
+            self.cursor.execute(self.BULK_END)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        if added:
+            self._changed('transactions')
+        return added
+
+    def stream_for_categorizer(self):
+        """Cursor over (id, cents, description, category) for every transaction, for fetchmany()."""
+        return self.conn.cursor().execute(self.CATEGORIZER_ROWS)
+
+    def set_categories(self, changes):
+        """Move (id, category) pairs to their new categories in one transaction; returns the count updated."""
+        if not changes:
+            return 0
+        try:
+            self.cursor.executemany(self.ADD_CATEGORY, [(name,) for name in {category for _, category in changes}])
+            self.cursor.executemany(self.SET_CATEGORY, [(category, transaction_id) for transaction_id, category in changes])
+            updated = self.cursor.rowcount
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self._changed('transactions', {int(transaction_id) for transaction_id, _ in changes})
+        return updated
+
+    def _snapshot(self, transaction_ids):
+        self.cursor.execute(self.SNAPSHOT, (json.dumps(transaction_ids),))
+        return self.cursor.fetchall()
+
+    def delete_many(self, transaction_ids):
+        """Delete transactions in one transaction; returns a snapshot of the deleted rows for restore()."""
+        transaction_ids = [int(transaction_id) for transaction_id in transaction_ids]
+        try:
+            snapshot = self._snapshot(transaction_ids)
+            self.cursor.executemany(self.DELETE, [(row[0],) for row in snapshot])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        if snapshot:
+            self._changed('transactions', {row[0] for row in snapshot})
+        return snapshot
+
+    def update_many(self, transaction_ids, category=None, type_=None):
+        """Give transactions a new category and/or type in one transaction.
+
+        Returns a snapshot of the rows as they were, for restore().
+        """
+        transaction_ids = [int(transaction_id) for transaction_id in transaction_ids]
+        try:
+            snapshot = self._snapshot(transaction_ids)
+            if category is not None:
+                self.cursor.execute(self.ADD_CATEGORY, (category,))
+                self.cursor.executemany(self.SET_CATEGORY, [(category, row[0]) for row in snapshot])
+            if type_ is not None:
+                self.cursor.executemany(self.SET_TYPE, [(type_, row[0]) for row in snapshot])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        if snapshot:
+            self._changed('transactions', {row[0] for row in snapshot})
+        return snapshot
+
+    def restore(self, snapshot):
+        """Put rows from delete_many() or update_many() back as they were, in one statement."""
+        if not snapshot:
+            return
+        self._write(self.RESTORE, (json.dumps(snapshot),))
+        self._changed('transactions', {row[0] for row in snapshot})
+
+    def delete(self, transaction_id):
+        """Delete a transaction; returns False when no row matched."""
+        deleted = self._write(self.DELETE, (transaction_id,)).rowcount > 0
+        if deleted:
+            self._changed('transactions', {int(transaction_id)})
+        return deleted
+
+    def expense_by_category(self):
+        return self._fetch_all(CategoryTotal, self.EXPENSE_BY_CATEGORY)
+
+    def monthly_trend(self, first_month, last_month):
+        return self._fetch_all(MonthlyTrend, self.MONTHLY_TREND, (first_month, last_month))
+
+    def category_totals(self, start_date, end_date):
+        """Per-category totals for an inclusive date range.
+
+        Whole months come from the rollup table; only the partial months at
+        either end of the range are summed from the ledger.
+        """
+        first_month, last_month, edges = split_date_range(start_date, end_date)
+        parts, params = [], []
+        if first_month:
+            parts.append(self.ROLLUP_PART)
+            params.extend((first_month, last_month))
+        for edge_start, edge_end in edges:
+            parts.append(self.EDGE_PART)
+            params.extend(day_range(edge_start, edge_end))
+        if not parts:
+            return []
+        return self._fetch_all(CategoryTotal, f'''
+            SELECT c.name, ROUND(SUM(p.cents) / 100.0, 2) as total
+            FROM ({" UNION ALL ".join(parts)}) p
+            JOIN categories c ON c.id = p.category_id
+            GROUP BY c.name
+        ''', params)
+
+class BudgetsRepo(Repository):
+    FOR_MONTH = '''
+        SELECT b.id, b.category, b.amount, COALESCE(ROUND(r.cents / 100.0, 2), 0) as actual
+        FROM budgets b
+        LEFT JOIN categories c ON c.name = b.category
+        LEFT JOIN monthly_category_totals r
+        ON r.month = b.month AND r.category_id = c.id
+        AND r.type_id = (SELECT id FROM transaction_types WHERE name = 'Expense')
+        WHERE b.month = ?
+        ORDER BY b.category
+    '''
+    # Budget lines with actual left at 0, for LedgerAnalytics.budget_vs_actual to fill in
+    PLANNED = '''
+        SELECT id, category, amount, 0
+        FROM budgets
+        WHERE month = ?
+        ORDER BY category
+    '''
+    SET = '''
+        INSERT OR REPLACE INTO budgets (month, category, amount)
+        VALUES (?, ?, ?)
+    '''
+    CLEAR_MONTH = 'DELETE FROM budgets WHERE month = ?'
+
+    def for_month(self, month):
+        """Budget vs actual expense lines for a 'YYYY-MM' month."""
+        return self._fetch_all(BudgetLine, self.FOR_MONTH, (month,))
+
+    def planned(self, month):
+        return self._fetch_all(BudgetLine, self.PLANNED, (month,))
+
+    def set(self, month, category, amount):
+        budget_id = self._write(self.SET, (month, category, amount)).lastrowid
+        self._changed('budgets', {budget_id})
+        return budget_id
+
+    def clear_month(self, month):
+        cleared = self._write(self.CLEAR_MONTH, (month,)).rowcount
+        if cleared:
+            self._changed('budgets')
+        return cleared
+
+class GoalsRepo(Repository):
+    ALL = '''
+        SELECT id, name, amount, category, target_date, progress
+        FROM goals
+        ORDER BY target_date DESC
+    '''
+    GET = '''
+        SELECT id, name, amount, category, target_date, progress
+        FROM goals WHERE id = ?
+    '''
+    INSERT = '''
+        INSERT INTO goals (name, amount, category, target_date, progress)
+        VALUES (?, ?, ?, ?, ?)
+    '''
+    UPDATE = '''
+        UPDATE goals SET name = ?, amount = ?, category = ?, target_date = ?, progress = ?
+        WHERE id = ?
+    '''
+    DELETE = 'DELETE FROM goals WHERE id = ?'
+    AVERAGE_PROGRESS = 'SELECT AVG(progress) FROM goals'
+
+    def all(self):
+        return self._fetch_all(Goal, self.ALL)
+
+    def get(self, goal_id):
+        return self._fetch_one(Goal, self.GET, (goal_id,))
+
+    def add(self, name, amount, category, target_date, progress=0.0):
+        goal_id = self._write(self.INSERT, (name, amount, category, target_date, progress)).lastrowid
+        self._changed('goals', {goal_id})
+        return goal_id
+
+    def update(self, goal_id, name, amount, category, target_date, progress):
+        updated = self._write(self.UPDATE, (name, amount, category, target_date, progress, goal_id)).rowcount > 0
+        if updated:
+            self._changed('goals', {int(goal_id)})
+        return updated
+
+    def delete(self, goal_id):
+        """Delete a goal; returns False when no row matched."""
+        deleted = self._write(self.DELETE, (goal_id,)).rowcount > 0
+        if deleted:
+            self._changed('goals', {int(goal_id)})
+        return deleted
+
+    def average_progress(self):
+        self.cursor.execute(self.AVERAGE_PROGRESS)
+        return self.cursor.fetchone()[0] or 0.0
+
+class RemindersRepo(Repository):
+    IN_RANGE = '''
+        SELECT id, name, amount, category, due_date, status
+        FROM reminders
+        WHERE due_date BETWEEN ? AND ?
+        ORDER BY due_date DESC
+    '''
+    # Unpaid reminders and paid ones from today on, as two branches that each read their index
+    # in due_date order and merge, instead of an OR that scans
+    UPCOMING = '''
+        SELECT id, name, amount, category, due_date,
+               CASE WHEN paid=1 THEN 'Paid' ELSE 'Pending' END as status
+        FROM reminders
+        WHERE paid=0
+        UNION ALL
+        SELECT id, name, amount, category, due_date,
+               CASE WHEN paid=1 THEN 'Paid' ELSE 'Pending' END as status
+        FROM reminders
+        WHERE due_date >= ? AND paid IS NOT 0
+        ORDER BY due_date
+        LIMIT ?
+    '''
+    INSERT = '''
+        INSERT INTO reminders (name, amount, category, due_date, status, paid)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    DELETE = 'DELETE FROM reminders WHERE id = ?'
+
+    def in_range(self, start_date, end_date):
+        return self._fetch_all(Reminder, self.IN_RANGE, (start_date, end_date))
+
+    def stream_in_range(self, start_date, end_date):
+        return self._stream(Reminder, self.IN_RANGE, (start_date, end_date))
+
+    def upcoming(self, today, limit=5):
+        """Reminders due from today on plus any unpaid ones, soonest first."""
+        return self._fetch_all(Reminder, self.UPCOMING, (today, limit))
+
+    def add(self, name, amount, category, due_date, status):
+        paid = 1 if status == "Paid" else 0
+        reminder_id = self._write(self.INSERT, (name, amount, category, due_date, status, paid)).lastrowid
+        self._changed('reminders', {reminder_id})
+        return reminder_id
+
+    def delete(self, reminder_id):
+        """Delete a reminder; returns False when no row matched."""
+        deleted = self._write(self.DELETE, (reminder_id,)).rowcount > 0
+        if deleted:
+            self._changed('reminders', {int(reminder_id)})
+        return deleted
+
+class RulesRepo(Repository):
+    """Auto-categorization rules in priority order; amounts are passed in and returned in dollars."""
+    ALL = '''
+        SELECT r.id, r.kind, r.pattern, r.min_cents / 100.0, r.max_cents / 100.0, c.name
+        FROM category_rules r JOIN categories c ON c.id = r.category_id
+        ORDER BY r.position
+    '''
+    FOR_CATEGORIZER = '''
+        SELECT r.kind, r.pattern, r.min_cents, r.max_cents, c.name
+        FROM category_rules r JOIN categories c ON c.id = r.category_id
+        ORDER BY r.position
+    '''
+    ADD_CATEGORY = TransactionsRepo.ADD_CATEGORY
+    INSERT = '''
+        INSERT INTO category_rules (position, kind, pattern, min_cents, max_cents, category_id)
+        VALUES ((SELECT COALESCE(MAX(position), 0) + 1 FROM category_rules), ?, ?, ?, ?,
+                (SELECT id FROM categories WHERE name = ?))
+    '''
+    DELETE = 'DELETE FROM category_rules WHERE id = ?'
+    POSITION = 'SELECT position FROM category_rules WHERE id = ?'
+    ABOVE = 'SELECT id, position FROM category_rules WHERE position < ? ORDER BY position DESC LIMIT 1'
+    BELOW = 'SELECT id, position FROM category_rules WHERE position > ? ORDER BY position LIMIT 1'
+    SET_POSITION = 'UPDATE category_rules SET position = ? WHERE id = ?'
+
+    def all(self):
+        return self._fetch_all(CategoryRule, self.ALL)
+
+    def for_categorizer(self):
+        """(kind, pattern, min_cents, max_cents, category) tuples for categorizer.Categorizer."""
+        self.cursor.execute(self.FOR_CATEGORIZER)
+        return self.cursor.fetchall()
+
+    def add(self, kind, pattern, category, min_amount=None, max_amount=None):
+        """Add a rule with the lowest priority; returns its id."""
+        cents = [None if amount is None else round(float(amount) * 100) for amount in (min_amount, max_amount)]
+        self.cursor.execute(self.ADD_CATEGORY, (category,))
+        rule_id = self._write(self.INSERT, (kind, pattern, *cents, category)).lastrowid
+        self._changed('category_rules', {rule_id})
+        return rule_id
+
+    def move(self, rule_id, step):
+        """Swap a rule with its neighbour above (step -1) or below (step 1); returns False at either end."""
+        self.cursor.execute(self.POSITION, (rule_id,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return False
+        self.cursor.execute(self.ABOVE if step < 0 else self.BELOW, (row[0],))
+        neighbour = self.cursor.fetchone()
+        if neighbour is None:
+            return False
+        try:
+            self.cursor.executemany(self.SET_POSITION, [(neighbour[1], rule_id), (row[0], neighbour[0])])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self._changed('category_rules', {int(rule_id), neighbour[0]})
+        return True
+
+    def delete(self, rule_id):
+        """Delete a rule; returns False when no row matched."""
+        deleted = self._write(self.DELETE, (rule_id,)).rowcount > 0
+        if deleted:
+            self._changed('category_rules', {int(rule_id)})
+        return deleted
+
+class Repositories:
+    """The table repositories bound to one connection."""
+
+    def __init__(self, conn, notify=None):
+        self.transactions = TransactionsRepo(conn, notify)
+        self.budgets = BudgetsRepo(conn, notify)
+        self.goals = GoalsRepo(conn, notify)
+        self.reminders = RemindersRepo(conn, notify)
+        self.rules = RulesRepo(conn, notify)
+
+class Database(Repositories):
+    def __init__(self, db_name, profile=DEFAULT_PROFILE, **pragmas):
         try:
             # Check if directory is writable
             db_dir = os.path.dirname(os.path.abspath(db_name))
             if not os.access(db_dir, os.W_OK):
                 raise PermissionError(f"Directory {db_dir} is not writable. Please ensure the application has write permissions.")
-            self.conn = sqlite3.connect(db_name)
-            self.conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign key support
+            self.db_name = db_name
+            self.profile = profile
+            self.pragmas = pragmas
+            self.conn = connect(db_name, profile, **pragmas)
             self.cursor = self.conn.cursor()
-            self.create_tables()
-            self.migrate_schema()
+            self.migrate()
+            self.change_listeners = []
+            self.ledger_writes = 0
+            super().__init__(self.conn, self._notify_change)
             logging.info("Database initialized successfully")
         except Exception as e:
             logging.error(f"Failed to initialize database: {str(e)}")
             raise
 
-    def create_tables(self):
+    def migrate(self):
+        """Bring the schema up to SCHEMA_VERSION, skipping all work when current."""
         try:
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    username TEXT PRIMARY KEY,
-                    password BLOB NOT NULL
-                )
-            ''')
-            logging.debug("Created users table")
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    type TEXT NOT NULL CHECK(type IN ('Income', 'Expense', 'Savings')),
-                    description TEXT
-                )
-            ''')
-            logging.debug("Created transactions table")
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS budgets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    category TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    month TEXT NOT NULL
-                )
-            ''')
-            logging.debug("Created budgets table")
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS goals (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    amount REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    target_date TEXT NOT NULL
-                )
-            ''')
-            logging.debug("Created goals table")
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS reminders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    due_date TEXT NOT NULL,
-                    paid INTEGER NOT NULL
-                )
-            ''')
-            logging.debug("Created reminders table")
-            self.conn.commit()
-        except Exception as e:
-            logging.error(f"Failed to create tables: {str(e)}")
-            raise
-
-    def migrate_schema(self):
-        try:
-            # Check if 'reminders' table exists
-            self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='reminders'")
-            if not self.cursor.fetchone():
-                logging.debug("Reminders table does not exist; will be created by create_tables")
+            version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+            if version == SCHEMA_VERSION:
+                logging.debug(f"Schema is current (version {version})")
                 return
-
-            # Check columns in reminders table
-            self.cursor.execute("PRAGMA table_info(reminders)")
-            columns = [info[1] for info in self.cursor.fetchall()]
-            logging.debug(f"Reminders table columns: {columns}")
-
-            if 'category' not in columns:
-                logging.info("Adding category column to reminders table")
+            if version > SCHEMA_VERSION:
+                raise RuntimeError(f"Database schema version {version} is newer than supported version {SCHEMA_VERSION}")
+            for target, step in enumerate(MIGRATIONS[version:], start=version + 1):
+                logging.info(f"Migrating schema to version {target} ({step.__name__})")
+                self.conn.execute('BEGIN')
                 try:
-                    self.cursor.execute('''
-                        ALTER TABLE reminders ADD COLUMN category TEXT NOT NULL DEFAULT 'General'
-                    ''')
-                    self.conn.commit()
-                    logging.info("Successfully added category column to reminders table")
-                except sqlite3.OperationalError as e:
-                    logging.error(f"Failed to add category column: {str(e)}")
-                    # Fallback: Recreate reminders table if ALTER fails (e.g., locked database)
-                    self.cursor.execute('''
-                        CREATE TABLE reminders_new (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            name TEXT NOT NULL,
-                            amount REAL NOT NULL,
-                            category TEXT NOT NULL,
-                            due_date TEXT NOT NULL,
-                            paid INTEGER NOT NULL
-                        )
-                    ''')
-                    self.cursor.execute('''
-                        INSERT INTO reminders_new (id, name, amount, due_date, paid)
-                        SELECT id, name, amount, due_date, paid FROM reminders
-                    ''')
-                    self.cursor.execute('''
-                        UPDATE reminders_new SET category = 'General' WHERE category IS NULL
-                    ''')
-                    self.cursor.execute('DROP TABLE reminders')
-                    self.cursor.execute('ALTER TABLE reminders_new RENAME TO reminders')
+                    step(self.conn.cursor())
+                    self.conn.execute(f'PRAGMA user_version = {target}')
                     self.conn.commit()
-                    logging.info("Recreated reminders table with category column")
-            else:
-                logging.debug("Category column already exists in reminders table")
+                except Exception:
+                    self.conn.rollback()
+                    raise
+            if version and REWRITING_MIGRATIONS.intersection(MIGRATIONS[version:]):
+                logging.info("Vacuuming database after migration")
+                self.conn.execute('VACUUM')
+            logging.info(f"Schema migrated from version {version} to {SCHEMA_VERSION}")
         except Exception as e:
             logging.error(f"Failed to migrate schema: {str(e)}")
             raise
 
+    def add_change_listener(self, listener):
+        """Register listener(table, row_ids) to be told about every committed write."""
+        self.change_listeners.append(listener)
+
+    def announce_change(self, table, row_ids=None):
+        """Tell the change listeners about a write committed on another connection, such as the worker's."""
+        self._notify_change(table, row_ids)
+
+    def ledger_version(self):
+        """A value that changes whenever the transactions may have changed.
+
+        Writes made through this connection bump ledger_writes; PRAGMA data_version
+        changes when any other connection (the worker, another process) commits.
+        """
+        return self.ledger_writes, self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _notify_change(self, table, row_ids):
+        if table == 'transactions':
+            self.ledger_writes += 1
+        for listener in self.change_listeners:
+            try:
+                listener(table, row_ids)
+            except Exception as e:
+                logging.error(f"Change listener failed for {table}: {str(e)}")
+
     def register_user(self, username, password):
         try:
             hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
@@ -0,0 +1,204 @@
+import logging
+import queue
+import sqlite3
+import threading
+from database import connect, Repositories
+
+class WorkerRepositories(Repositories):
+    """The worker's repositories, plus the in-memory ledger that only the worker thread reads."""
+
+    def __init__(self, conn):
+        super().__init__(conn, self._note_own_change)
+        self.conn = conn
+        self.ledger = None
+
+    def _note_own_change(self, table, row_ids):
+        # PRAGMA data_version does not move for this connection's own writes
+        if self.ledger is not None:
+            self.ledger.note_change(table, row_ids)
+
+    @property
+    def analytics(self):
+        """LedgerAnalytics over this connection; NumPy is imported and the rows loaded on first use."""
+        if self.ledger is None:
+            from analytics import LedgerAnalytics
+            self.ledger = LedgerAnalytics(self.conn)
+        return self.ledger
+
+class DatabaseWorker:
+    """Runs database jobs on a background thread that owns its own SQLite connection.
+
+    Jobs are submitted from the Tk thread under a key such as "transactions.refresh".
+    Submitting a new job under the same key makes any older job with that key stale:
+    stale jobs are skipped if they have not started, interrupted if they are running,
+    and their results are never delivered. Results come back to the Tk thread through
+    root.after polling, which only runs while jobs are outstanding. stream() jobs hand
+    their rows over in fetchmany batches while the query is still running. Jobs receive
+    WorkerRepositories, whose analytics answer aggregates from memory; register
+    note_change() as a change listener so it sees the writes made on the Tk side.
+    """
+    POLL_MS = 15
+
+    def __init__(self, root, db_name, profile, pragmas=None, on_busy=None):
+        self.root = root
+        self.on_busy = on_busy
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.generations = {}
+        self.pending = 0
+        self.running = None
+        self.conn = None
+        self.repos = None
+        self.poll_id = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, args=(db_name, profile, pragmas or {}), name="database-worker", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, key, query, on_result, on_error=None, on_progress=None):
+        """Queue query(repos) for the worker; on_result(value) or on_error(exc) run on the Tk thread.
+
+        With on_progress, the job is called as query(repos, report): each report(value) call
+        reaches on_progress(value) on the Tk thread and returns False once the job is stale,
+        so long jobs can stop early after cancel().
+        """
+        self._enqueue(key, query, on_result, on_error, ('progress', on_progress) if on_progress else None)
+
+    def stream(self, key, query, on_rows, on_done=None, on_error=None, size=500):
+        """Queue query(repos), which returns an executed cursor. Its rows reach on_rows(rows) on the
+        Tk thread size at a time, then on_done(count) runs; superseding key stops the stream."""
+        self._enqueue(key, query, on_done or (lambda count: None), on_error, ('stream', on_rows, size))
+
+    def _enqueue(self, key, query, on_result, on_error, mode):
+        generation = self.generations.get(key, 0) + 1
+        self.generations[key] = generation
+        self._interrupt_if_running(key)
+        self.pending += 1
+        self.jobs.put((key, generation, query, on_result, on_error, mode))
+        if self.pending == 1 and self.on_busy:
+            self.on_busy(True)
+        self._schedule_poll()
+
+    def note_change(self, table, row_ids):
+        """Change listener for the Tk-side Database; keeps the worker's analytics columns current."""
+        ledger = self.repos.ledger if self.repos is not None else None
+        if ledger is not None:
+            ledger.note_change(table, row_ids)
+
+    def cancel(self, key):
+        """Drop any queued or running job submitted under key."""
+        self.generations[key] = self.generations.get(key, 0) + 1
+        self._interrupt_if_running(key)
+
+    def stop(self):
+        self.jobs.put(None)
+        if self.poll_id is not None:
+            try:
+                self.root.after_cancel(self.poll_id)
+            except Exception:
+                pass
+            self.poll_id = None
+        self.thread.join(timeout=2)
+
+    def _is_current(self, key, generation):
+        return self.generations.get(key) == generation
+
+    def _interrupt_if_running(self, key):
+        running = self.running
+        if running and running[0] == key and self.conn is not None:
+            self.conn.interrupt()
+
+    def _run(self, db_name, profile, pragmas):
+        try:
+            self.conn = connect(db_name, profile, **pragmas)
+            repos = self.repos = WorkerRepositories(self.conn)
+        except Exception as e:
+            logging.error(f"Database worker failed to connect: {str(e)}")
+            self.conn = None
+            repos = None
+        self.ready.set()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            key, generation, query, on_result, on_error, mode = job
+            outcome = None
+            if repos is None:
+                outcome = (False, RuntimeError("Database worker is not connected"))
+            elif self._is_current(key, generation):
+                outcome = self._execute(repos, key, generation, query, mode)
+            self.results.put((key, generation, outcome, on_result, on_error, True))
+        if self.conn is not None:
+            self.conn.close()
+
+    def _execute(self, repos, key, generation, query, mode):
+        delivered = 0
+        for attempt in range(2):
+            self.running = (key, generation)
+            try:
+                if mode is None:
+                    return (True, query(repos))
+                if mode[0] == 'progress':
+                    def report(value):
+                        self.results.put((key, generation, (True, value), mode[1], None, False))
+                        return self._is_current(key, generation)
+                    result = query(repos, report)
+                    return (True, result) if self._is_current(key, generation) else None
+                _, on_rows, size = mode
+                cursor = query(repos)
+                while self._is_current(key, generation):
+                    rows = cursor.fetchmany(size)
+                    if not rows:
+                        break
+                    delivered += len(rows)
+                    self.results.put((key, generation, (True, rows), on_rows, None, False))
+                cursor.close()
+                return (True, delivered) if self._is_current(key, generation) else None
+            except sqlite3.OperationalError as e:
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                # interrupt() may land on a job that was current; run it once more in that case,
+                # unless a stream has already handed over some of its rows
+                if 'interrupted' in str(e) and attempt == 0 and not delivered and self._is_current(key, generation):
+                    continue
+                if not self._is_current(key, generation):
+                    return None
+                return (False, e)
+            except Exception as e:
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                return (False, e)
+            finally:
+                self.running = None
+
+    def _schedule_poll(self):
+        if self.poll_id is None:
+            self.poll_id = self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        self.poll_id = None
+        while True:
+            try:
+                key, generation, outcome, on_result, on_error, final = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if final:
+                self.pending -= 1
+            if outcome is None or not self._is_current(key, generation):
+                logging.debug(f"Dropped stale database job '{key}'")
+                continue
+            ok, value = outcome
+            try:
+                if ok:
+                    on_result(value)
+                elif on_error:
+                    on_error(value)
+                else:
+                    logging.error(f"Database job '{key}' failed: {str(value)}")
+            except Exception as e:
+                logging.error(f"Callback for database job '{key}' failed: {str(e)}", exc_info=True)
+        if self.pending > 0:
+            self._schedule_poll()
+        elif self.on_busy:
+            self.on_busy(False)
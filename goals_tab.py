@@ -3,15 +3,14 @@ from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
 import logging
 from datetime import datetime
+from utils import TreeviewSync
 
 class GoalsTab:
-    def __init__(self, app):
+    def __init__(self, app, frame):
         self.app = app
-        self.frame = ttk.Frame(self.app.notebook)
-        self.app.notebook.add(self.frame, text="Goals")
+        self.frame = frame
         logging.debug("Initializing GoalsTab")
         self.setup_ui()
-        self.check_and_update_schema()
         try:
             logging.debug("Attempting to refresh Goals tab")
             self.refresh()
@@ -92,6 +91,7 @@ class GoalsTab:
         self.goals_tree.column("Target Date", width=100, anchor='center')
         self.goals_tree.column("Progress", width=100, anchor='center')
         self.goals_tree.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+        self.goals_sync = TreeviewSync(self.goals_tree)
         logging.debug("Created goals_tree in GoalsTab")
 
         # Progress Bar Frame
@@ -103,19 +103,6 @@ class GoalsTab:
         self.progress_bar.pack(side=tk.LEFT, padx=5)
         logging.debug("Created progress_bar in GoalsTab")
 
-    def check_and_update_schema(self):
-        try:
-            cursor = self.app.db.cursor
-            cursor.execute('PRAGMA table_info(goals)')
-            columns = [row[1] for row in cursor.fetchall()]
-            if 'progress' not in columns:
-                cursor.execute('ALTER TABLE goals ADD COLUMN progress REAL DEFAULT 0.0')
-                self.app.db.conn.commit()
-                logging.info("Added 'progress' column to goals table")
-        except Exception as e:
-            logging.error(f"Failed to update goals table schema: {str(e)}")
-            messagebox.showerror("Error", f"Failed to update database schema: {str(e)}. Please check the database connection.")
-
     def add_goal(self):
         name = self.name_entry.get().strip()
         amount = self.amount_entry.get().strip()
@@ -134,13 +121,8 @@ class GoalsTab:
                 messagebox.showerror("Error", "Please select a valid Target Date (yyyy-mm-dd)")
                 return
             amount = float(amount)
-            self.app.db.cursor.execute('''
-                INSERT INTO goals (name, amount, category, target_date, progress)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (name, amount, category, target_date, 0.0))
-            self.app.db.conn.commit()
+            self.app.db.goals.add(name, amount, category, target_date)
             logging.debug(f"Added goal: {name}, {amount}, {category}, {target_date}")
-            self.refresh()
             self.clear_form()
             messagebox.showinfo("Success", "Goal added successfully")
         except Exception as e:
@@ -158,12 +140,9 @@ class GoalsTab:
             if not goal_id:
                 messagebox.showerror("Error", "Unable to determine goal ID")
                 return
-            self.app.db.cursor.execute('DELETE FROM goals WHERE id = ?', (goal_id,))
-            if self.app.db.cursor.rowcount == 0:
+            if not self.app.db.goals.delete(goal_id):
                 messagebox.showerror("Error", "Goal not found in database")
                 return
-            self.app.db.conn.commit()
-            self.refresh()
             messagebox.showinfo("Success", "Goal deleted successfully")
         except Exception as e:
             logging.error(f"Failed to delete goal: {str(e)}")
@@ -180,15 +159,11 @@ class GoalsTab:
             if not goal_id:
                 messagebox.showerror("Error", "Unable to determine goal ID")
                 return
-            self.app.db.cursor.execute('''
-                SELECT name, amount, category, target_date, progress
-                FROM goals WHERE id = ?
-            ''', (goal_id,))
-            goal_data = self.app.db.cursor.fetchone()
-            if not goal_data:
+            goal = self.app.db.goals.get(goal_id)
+            if not goal:
                 messagebox.showerror("Error", "Goal not found in database")
                 return
-            name, amount, category, target_date, progress = goal_data
+            _, name, amount, category, target_date, progress = goal
 
             # Populate form with current values
             self.name_entry.delete(0, tk.END)
@@ -241,13 +216,8 @@ class GoalsTab:
                         new_amount = amount - paid_amount  # Reduce goal amount by paid amount
                         new_progress = ((amount - new_amount) / amount) * 100 if amount > 0 else 0.0
 
-                    self.app.db.cursor.execute('''
-                        UPDATE goals SET name = ?, amount = ?, category = ?, target_date = ?, progress = ?
-                        WHERE id = ?
-                    ''', (new_name, new_amount, new_category, new_target_date, new_progress, goal_id))
-                    self.app.db.conn.commit()
+                    self.app.db.goals.update(goal_id, new_name, new_amount, new_category, new_target_date, new_progress)
                     logging.debug(f"Updated goal {goal_id}: {new_name}, {new_amount}, {new_category}, {new_target_date}, progress: {new_progress}%")
-                    self.refresh()
                     self.clear_form()
                     update_window.destroy()
                     messagebox.showinfo("Success", "Goal updated successfully")
@@ -261,28 +231,32 @@ class GoalsTab:
             messagebox.showerror("Error", f"Failed to prepare goal update: {str(e)}")
 
     def refresh(self):
+        logging.debug("Starting refresh of Goals tab")
+        self.app.worker.submit(
+            'goals.refresh',
+            lambda repos: (repos.goals.all(), repos.goals.average_progress()),
+            self.show_goals,
+            self.refresh_failed
+        )
+
+    def show_goals(self, result):
+        goals, avg_progress = result
         try:
-            logging.debug("Starting refresh of Goals tab")
-            for item in self.goals_tree.get_children():
-                self.goals_tree.delete(item)
-            self.app.db.cursor.execute('''
-                SELECT id, name, amount, category, target_date, progress
-                FROM goals
-                ORDER BY target_date DESC
-            ''')
-            for row in self.app.db.cursor.fetchall():
-                id_, name, amount, category, target_date, progress = row
-                self.goals_tree.insert('', tk.END, values=(name, f"{amount:.2f}", category, target_date, f"{progress:.0f}%"), tags=(str(id_),))
+            self.goals_sync.apply(
+                (goal.id, (goal.name, f"{goal.amount:.2f}", goal.category, goal.target_date, f"{goal.progress:.0f}%"), (str(goal.id),))
+                for goal in goals
+            )
             logging.debug("Updated goals_tree with database data")
 
             # Update progress bar (average progress of all goals)
-            self.app.db.cursor.execute('SELECT AVG(progress) FROM goals')
-            avg_progress = self.app.db.cursor.fetchone()[0] or 0.0
             self.progress_bar['value'] = min(max(avg_progress, 0), 100)
             logging.debug(f"Updated progress_bar with value: {avg_progress:.0f}%")
         except Exception as e:
-            logging.error(f"Failed to refresh Goals data: {str(e)}")
-            messagebox.showwarning("Warning", f"Failed to refresh Goals data: {str(e)}")
+            self.refresh_failed(e)
+
+    def refresh_failed(self, error):
+        logging.error(f"Failed to refresh Goals data: {str(error)}")
+        messagebox.showwarning("Warning", f"Failed to refresh Goals data: {str(error)}")
 
     def clear_form(self):
         """Clear all input fields in the Goals tab."""
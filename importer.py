@@ -0,0 +1,296 @@
+import codecs
+import csv
+import html
+import os
+import re
+from collections import namedtuple
+from itertools import chain, islice
+from operator import itemgetter
+import numpy as np
+from categorizer import Categorizer
+from utils import day_number
+
+CHUNK_SIZE = 5000
+DEFAULT_CATEGORY = "Uncategorized"
+UNIX_EPOCH_DAY = day_number('1970-01-01')
+FIRST_DAY, LAST_DAY = day_number('1900-01-01'), day_number('9999-12-31')
+
+# Header spellings used by common bank exports, by the RawRow field they fill
+CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'posted date', 'posting date', 'booking date', 'value date'),
+    'amount': ('amount', 'transaction amount', 'value'),
+    'debit': ('debit', 'withdrawal', 'withdrawals', 'money out', 'paid out'),
+    'credit': ('credit', 'deposit', 'deposits', 'money in', 'paid in'),
+    'category': ('category',),
+    'type': ('type', 'transaction type'),
+    'description': ('description', 'memo', 'payee', 'details', 'narrative', 'name', 'reference'),
+}
+# Numeric date layouts as (separator, position of year, month, day); the first chunk picks one
+DATE_LAYOUTS = {
+    'YYYY-MM-DD': ('-', 0, 1, 2),
+    'YYYY/MM/DD': ('/', 0, 1, 2),
+    'MM/DD/YYYY': ('/', 2, 0, 1),
+    'DD/MM/YYYY': ('/', 2, 1, 0),
+    'DD.MM.YYYY': ('.', 2, 1, 0),
+    'MM-DD-YYYY': ('-', 2, 0, 1),
+    'DD-MM-YYYY': ('-', 2, 1, 0),
+}
+TYPE_NAMES = {
+    'income': 'Income', 'credit': 'Income', 'deposit': 'Income', 'cr': 'Income',
+    'expense': 'Expense', 'debit': 'Expense', 'withdrawal': 'Expense', 'payment': 'Expense', 'dr': 'Expense',
+    'savings': 'Savings', 'saving': 'Savings',
+}
+AMOUNT_NOISE = str.maketrans('', '', '$€£¥ \u00a0\'')
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+
+RawRow = namedtuple('RawRow', 'line date amount category type description text')
+RejectedRow = namedtuple('RejectedRow', 'line reason text')
+ImportSummary = namedtuple('ImportSummary', 'imported duplicates rejected')
+
+class StatementFile:
+    """Decoded lines of a statement file that keep count of the bytes read, for progress."""
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.read = 0
+
+    def lines(self):
+        with open(self.path, 'rb') as file:
+            for number, raw in enumerate(file):
+                self.read += len(raw)
+                if number == 0 and raw.startswith(codecs.BOM_UTF8):
+                    raw = raw[len(codecs.BOM_UTF8):]
+                try:
+                    yield raw.decode('utf-8')
+                except UnicodeDecodeError:
+                    yield raw.decode('cp1252', errors='replace')
+
+def parse_csv(lines):
+    """Yield a RawRow for every data row of a CSV export that starts with a header row."""
+    first = next(lines, None)
+    if first is None:
+        return
+    delimiter = max(',;\t|', key=first.count)
+    reader = csv.reader(chain([first], lines), delimiter=delimiter)
+    header = [name.strip().lower() for name in next(reader)]
+    columns = {}
+    for field, names in CSV_COLUMNS.items():
+        found = [header.index(name) for name in names if name in header]
+        if found:
+            columns[field] = found[0]
+    if 'date' not in columns or not columns.keys() & {'amount', 'debit', 'credit'}:
+        raise ValueError("The CSV file needs a header row with a Date column and an Amount (or Debit/Credit) column")
+
+    # Rows are padded with blanks, so short rows and missing columns (index -1) read as ''
+    blank = [''] * (len(header) + 1)
+    pick = itemgetter(*(columns.get(field, -1) for field in ('date', 'amount', 'debit', 'credit', 'category', 'type', 'description')))
+    for row in reader:
+        if not ''.join(row).strip():
+            continue
+        date, amount, debit, credit, category, type_, description = map(str.strip, pick(row + blank))
+        if not amount:
+            debit = debit.lstrip('-')
+            amount = f"-{debit}" if debit else credit
+        yield RawRow(reader.line_num, date, amount, category, type_, description, delimiter.join(row))
+
+def _ofx_row(fields):
+    posted = fields.get('DTPOSTED', '')
+    date = f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}" if len(posted) >= 8 and posted[:8].isdigit() else posted
+    name, memo = fields.get('NAME', ''), fields.get('MEMO', '')
+    description = f"{name} {memo}" if name and memo and memo != name else name or memo
+    text = ' '.join(f"<{tag}>{value}" for tag, value in fields.items() if tag != 'line')
+    return RawRow(fields['line'], date, fields.get('TRNAMT', ''), '', '', description, text)
+
+def parse_ofx(lines):
+    """Yield a RawRow for every <STMTTRN> of an OFX or QFX statement, in SGML or XML form."""
+    fields = None
+    for number, text in enumerate(lines, 1):
+        for closing, tag, value in OFX_TAG.findall(text):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if not closing:
+                    fields = {'line': number}
+                elif fields is not None:
+                    yield _ofx_row(fields)
+                    fields = None
+            elif fields is not None and not closing:
+                fields[tag] = html.unescape(value.strip())
+
+def _qif_row(line, fields, text):
+    category = fields.get('L', '')
+    category = 'Transfer' if category.startswith('[') else category.split(':')[0].strip()
+    description = ' '.join(value for value in (fields.get('P'), fields.get('M')) if value)
+    date = fields.get('D', '').replace("'", '/').replace(' ', '')
+    return RawRow(line, date, fields.get('T', fields.get('U', '')), category, '', description, ' | '.join(text))
+
+def parse_qif(lines):
+    """Yield a RawRow for every record of a QIF file; split lines are ignored."""
+    fields, start, text = {}, None, []
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        if not line or line.startswith('!'):
+            continue
+        if line[0] == '^':
+            if fields:
+                yield _qif_row(start, fields, text)
+            fields, start, text = {}, None, []
+            continue
+        if start is None:
+            start = number
+        fields.setdefault(line[0], line[1:].strip())
+        text.append(line)
+    if fields:
+        yield _qif_row(start, fields, text)
+
+PARSERS = {'.csv': parse_csv, '.ofx': parse_ofx, '.qfx': parse_ofx, '.qif': parse_qif}
+
+def _iso_dates(values, layout):
+    """Rewrite dates written in layout as 'YYYY-MM-DD'; two-digit years are 1970-2069."""
+    separator, year, month, day = DATE_LAYOUTS[layout]
+    result = []
+    for value in values:
+        parts = value.strip().split(' ')[0].split('T')[0].split(separator)
+        if len(parts) != 3:
+            result.append('')
+            continue
+        year_text = parts[year]
+        if len(year_text) == 2:
+            year_text = ('20' if year_text < '70' else '19') + year_text
+        result.append(f"{year_text:0>4}-{parts[month]:0>2}-{parts[day]:0>2}")
+    return result
+
+def _day_numbers(iso_dates):
+    """Day numbers of 'YYYY-MM-DD' strings as an int64 array, -1 where the text is not a valid date."""
+    values = np.array(iso_dates, dtype=str)
+    candidates = np.where(np.char.str_len(values) == 10, values, 'NaT')
+    try:
+        parsed = candidates.astype('datetime64[D]')
+    except ValueError:
+        parsed = np.array([_parse_day(value) for value in candidates], dtype='datetime64[D]')
+    days = np.where(np.isnat(parsed), -1, parsed.astype(np.int64) + UNIX_EPOCH_DAY)
+    return np.where((days >= FIRST_DAY) & (days <= LAST_DAY), days, -1)
+
+def _parse_day(value):
+    try:
+        return np.datetime64(value, 'D')
+    except ValueError:
+        return np.datetime64('NaT')
+
+def _clean_amount(text):
+    text = text.translate(AMOUNT_NOISE)
+    negative = text.startswith('(') and text.endswith(')')
+    if negative:
+        text = text[1:-1]
+    if text.endswith('-'):
+        negative, text = True, text[:-1]
+    if ',' in text:
+        # A comma after the last point with at most two digits behind it is a decimal comma
+        comma = text.rfind(',')
+        if comma > text.rfind('.') and len(text) - comma <= 3:
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    return f"-{text}" if negative else text
+
+def _amounts(values):
+    cleaned = [_clean_amount(value) for value in values]
+    try:
+        return np.array(cleaned, dtype=np.float64)
+    except ValueError:
+        return np.array([_parse_amount(value) for value in cleaned], dtype=np.float64)
+
+def _parse_amount(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+def detect_date_layout(dates):
+    """The layout in DATE_LAYOUTS that reads the most of the given dates, earliest on a tie."""
+    sample = [value for value in dates if value.strip()][:200]
+    return max(DATE_LAYOUTS, key=lambda layout: int((_day_numbers(_iso_dates(sample, layout)) >= 0).sum()))
+
+def validate_chunk(chunk, layout):
+    """Split RawRows into (day, cents, category, type, description) rows and RejectedRows.
+
+    Dates and amounts are converted and checked a whole column at a time.
+    """
+    days = _day_numbers(_iso_dates([row.date for row in chunk], layout))
+    amounts = _amounts([row.amount for row in chunk])
+    bad_amount = ~np.isfinite(amounts) | (np.abs(amounts) >= 1e13)
+    amounts = np.where(bad_amount, 0, amounts)
+    cents = np.rint(amounts * 100)
+    too_precise = np.abs(amounts * 100 - cents) > 1e-6
+    types = [TYPE_NAMES.get(row.type.lower()) if row.type else None for row in chunk]
+    signed_types = np.where(cents < 0, 'Expense', 'Income')
+
+    # Later assignments win, so a row is reported under its first failing column
+    reasons = {}
+    for index, row in enumerate(chunk):
+        if row.type and types[index] is None:
+            reasons[index] = f"unknown type '{row.type}'"
+    for index in np.flatnonzero(too_precise).tolist():
+        reasons[index] = f"amount has more than 2 decimal places: '{chunk[index].amount}'"
+    for index in np.flatnonzero(bad_amount).tolist():
+        amount = chunk[index].amount
+        reasons[index] = f"invalid amount '{amount}'" if amount else "missing amount"
+    for index in np.flatnonzero(days < 0).tolist():
+        date = chunk[index].date
+        reasons[index] = f"invalid date '{date}' (expected {layout})" if date else "missing date"
+
+    rows = []
+    for index, (row, day, amount) in enumerate(zip(chunk, days.tolist(), np.abs(cents).astype(np.int64).tolist())):
+        if index not in reasons:
+            rows.append((day, amount, row.category or DEFAULT_CATEGORY, types[index] or str(signed_types[index]),
+                         row.description))
+    rejected = [RejectedRow(chunk[index].line, reason, chunk[index].text) for index, reason in sorted(reasons.items())]
+    return rows, rejected
+
+def import_statement(repos, path, report=lambda value: True):
+    """Import a CSV, OFX/QFX or QIF statement into the ledger, CHUNK_SIZE rows per transaction.
+
+    The file is parsed as a stream, so memory use does not grow with its size. Amounts
+    are stored unsigned: an explicit type column wins, otherwise negative amounts are
+    expenses and the rest income. Categories from the saved rules (see
+    categorizer.Categorizer) take precedence over the statement's own. Rows the ledger
+    already holds are skipped as duplicates (see TransactionsRepo.begin_import), so
+    importing an overlapping statement again is safe. report((bytes_read, file_size,
+    imported, duplicates, rejected)) is called after every chunk; when it returns False
+    the import stops, keeping the chunks already committed. Returns an ImportSummary
+    with the counts of imported and duplicate rows and the RejectedRows.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PARSERS:
+        raise ValueError(f"Unsupported statement format '{extension}'; use CSV, OFX, QFX or QIF")
+    source = StatementFile(path)
+    rows = PARSERS[extension](source.lines())
+    imported, duplicates, rejected, layout = 0, 0, [], None
+    categorizer = Categorizer(repos.rules.for_categorizer())
+    repos.transactions.begin_import()
+    try:
+        while True:
+            chunk = list(islice(rows, CHUNK_SIZE))
+            if not chunk:
+                break
+            if layout is None:
+                layout = detect_date_layout([row.date for row in chunk])
+            valid, rejects = validate_chunk(chunk, layout)
+            valid = categorizer.apply(valid)
+            if valid:
+                added = repos.transactions.add_many(valid, deduplicate=True)
+                imported += added
+                duplicates += len(valid) - added
+            rejected.extend(rejects)
+            if not report((source.read, source.size, imported, duplicates, len(rejected))):
+                break
+    finally:
+        repos.transactions.end_import()
+    return ImportSummary(imported, duplicates, rejected)
+
+def write_rejections(path, rejected):
+    """Save RejectedRows as a CSV report with the source line, the reason and the original row."""
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Line", "Reason", "Row"])
+        writer.writerows(rejected)
@@ -1,19 +1,17 @@
-import tkinter as tk
-from dashboard import PersonalFinanceDashboard
-from auth_window import AuthWindow
+import importlib.util
 import logging
 import sys
 
-# Check for required dependencies
-try:
-    import tkcalendar
-    import matplotlib
-    import pandas
-    import fpdf
-    import bcrypt
-except ImportError as e:
-    print(f"Missing dependency: {e.name}. Please install it using 'pip install {e.name.lower()}'")
-    sys.exit(1)
+# Check for required dependencies without importing them; the heavy ones
+# (matplotlib, numpy) are only loaded when a chart, report or the analytics need them
+for dependency in ("tkcalendar", "matplotlib", "numpy", "bcrypt"):
+    if importlib.util.find_spec(dependency) is None:
+        print(f"Missing dependency: {dependency}. Please install it using 'pip install {dependency}'")
+        sys.exit(1)
+
+import tkinter as tk
+from dashboard import PersonalFinanceDashboard
+from auth_window import AuthWindow
 
 # Setup logging for initialization errors
 logging.basicConfig(
@@ -0,0 +1,214 @@
+import os
+import zlib
+from datetime import datetime
+
+# A4 portrait in points, with the table set in 8pt Courier so columns line up exactly
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN = 36
+FONT_SIZE = 8
+LINE_HEIGHT = 11
+CHAR_WIDTH = 0.6 * FONT_SIZE
+FETCH_SIZE = 500
+
+# (heading, width in characters, alignment); the table is 108 characters wide
+COLUMNS = (
+    ("Date", 10, 'left'),
+    ("Category", 14, 'left'),
+    ("Type", 8, 'left'),
+    ("Description", 56, 'left'),
+    ("Amount", 12, 'right'),
+)
+COLUMN_GAP = 2
+
+def _pdf_string(text):
+    data = str(text).encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+class PdfWriter:
+    """Minimal PDF writer that writes every page to disk as soon as it is finished.
+
+    Only what the export needs is supported: the standard Courier fonts, lines and
+    RGB images. Memory use is one page of content no matter how many pages there are.
+    """
+    CATALOG, PAGES, FONT, BOLD_FONT = 1, 2, 3, 4
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 5
+        self.file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _new_id(self):
+        self.next_id += 1
+        return self.next_id - 1
+
+    def _object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.file.tell()
+        self.file.write(b'%d 0 obj\n' % obj_id + body)
+        if stream is not None:
+            self.file.write(b'\nstream\n' + stream + b'\nendstream')
+        self.file.write(b'\nendobj\n')
+
+    def add_image(self, width, height, rgb):
+        """Write an RGB image once; returns its object id for add_page(images=...)."""
+        data = zlib.compress(rgb)
+        obj_id = self._new_id()
+        self._object(obj_id, b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB '
+                             b'/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>' % (width, height, len(data)), data)
+        return obj_id
+
+    def add_page(self, content, images=()):
+        data = zlib.compress(content)
+        content_id, page_id = self._new_id(), self._new_id()
+        self._object(content_id, b'<< /Filter /FlateDecode /Length %d >>' % len(data), data)
+        xobjects = b''.join(b'/Im%d %d 0 R ' % (image_id, image_id) for image_id in images)
+        self._object(page_id, b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Contents %d 0 R '
+                              b'/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> /XObject << %s>> >> >>'
+                     % (self.PAGES, PAGE_WIDTH, PAGE_HEIGHT, content_id, self.FONT, self.BOLD_FONT, xobjects))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        for obj_id, name in ((self.FONT, b'Courier'), (self.BOLD_FONT, b'Courier-Bold')):
+            self._object(obj_id, b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % name)
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self.page_ids)
+        self._object(self.PAGES, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self.page_ids)))
+        self._object(self.CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>' % self.PAGES)
+        xref = self.file.tell()
+        count = self.next_id
+        self.file.write(b'xref\n0 %d\n0000000000 65535 f \n' % count)
+        for obj_id in range(1, count):
+            self.file.write(b'%010d 00000 n \n' % self.offsets.get(obj_id, 0))
+        self.file.write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (count, self.CATALOG, xref))
+        self.file.close()
+
+class PageCanvas:
+    """Content stream for one page; y is measured from the top of the page."""
+
+    def __init__(self):
+        self.parts = []
+        self.images = []
+
+    def text(self, x, y, text, bold=False):
+        self.parts.append(b'BT /F%d %d Tf %.2f %.2f Td %s Tj ET\n'
+                          % (2 if bold else 1, FONT_SIZE, x, PAGE_HEIGHT - y, _pdf_string(text)))
+
+    def title(self, y, text, size):
+        width = len(text) * 0.6 * size
+        self.parts.append(b'BT /F2 %d Tf %.2f %.2f Td %s Tj ET\n'
+                          % (size, (PAGE_WIDTH - width) / 2, PAGE_HEIGHT - y, _pdf_string(text)))
+
+    def line(self, y):
+        self.parts.append(b'0.6 w %.2f %.2f m %.2f %.2f l S\n' % (MARGIN, PAGE_HEIGHT - y, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - y))
+
+    def image(self, image_id, y, width, height):
+        x = (PAGE_WIDTH - width) / 2
+        self.parts.append(b'q %.2f 0 0 %.2f %.2f %.2f cm /Im%d Do Q\n' % (width, height, x, PAGE_HEIGHT - y - height, image_id))
+        self.images.append(image_id)
+
+    def content(self):
+        return b''.join(self.parts)
+
+def _row_text(values):
+    cells = []
+    for (heading, width, align), value in zip(COLUMNS, values):
+        text = str(value if value is not None else '').replace('\r', ' ').replace('\n', ' ')
+        if len(text) > width:
+            text = text[:width - 1] + '~'
+        cells.append(text.rjust(width) if align == 'right' else text.ljust(width))
+    return (' ' * COLUMN_GAP).join(cells)
+
+def render_category_chart(totals, colors):
+    """Draw the report's category bar chart with Agg; returns (width, height, rgb bytes)."""
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from charts import CategoryBarChart
+    chart = CategoryBarChart(colors, figsize=(7.2, 3.6))
+    if totals:
+        chart.update([row.category for row in totals], [row.total for row in totals])
+    else:
+        chart.show_message("No data available")
+    canvas = FigureCanvasAgg(chart.figure)
+    canvas.draw()
+    pixels = np.asarray(canvas.buffer_rgba())
+    height, width = pixels.shape[:2]
+    return width, height, np.ascontiguousarray(pixels[..., :3]).tobytes()
+
+def export_transactions(repos, path, start_date, end_date, colors, report=lambda value: True):
+    """Write the transactions between two dates to a PDF at path, streaming rows with fetchmany.
+
+    report((rows_written, total_rows)) is called after every batch; when it returns False
+    the export stops and the partial file is removed. Returns the number of rows written;
+    no file is created when the range is empty.
+    """
+    total = repos.transactions.count_in_range(start_date, end_date)
+    if not total:
+        return 0
+    chart = render_category_chart(repos.transactions.category_totals(start_date, end_date), colors)
+    writer = PdfWriter(path)
+    completed = False
+    try:
+        chart_id = writer.add_image(*chart)
+        table_width = sum(width for _, width, _ in COLUMNS) * CHAR_WIDTH + COLUMN_GAP * CHAR_WIDTH * (len(COLUMNS) - 1)
+        header = _row_text([heading for heading, _, _ in COLUMNS])
+        bottom = PAGE_HEIGHT - MARGIN - 2 * LINE_HEIGHT
+        grand = {}
+        page_number = 0
+        page = subtotals = y = None
+
+        def start_page(first):
+            nonlocal page, subtotals, y, page_number
+            page, subtotals, page_number = PageCanvas(), {}, page_number + 1
+            y = MARGIN
+            if first:
+                page.title(y + 14, "Personal Finance Report", 16)
+                page.title(y + 30, f"{start_date} to {end_date}  -  {total:,} transactions  -  generated {datetime.now():%Y-%m-%d %H:%M}", 9)
+                chart_height = table_width * chart[1] / chart[0]
+                page.image(chart_id, y + 42, table_width, chart_height)
+                y += 42 + chart_height + LINE_HEIGHT
+            y += LINE_HEIGHT
+            page.text(MARGIN, y, header, bold=True)
+            y += 4
+            page.line(y)
+            y += LINE_HEIGHT
+
+        def finish_page(last):
+            y_footer = max(y, bottom) + 4
+            page.line(y_footer - LINE_HEIGHT + 3)
+            totals = "   ".join(f"{type_} {amount:,.2f}" for type_, amount in sorted(subtotals.items()))
+            page.text(MARGIN, y_footer, f"Page subtotal: {totals or 'none'}", bold=True)
+            page.text(PAGE_WIDTH - MARGIN - 10 * CHAR_WIDTH, y_footer, f"Page {page_number}".rjust(10))
+            if last:
+                overall = "   ".join(f"{type_} {amount:,.2f}" for type_, amount in sorted(grand.items()))
+                page.text(MARGIN, y_footer + LINE_HEIGHT, f"Total: {overall or 'none'}", bold=True)
+            writer.add_page(page.content(), page.images)
+
+        start_page(first=True)
+        written = 0
+        cursor = repos.transactions.stream_for_export(start_date, end_date)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                if y > bottom:
+                    finish_page(last=False)
+                    start_page(first=False)
+                page.text(MARGIN, y, _row_text((row.date, row.category, row.type, row.description, f"{row.amount:,.2f}")))
+                subtotals[row.type] = subtotals.get(row.type, 0) + row.amount
+                grand[row.type] = grand.get(row.type, 0) + row.amount
+                y += LINE_HEIGHT
+            written += len(rows)
+            if not report((written, total)):
+                cursor.close()
+                return written
+        finish_page(last=True)
+        completed = True
+        return written
+    finally:
+        if completed:
+            writer.close()
+        else:
+            writer.file.close()
+            os.remove(path)
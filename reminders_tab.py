@@ -4,14 +4,13 @@ from tkcalendar import DateEntry
 import logging
 import re
 from datetime import datetime
+from utils import TreeviewSync, TreeviewLoader
 
 class RemindersTab:
-    def __init__(self, app):
+    def __init__(self, app, frame):
         self.app = app
-        self.frame = ttk.Frame(self.app.notebook)
-        self.app.notebook.add(self.frame, text="Reminders")
+        self.frame = frame
         self.setup_ui()
-        self.check_and_update_schema()  # Ensure schema is updated
         try:
             self.refresh()
         except Exception as e:
@@ -127,27 +126,9 @@ class RemindersTab:
         self.reminders_tree.column("Due Date", width=100, anchor='center')
         self.reminders_tree.column("Status", width=100, anchor='center')
         self.reminders_tree.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
-
-    def check_and_update_schema(self):
-        try:
-            cursor = self.app.db.cursor
-            cursor.execute('PRAGMA table_info(reminders)')
-            columns = [row[1] for row in cursor.fetchall()]
-            if 'status' not in columns:
-                cursor.execute('ALTER TABLE reminders ADD COLUMN status TEXT DEFAULT "Pending"')
-                self.app.db.conn.commit()
-                logging.info("Added 'status' column to reminders table")
-            if 'paid' not in columns:
-                cursor.execute('ALTER TABLE reminders ADD COLUMN paid INTEGER DEFAULT 0')
-                self.app.db.conn.commit()
-                logging.info("Added 'paid' column to reminders table")
-                # Migrate status to paid
-                cursor.execute("UPDATE reminders SET paid = (CASE WHEN status = 'Paid' THEN 1 ELSE 0 END)")
-                self.app.db.conn.commit()
-                logging.info("Migrated status to paid column")
-        except Exception as e:
-            logging.error(f"Failed to update reminders table schema: {str(e)}")
-            messagebox.showerror("Error", f"Failed to update database schema: {str(e)}. Please check the database connection.")
+        self.reminders_sync = TreeviewSync(self.reminders_tree)
+        self.reminders_loader = TreeviewLoader(self.reminders_sync, self.reminder_item)
+        self.loaded_dates = None
 
     def add_reminder(self):
         name = self.name_entry.get().strip()
@@ -171,13 +152,7 @@ class RemindersTab:
             if status not in ["Pending", "Paid"]:
                 messagebox.showerror("Error", "Status must be either Pending or Paid")
                 return
-            paid = 1 if status == "Paid" else 0
-            self.app.db.cursor.execute('''
-                INSERT INTO reminders (name, amount, category, due_date, status, paid)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (name, amount, category, due_date, status, paid))
-            self.app.db.conn.commit()
-            self.refresh()
+            self.app.db.reminders.add(name, amount, category, due_date, status)
             self.clear_form()
             messagebox.showinfo("Success", "Reminder added successfully")
         except Exception as e:
@@ -195,12 +170,9 @@ class RemindersTab:
             if not reminder_id:
                 messagebox.showerror("Error", "Unable to determine reminder ID")
                 return
-            self.app.db.cursor.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
-            if self.app.db.cursor.rowcount == 0:
+            if not self.app.db.reminders.delete(reminder_id):
                 messagebox.showerror("Error", "Reminder not found in database")
                 return
-            self.app.db.conn.commit()
-            self.refresh()
             messagebox.showinfo("Success", "Reminder deleted successfully")
         except Exception as e:
             logging.error(f"Failed to delete reminder: {str(e)}")
@@ -212,23 +184,42 @@ class RemindersTab:
         self.refresh()
 
     def refresh(self):
+        start_date = self.start_date.get() or "1900-01-01"
+        end_date = self.end_date.get() or "9999-12-31"
+        # Any load in progress is superseded by this refresh
+        self.reminders_loader.cancel()
+        if (start_date, end_date) == self.loaded_dates:
+            # Same filter, changed data: diff the full result into the tree
+            self.app.worker.submit(
+                'reminders.refresh',
+                lambda repos: repos.reminders.in_range(start_date, end_date),
+                self.show_reminders,
+                self.refresh_failed
+            )
+            return
+        # New filter: stream the rows in so the first ones show before the query finishes
+        self.loaded_dates = (start_date, end_date)
+        self.reminders_loader.start()
+        self.app.worker.stream(
+            'reminders.refresh',
+            lambda repos: repos.reminders.stream_in_range(start_date, end_date),
+            self.reminders_loader.add,
+            on_error=self.refresh_failed
+        )
+
+    def reminder_item(self, reminder):
+        return (reminder.id, (reminder.name, f"{reminder.amount:.2f}", reminder.category, reminder.due_date, reminder.status), (str(reminder.id),))
+
+    def show_reminders(self, reminders):
         try:
-            for item in self.reminders_tree.get_children():
-                self.reminders_tree.delete(item)
-            start_date = self.start_date.get() or "1900-01-01"
-            end_date = self.end_date.get() or "9999-12-31"
-            self.app.db.cursor.execute('''
-                SELECT id, name, amount, category, due_date, status
-                FROM reminders
-                WHERE due_date BETWEEN ? AND ?
-                ORDER BY due_date DESC
-            ''', (start_date, end_date))
-            for row in self.app.db.cursor.fetchall():
-                id_, name, amount, category, due_date, status = row
-                self.reminders_tree.insert('', tk.END, values=(name, f"{amount:.2f}", category, due_date, status), tags=(str(id_),))
+            self.reminders_sync.apply(self.reminder_item(reminder) for reminder in reminders)
         except Exception as e:
-            logging.error(f"Failed to refresh reminders: {str(e)}")
-            messagebox.showerror("Error", f"Failed to refresh reminders: {str(e)}")
+            self.refresh_failed(e)
+
+    def refresh_failed(self, error):
+        self.loaded_dates = None
+        logging.error(f"Failed to refresh reminders: {str(error)}")
+        messagebox.showerror("Error", f"Failed to refresh reminders: {str(error)}")
 
     def clear_form(self):
         self.name_entry.delete(0, tk.END)
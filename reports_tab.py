@@ -1,18 +1,19 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pandas as pd
-from fpdf import FPDF
 import logging
 import os
+from utils import LruCache
 
 class ReportsTab:
-    def __init__(self, app):
+    # Reports are a few dozen category rows each, so this bounds the cache to a few KB
+    CACHE_ENTRIES = 32
+
+    def __init__(self, app, frame):
         self.app = app
-        self.frame = ttk.Frame(self.app.notebook)
-        self.app.notebook.add(self.frame, text="Reports")
+        self.frame = frame
+        self.cache = LruCache(self.CACHE_ENTRIES)
+        self.shown_key = None
         self.setup_ui()
         self.refresh()
 
@@ -32,11 +33,20 @@ class ReportsTab:
         self.end_date.pack(side=tk.LEFT, padx=5)
 
         ttk.Button(filter_frame, text="Generate Report", style='TButton', command=self.generate_report).pack(side=tk.LEFT, padx=5)
-        ttk.Button(filter_frame, text="Export to PDF", style='Accent.TButton', command=self.export_to_pdf).pack(side=tk.LEFT, padx=5)
+        # Range totals are two prefix-sum lookups, so the report can follow the date pickers
+        self.start_date.bind('<<DateEntrySelected>>', lambda event: self.generate_report())
+        self.end_date.bind('<<DateEntrySelected>>', lambda event: self.generate_report())
+        self.export_button = ttk.Button(filter_frame, text="Export to PDF", style='Accent.TButton', command=self.export_to_pdf)
+        self.export_button.pack(side=tk.LEFT, padx=5)
+        # Shown only while an export is running
+        self.export_progress = ttk.Progressbar(filter_frame, mode='determinate', length=150, maximum=100)
+        self.cancel_button = ttk.Button(filter_frame, text="Cancel", style='TButton', command=self.cancel_export)
 
-        self.figure, self.ax = plt.subplots(figsize=(8, 4))
-        self.canvas = FigureCanvasTkAgg(self.figure, master=self.card)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+        from chart_renderer import ChartView
+        from charts import CategoryBarChart
+        colors = self.app.colors
+        self.chart_view = ChartView(self.card, self.app.renderer, 'reports.categories', lambda: CategoryBarChart(colors), colors["bg_panel"])
+        self.chart_view.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
 
     def refresh(self):
         try:
@@ -46,57 +56,91 @@ class ReportsTab:
             messagebox.showerror("Error", f"Failed to refresh reports: {str(e)}")
 
     def generate_report(self):
-        try:
-            start_date = self.start_date.get() or "1900-01-01"
-            end_date = self.end_date.get() or "9999-12-31"
-            self.app.db.cursor.execute('''
-                SELECT category, SUM(amount) as total
-                FROM transactions
-                WHERE date BETWEEN ? AND ?
-                GROUP BY category
-            ''', (start_date, end_date))
-            data = self.app.db.cursor.fetchall()
-            if not data:
-                self.ax.clear()
-                self.ax.text(0.5, 0.5, "No data available", horizontalalignment='center', verticalalignment='center')
-                self.canvas.draw()
-                return
-            df = pd.DataFrame(data, columns=['category', 'total'])
-            self.ax.clear()
-            df.plot(kind='bar', x='category', y='total', ax=self.ax, color=self.app.colors["primary"])
-            self.ax.set_title("Spending by Category")
-            self.ax.set_xlabel("Category")
-            self.ax.set_ylabel("Total Amount")
-            self.canvas.draw()
-        except Exception as e:
-            logging.error(f"Failed to generate report: {str(e)}")
-            messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
+        start_date = self.start_date.get() or "1900-01-01"
+        end_date = self.end_date.get() or "9999-12-31"
+        # The ledger version changes on every write, so entries for old data are never hit again
+        key = (start_date, end_date, self.app.db.ledger_version())
+        data = self.cache.get(key)
+        logging.debug(f"Report cache: {self.cache.stats()}")
+        if data is not None:
+            self.app.worker.cancel('reports.generate')
+            self.show_report(key, data)
+            return
+        self.app.worker.submit(
+            'reports.generate',
+            lambda repos: repos.analytics.category_totals(start_date, end_date),
+            lambda data: self.report_loaded(key, data),
+            self.report_failed
+        )
+
+    def report_loaded(self, key, data):
+        self.cache.put(key, data)
+        self.show_report(key, data)
+
+    def show_report(self, key, data):
+        if key == self.shown_key:
+            return
+        self.shown_key = key
+        if not data:
+            self.chart_view.draw(lambda chart: chart.show_message("No data available"))
+            return
+        categories = [row.category for row in data]
+        totals = [row.total for row in data]
+        self.chart_view.draw(lambda chart: chart.update(categories, totals))
+
+    def report_failed(self, error):
+        self.shown_key = None
+        logging.error(f"Failed to generate report: {str(error)}")
+        messagebox.showerror("Error", f"Failed to generate report: {str(error)}")
 
     def export_to_pdf(self):
-        try:
-            start_date = self.start_date.get() or "1900-01-01"
-            end_date = self.end_date.get() or "9999-12-31"
-            self.app.db.cursor.execute('''
-                SELECT date, amount, category, type, description
-                FROM transactions
-                WHERE date BETWEEN ? AND ?
-                ORDER BY date
-            ''', (start_date, end_date))
-            data = self.app.db.cursor.fetchall()
-            if not data:
-                messagebox.showinfo("Info", "No transactions to export")
-                return
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            pdf.cell(200, 10, txt="Personal Finance Report", ln=True, align='C')
-            pdf.ln(10)
-            pdf.set_font("Arial", size=10)
-            for row in data:
-                pdf.cell(0, 10, txt=str(row), ln=True)
-            output_path = "report.pdf"
-            pdf.output(output_path)
-            messagebox.showinfo("Success", f"Report exported to {output_path}")
-        except Exception as e:
-            logging.error(f"Failed to export PDF: {str(e)}")
-            messagebox.showerror("Error", f"Failed to export PDF: {str(e)}")
\ No newline at end of file
+        start_date = self.start_date.get() or "1900-01-01"
+        end_date = self.end_date.get() or "9999-12-31"
+        path = filedialog.asksaveasfilename(
+            parent=self.frame,
+            title="Export Report",
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf")],
+            initialfile=f"report_{start_date}_{end_date}.pdf"
+        )
+        if not path:
+            return
+        from pdf_export import export_transactions
+        colors = dict(self.app.colors)
+        self.export_button.config(state='disabled')
+        self.export_progress['value'] = 0
+        self.export_progress.pack(side=tk.LEFT, padx=5)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        self.app.worker.submit(
+            'reports.export',
+            lambda repos, report: (export_transactions(repos, path, start_date, end_date, colors, report), path),
+            self.export_finished,
+            self.export_failed,
+            on_progress=self.export_progressed
+        )
+
+    def export_progressed(self, progress):
+        written, total = progress
+        self.export_progress['value'] = written * 100 / total if total else 100
+
+    def cancel_export(self):
+        self.app.worker.cancel('reports.export')
+        self.end_export()
+
+    def end_export(self):
+        self.export_progress.pack_forget()
+        self.cancel_button.pack_forget()
+        self.export_button.config(state='normal')
+
+    def export_finished(self, result):
+        written, path = result
+        self.end_export()
+        if not written:
+            messagebox.showinfo("Info", "No transactions to export")
+            return
+        messagebox.showinfo("Success", f"Exported {written:,} transactions to {path}")
+
+    def export_failed(self, error):
+        self.end_export()
+        logging.error(f"Failed to export PDF: {str(error)}")
+        messagebox.showerror("Error", f"Failed to export PDF: {str(error)}")
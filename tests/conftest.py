@@ -0,0 +1,48 @@
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import virtual_grid
+from database import Database
+
+class QueuedWorker:
+    """Keeps only the newest job per key, like DatabaseWorker, and runs the jobs when asked."""
+
+    def __init__(self, repos=None):
+        self.repos = repos
+        self.jobs = {}
+
+    def submit(self, key, query, on_result, on_error=None, on_progress=None):
+        self.jobs[key] = (query, on_result, on_error)
+
+    def run(self):
+        while self.jobs:
+            key = next(iter(self.jobs))
+            query, on_result, on_error = self.jobs.pop(key)
+            try:
+                result = query(self.repos)
+            except Exception as e:
+                on_error(e)
+            else:
+                on_result(result)
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "finance.db"))
+    yield database
+    database.close()
+
+@pytest.fixture
+def grid(monkeypatch):
+    """A VirtualGrid on a QueuedWorker, with the Tk widgets mocked out."""
+    monkeypatch.setattr(virtual_grid, "ttk", mock.MagicMock())
+    monkeypatch.setattr(virtual_grid, "TreeviewSync", mock.MagicMock())
+    grid = virtual_grid.VirtualGrid(None, QueuedWorker(), "grid.page", columns=("Value",), item_id=str,
+                                    values=lambda row: (row,))
+    grid.tree.get_children.return_value = ()
+    grid.tree.selection.return_value = ()
+    return grid
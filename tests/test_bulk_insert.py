@@ -0,0 +1,61 @@
+import sqlite3
+
+from database import connect
+from utils import day_number
+
+ROLLUP_MISMATCHES = '''
+    SELECT COUNT(*) FROM (
+        SELECT strftime('%Y-%m', day + 0.5) AS month, category_id, type_id, SUM(cents) AS cents, COUNT(*) AS count
+        FROM ledger GROUP BY 1, 2, 3
+    ) a
+    FULL JOIN monthly_category_totals t
+    ON t.month = a.month AND t.category_id = a.category_id AND t.type_id = a.type_id
+    WHERE a.cents IS NOT t.cents OR a.count IS NOT t.count
+'''
+
+def write_from_another_connection(db, when, description):
+    """Insert a transaction from a second connection as soon as db runs a statement starting with when."""
+    other = connect(db.db_name, busy_timeout=0)
+    outcome = []
+
+    def trace(statement):
+        if outcome or not statement.lstrip().startswith(when):
+            return
+        try:
+            other.execute("INSERT INTO transactions (date, amount, category, type, description) "
+                          "VALUES ('2024-05-02', 7, 'Food', 'Expense', ?)", (description,))
+            other.commit()
+            outcome.append("written")
+        except sqlite3.OperationalError:
+            other.rollback()
+            outcome.append("locked")
+    db.conn.set_trace_callback(trace)
+    return other, outcome
+
+def test_rows_written_by_others_during_add_many_are_counted_once(db):
+    db.transactions.add("2024-05-01", 10, "Food", "Expense", "Bakery")
+    other, outcome = write_from_another_connection(db, "BEGIN", "Market")
+    try:
+        rows = [(day_number("2024-05-03"), 2500, "Food", "Expense", f"Grocer {n}") for n in range(3)]
+        assert db.transactions.add_many(rows) == 3
+    finally:
+        db.conn.set_trace_callback(None)
+        other.close()
+    assert outcome == ["written"]
+    assert db.conn.execute(ROLLUP_MISMATCHES).fetchone()[0] == 0
+    db.conn.execute("INSERT INTO transactions_fts (transactions_fts, rank) VALUES ('integrity-check', 1)")
+
+def test_import_base_covers_only_fingerprinted_rows(db):
+    db.transactions.add("2024-05-01", 10, "Food", "Expense", "Bakery")
+    other, outcome = write_from_another_connection(db, "SELECT COALESCE((SELECT seq", "Market")
+    try:
+        db.transactions.begin_import()
+    finally:
+        db.conn.set_trace_callback(None)
+        other.close()
+    try:
+        db.transactions.add_many([(day_number("2024-05-02"), 700, "Food", "Expense", "Market")], deduplicate=True)
+    finally:
+        db.transactions.end_import()
+    # Either the other write waited for the import to start, or the import saw it and skipped the copy
+    assert db.conn.execute("SELECT COUNT(*) FROM transactions WHERE description = 'Market'").fetchone()[0] == 1
@@ -0,0 +1,23 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from chart_renderer import ppm_frame
+
+def test_ppm_frame_keeps_the_rgb_pixels():
+    pixels = np.random.default_rng(3).integers(0, 256, size=(30, 50, 4), dtype=np.uint8)
+    image = Image.open(io.BytesIO(ppm_frame(pixels)))
+    assert image.format == "PPM"
+    assert image.size == (50, 30)
+    assert np.array_equal(np.asarray(image), pixels[:, :, :3])
+
+def test_ppm_frame_renders_a_figure():
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    figure = Figure(figsize=(2, 1), dpi=50)
+    figure.add_subplot().plot([1, 3, 2])
+    canvas = FigureCanvasAgg(figure)
+    canvas.draw()
+    image = Image.open(io.BytesIO(ppm_frame(canvas.buffer_rgba())))
+    assert image.size == (100, 50)
@@ -0,0 +1,91 @@
+import database
+from database import Database, SCHEMA_VERSION, connect
+
+def create_schema(path, version):
+    conn = connect(path)
+    for step in database.MIGRATIONS[:version]:
+        step(conn.cursor())
+    conn.execute(f"PRAGMA user_version = {version}")
+    conn.commit()
+    return conn
+
+def check_search_index(db):
+    db.conn.execute("INSERT INTO transactions_fts (transactions_fts, rank) VALUES ('integrity-check', 1)")
+
+def test_rows_with_bad_dates_leave_the_search_index(tmp_path):
+    path = str(tmp_path / "finance.db")
+    conn = create_schema(path, 6)
+    conn.executemany(
+        "INSERT INTO transactions (id, date, amount, category, type, description) VALUES (?, ?, ?, ?, ?, ?)",
+        [(1, "2024-03-01", 12.5, "Food", "Expense", "Corner bakery"),
+         (2, "2024-03-02", 1200, "Housing", "Expense", "March rent"),
+         (2001, "not a date", 40, "Food", "Expense", "Orphan bakery")]
+    )
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    try:
+        assert db.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        check_search_index(db)
+        matches = db.conn.execute("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH 'bakery'").fetchall()
+        assert matches == [(1,)]
+        assert db.conn.execute("SELECT id FROM transactions_unmigrated").fetchall() == [(2001,)]
+    finally:
+        db.close()
+
+def test_orphaned_search_entries_are_removed(tmp_path):
+    path = str(tmp_path / "finance.db")
+    conn = create_schema(path, 10)
+    # What schema 7 used to leave behind: a moved row that is still in the full-text index
+    conn.execute("INSERT INTO categories (id, name) VALUES (1, 'Food')")
+    conn.execute("INSERT INTO ledger (id, day, cents, category_id, type_id, description) "
+                 "VALUES (1, 2460371, 1250, 1, (SELECT id FROM transaction_types WHERE name = 'Expense'), 'Corner bakery')")
+    conn.execute("CREATE TABLE transactions_unmigrated (id INTEGER, date TEXT, amount REAL, category TEXT, type TEXT, description TEXT)")
+    conn.execute("INSERT INTO transactions_unmigrated VALUES (2001, 'not a date', 40, 'Food', 'Expense', 'Orphan bakery')")
+    conn.execute("INSERT INTO transactions_fts (rowid, description) VALUES (2001, 'Orphan bakery')")
+    conn.execute("PRAGMA user_version = 10")
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    try:
+        check_search_index(db)
+        matches = db.conn.execute("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH 'bakery'").fetchall()
+        assert matches == [(1,)]
+    finally:
+        db.close()
+
+def test_times_of_day_keep_their_date(tmp_path):
+    path = str(tmp_path / "finance.db")
+    conn = create_schema(path, 6)
+    conn.execute("INSERT INTO transactions (id, date, amount, category, type, description) "
+                 "VALUES (1, '2024-01-01 13:00', 12.5, 'Food', 'Expense', 'Lunch')")
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    try:
+        db.conn.execute("INSERT INTO transactions (id, date, amount, category, type, description) "
+                        "VALUES (2, '2024-01-02 23:59:59', 30, 'Food', 'Expense', 'Dinner')")
+        db.conn.execute("UPDATE transactions SET date = '2024-01-03 18:30' WHERE id = 2")
+        rows = db.conn.execute("SELECT id, date FROM transactions ORDER BY id").fetchall()
+        assert rows == [(1, "2024-01-01"), (2, "2024-01-03")]
+    finally:
+        db.close()
+
+def test_edits_through_the_view_are_fingerprinted_again(db):
+    from utils import day_number
+    db.transactions.add("2024-04-01", 55, "Food", "Expense", "Farm shop")
+    db.conn.execute("UPDATE transactions SET amount = 65, description = 'Farm shop refund' WHERE description = 'Farm shop'")
+    db.conn.commit()
+    assert db.conn.execute("SELECT fingerprint FROM ledger").fetchone()[0] is None
+
+    db.transactions.begin_import()
+    try:
+        original = (day_number("2024-04-01"), 5500, "Food", "Expense", "Farm shop")
+        edited = (day_number("2024-04-01"), 6500, "Food", "Expense", "Farm shop refund")
+        assert db.transactions.add_many([original, edited], deduplicate=True) == 1
+    finally:
+        db.transactions.end_import()
+    assert db.conn.execute("SELECT COUNT(*) FROM transactions WHERE description = 'Farm shop'").fetchone()[0] == 1
@@ -0,0 +1,23 @@
+from database import BudgetsRepo, RemindersRepo, TransactionsRepo
+
+def query_plan(db, sql, params):
+    return [row[3] for row in db.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def assert_no_scan(plan):
+    # Walking an index in order is fine for LIMIT queries; reading a whole table or sorting is not
+    for step in plan:
+        assert not (step.startswith("SCAN") and "INDEX" not in step), plan
+        assert "TEMP B-TREE" not in step, plan
+
+def test_upcoming_reminders_search_both_indexes(db):
+    plan = query_plan(db, RemindersRepo.UPCOMING, ("2024-01-01", 5))
+    assert not any(step.startswith("SCAN") or "TEMP B-TREE" in step for step in plan), plan
+    assert any("idx_reminders_paid_due_date" in step for step in plan), plan
+    assert any("idx_reminders_due_date" in step for step in plan), plan
+
+def test_hot_queries_do_not_scan(db):
+    assert_no_scan(query_plan(db, RemindersRepo.IN_RANGE, ("2024-01-01", "2024-01-31")))
+    assert_no_scan(query_plan(db, BudgetsRepo.FOR_MONTH, ("2024-01",)))
+    assert_no_scan(query_plan(db, TransactionsRepo.RECENT, (5,)))
+    assert_no_scan(query_plan(db, TransactionsRepo.COUNT_IN_RANGE, (738000, 738030)))
+    assert_no_scan(query_plan(db, TransactionsRepo.IN_RANGE, (738000, 738030)))
@@ -0,0 +1,31 @@
+from transactions_tab import TransactionSearch
+
+def add_rows(db):
+    for day in range(1, 29):
+        db.transactions.add(f"2024-02-{day:02d}", 4.5, "Food", "Expense", f"Coffee shop {day}")
+        db.transactions.add(f"2024-02-{day:02d}", 900, "Housing", "Expense", f"Rent payment {day}")
+
+def test_page_ranks_again_after_another_search(db):
+    add_rows(db)
+    coffee = TransactionSearch("coffee", "2024-02-01", "2024-02-29")
+    rent = TransactionSearch("rent", "2024-02-01", "2024-02-29")
+    assert coffee.count(db) == 28
+    assert rent.count(db) == 28
+    rows = coffee.page(db, None, 0, 10)
+    assert len(rows) == 10
+    assert all(row.description.startswith("Coffee") for row in rows)
+
+def test_typing_while_scrolling_shows_the_new_search(db, grid):
+    add_rows(db)
+    grid.worker.repos = db
+    grid.item_id = lambda row: str(row.id)
+    grid.values = lambda row: (row.description,)
+    grid.set_source(TransactionSearch("coffee", "2024-02-01", "2024-02-29"))
+    grid.worker.run()
+
+    grid.set_source(TransactionSearch("rent", "2024-02-01", "2024-02-29"), keep_position=False)
+    grid.scroll_by(5)
+    grid.worker.run()
+    assert grid.total == 28
+    shown = [values for item, values, tags in grid.sync.apply.call_args[0][0]]
+    assert shown and all(description.startswith("Rent") for description, in shown)
@@ -0,0 +1,51 @@
+from unittest import mock
+
+class RangeSource:
+    """Rows 0..size-1 in order, keyed by themselves."""
+
+    def __init__(self, size):
+        self.size = size
+
+    def key(self, row):
+        return row
+
+    def count(self, repos):
+        return self.size
+
+    def page(self, repos, after, offset, limit):
+        start = (after + 1 if after is not None else 0) + offset
+        return list(range(start, min(start + limit, self.size)))
+
+    def page_from_end(self, repos, offset, limit):
+        end = self.size - offset
+        return list(range(max(end - limit, 0), end))
+
+def test_scroll_while_new_source_loads_still_counts_it(grid):
+    grid.set_source(RangeSource(5000))
+    grid.worker.run()
+    assert grid.total == 5000
+
+    grid.set_source(RangeSource(50000), keep_position=True)
+    grid.scroll_to(4000)
+    grid.worker.run()
+    assert grid.total == 50000
+    grid.scroll_to(40000)
+    grid.worker.run()
+    assert grid.top == 40000
+    assert grid.sync.apply.call_args is not None
+    shown = [item for item, values, tags in grid.sync.apply.call_args[0][0]]
+    assert shown[0] == "40000"
+
+def test_failed_load_reaches_on_error_and_is_retried(grid):
+    errors = []
+    grid.on_error = errors.append
+    source = RangeSource(500)
+    source.count = mock.MagicMock(side_effect=[RuntimeError("database is locked"), 500])
+    grid.set_source(source)
+    grid.worker.run()
+    assert [str(error) for error in errors] == ["database is locked"]
+    assert grid.loading == set()
+
+    grid.render()
+    grid.worker.run()
+    assert grid.total == 500
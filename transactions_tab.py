@@ -1,15 +1,370 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry
 import logging
+import os
 import re
 from datetime import datetime
+from virtual_grid import VirtualGrid
+from categorizer import RULE_KINDS, check_rule, recategorize_all
+
+class TransactionRange:
+    """VirtualGrid data source for the transactions between two dates, newest first."""
+
+    def __init__(self, start_date, end_date):
+        self.dates = (start_date, end_date)
+        self.filters = self.dates
+
+    def key(self, row):
+        return (row.date, row.id)
+
+    def count(self, repos):
+        return repos.transactions.count_in_range(*self.dates)
+
+    def page(self, repos, after, offset, limit):
+        return repos.transactions.page(*self.dates, after, offset, limit)
+
+    def page_from_end(self, repos, offset, limit):
+        return repos.transactions.page_from_end(*self.dates, offset, limit)
+
+class TransactionSearch:
+    """VirtualGrid data source for a description search within two dates, most relevant first.
+
+    count() ranks every match once on the worker; pages are then looked up by rank position,
+    after ranking again if the connection's hits belong to another search.
+    """
+
+    def __init__(self, text, start_date, end_date):
+        self.text = text
+        self.dates = (start_date, end_date)
+        self.filters = (text, start_date, end_date)
+        self.total = 0
+
+    def key(self, row):
+        return row.position
+
+    def count(self, repos):
+        self.total = repos.transactions.search(self.text, *self.dates)
+        return self.total
+
+    def ranked(self, repos):
+        if repos.transactions.searched != self.filters:
+            self.count(repos)
+
+    def page(self, repos, after, offset, limit):
+        self.ranked(repos)
+        return repos.transactions.search_page((after or 0) + offset, limit)
+
+    def page_from_end(self, repos, offset, limit):
+        self.ranked(repos)
+        return repos.transactions.search_page(self.total - offset - limit, limit)
+
+class ImportDialog:
+    """Progress of a statement import running on the database worker, then the rows it rejected."""
+    SHOWN_REJECTIONS = 500
+
+    def __init__(self, app, path):
+        self.app = app
+        self.path = path
+        self.imported = 0
+        self.running = True
+        self.rejected = []
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Import Statement")
+        self.window.transient(app.root)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.status = ttk.Label(self.window, text=f"Importing {os.path.basename(path)}...", font=('Roboto', 12))
+        self.status.pack(fill=tk.X, padx=12, pady=(12, 5))
+        self.progress = ttk.Progressbar(self.window, mode='determinate', length=420, maximum=100)
+        self.progress.pack(fill=tk.X, padx=12, pady=5)
+        self.buttons = ttk.Frame(self.window)
+        self.buttons.pack(side=tk.BOTTOM, fill=tk.X, padx=12, pady=(5, 12))
+        self.close_button = ttk.Button(self.buttons, text="Cancel", style='Accent.TButton', command=self.close)
+        self.close_button.pack(side=tk.RIGHT, padx=5)
+
+        from importer import import_statement
+        app.worker.submit(
+            'transactions.import',
+            lambda repos, report: import_statement(repos, path, report),
+            self.finished,
+            self.failed,
+            on_progress=self.progressed
+        )
+
+    def progressed(self, progress):
+        read, size, self.imported, duplicates, rejected = progress
+        self.progress['value'] = read * 100 / size if size else 100
+        self.status.config(text=f"Imported {self.imported:,} transactions, skipped {duplicates:,} already imported, "
+                                f"{rejected:,} rows rejected...")
+
+    def finished(self, summary):
+        self.running = False
+        self.imported = summary.imported
+        self.rejected = summary.rejected
+        if self.imported:
+            # One notification for the whole import, so each tab refreshes once
+            self.app.db.announce_change('transactions')
+        self.progress['value'] = 100
+        self.status.config(text=f"Imported {self.imported:,} transactions from {os.path.basename(self.path)}; "
+                                f"skipped {summary.duplicates:,} already imported; {len(self.rejected):,} rows rejected")
+        self.close_button.config(text="Close", style='TButton')
+        if self.rejected:
+            self.show_rejections()
+
+    def show_rejections(self):
+        frame = ttk.Frame(self.window)
+        frame.pack(fill=tk.BOTH, expand=True, padx=12, pady=5)
+        tree = ttk.Treeview(frame, columns=("Line", "Reason", "Row"), show='headings', height=10)
+        for column, width in (("Line", 60), ("Reason", 260), ("Row", 320)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        for row in self.rejected[:self.SHOWN_REJECTIONS]:
+            tree.insert("", tk.END, values=row)
+        if len(self.rejected) > self.SHOWN_REJECTIONS:
+            ttk.Label(self.window, text=f"Showing the first {self.SHOWN_REJECTIONS:,}; save the report for all of them",
+                      font=('Roboto', 10)).pack(fill=tk.X, padx=12)
+        ttk.Button(self.buttons, text="Save Report", style='TButton', command=self.save_report).pack(side=tk.RIGHT, padx=5)
+
+    def save_report(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            title="Save Rejected Rows",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")],
+            initialfile=f"{os.path.splitext(os.path.basename(self.path))[0]}_rejected.csv"
+        )
+        if not path:
+            return
+        try:
+            from importer import write_rejections
+            write_rejections(path, self.rejected)
+            messagebox.showinfo("Success", f"Saved {len(self.rejected):,} rejected rows to {path}", parent=self.window)
+        except Exception as e:
+            logging.error(f"Failed to save import report: {str(e)}")
+            messagebox.showerror("Error", f"Failed to save import report: {str(e)}", parent=self.window)
+
+    def failed(self, error):
+        self.running = False
+        self.app.db.announce_change('transactions')
+        self.window.destroy()
+        logging.error(f"Failed to import statement: {str(error)}")
+        messagebox.showerror("Error", f"Failed to import statement: {str(error)}")
+
+    def close(self):
+        if self.running:
+            self.running = False
+            self.app.worker.cancel('transactions.import')
+            # Chunks committed before the cancel stay imported, possibly one more than reported so far
+            self.app.db.announce_change('transactions')
+            messagebox.showinfo("Info", "Import cancelled; transactions imported before the cancel were kept")
+        self.window.destroy()
+
+class RulesDialog:
+    """The auto-categorization rules in priority order, and re-categorizing every transaction with them."""
+    CATEGORIES = ["Housing", "Food", "Transport", "Entertainment", "Utilities", "Healthcare"]
 
-class TransactionsTab:
     def __init__(self, app):
         self.app = app
-        self.frame = ttk.Frame(self.app.notebook)
-        self.app.notebook.add(self.frame, text="Transactions")
+        self.running = False
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Category Rules")
+        self.window.transient(app.root)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        frame = ttk.Frame(self.window)
+        frame.pack(fill=tk.BOTH, expand=True, padx=12, pady=(12, 5))
+        self.tree = ttk.Treeview(frame, columns=("Kind", "Pattern", "Amount", "Category"), show='headings', height=10)
+        for column, width in (("Kind", 80), ("Pattern", 260), ("Amount", 160), ("Category", 140)):
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        form = ttk.LabelFrame(self.window, text="New Rule", style='Card.TFrame')
+        form.pack(fill=tk.X, padx=12, pady=5)
+        form.columnconfigure(1, weight=1)
+        form.columnconfigure(3, weight=1)
+        ttk.Label(form, text="Kind:", font=('Roboto', 12)).grid(row=0, column=0, padx=(10, 5), pady=5, sticky="e")
+        self.kind_combo = ttk.Combobox(form, values=RULE_KINDS, state='readonly', width=12, font=('Roboto', 12))
+        self.kind_combo.set(RULE_KINDS[0])
+        self.kind_combo.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Label(form, text="Category:", font=('Roboto', 12)).grid(row=0, column=2, padx=(10, 5), pady=5, sticky="e")
+        self.category_combo = ttk.Combobox(form, values=self.CATEGORIES, width=16, font=('Roboto', 12))
+        self.category_combo.grid(row=0, column=3, padx=(5, 10), pady=5, sticky="ew")
+        ttk.Label(form, text="Match:", font=('Roboto', 12)).grid(row=1, column=0, padx=(10, 5), pady=5, sticky="e")
+        self.pattern_entry = ttk.Entry(form, font=('Roboto', 12))
+        self.pattern_entry.grid(row=1, column=1, columnspan=3, padx=(5, 10), pady=5, sticky="ew")
+        ttk.Label(form, text="Min Amount:", font=('Roboto', 12)).grid(row=2, column=0, padx=(10, 5), pady=5, sticky="e")
+        self.min_entry = ttk.Entry(form, width=12, font=('Roboto', 12))
+        self.min_entry.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Label(form, text="Max Amount:", font=('Roboto', 12)).grid(row=2, column=2, padx=(10, 5), pady=5, sticky="e")
+        self.max_entry = ttk.Entry(form, width=12, font=('Roboto', 12))
+        self.max_entry.grid(row=2, column=3, padx=(5, 10), pady=5, sticky="ew")
+        ttk.Label(form, text="Keywords are comma-separated whole words, in any case. Regex rules are case-sensitive "
+                             "unless they start with (?i). Amount rules only use the amount range.",
+                  font=('Roboto', 10), wraplength=620).grid(row=3, column=0, columnspan=4, padx=10, pady=(0, 5), sticky="w")
+
+        buttons = ttk.Frame(self.window)
+        buttons.pack(fill=tk.X, padx=12, pady=5)
+        ttk.Button(buttons, text="Add Rule", style='TButton', command=self.add_rule).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Move Up", style='TButton', command=lambda: self.move_rule(-1)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Move Down", style='TButton', command=lambda: self.move_rule(1)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Delete Rule", style='Accent.TButton', command=self.delete_rule).pack(side=tk.LEFT, padx=5)
+        self.apply_button = ttk.Button(buttons, text="Apply to All Transactions", style='TButton', command=self.apply_all)
+        self.apply_button.pack(side=tk.RIGHT, padx=5)
+        self.status = ttk.Label(self.window, text="Rules are tried from the top; the first that matches sets the category",
+                                font=('Roboto', 10))
+        self.status.pack(fill=tk.X, padx=12, pady=(0, 12))
+        self.load()
+
+    def load(self, selected=None):
+        try:
+            rules = self.app.db.rules.all()
+        except Exception as e:
+            logging.error(f"Failed to load category rules: {str(e)}")
+            messagebox.showerror("Error", f"Failed to load category rules: {str(e)}", parent=self.window)
+            return
+        self.tree.delete(*self.tree.get_children())
+        for rule in rules:
+            self.tree.insert("", tk.END, iid=str(rule.id), values=(
+                rule.kind, rule.pattern, self.amount_range(rule.min_amount, rule.max_amount), rule.category))
+        if selected is not None and self.tree.exists(str(selected)):
+            self.tree.selection_set(str(selected))
+
+    @staticmethod
+    def amount_range(low, high):
+        if low is not None and high is not None:
+            return f"${low:,.2f} to ${high:,.2f}"
+        if low is not None:
+            return f"${low:,.2f} or more"
+        if high is not None:
+            return f"up to ${high:,.2f}"
+        return "any"
+
+    def read_amount(self, entry, name):
+        text = entry.get().strip()
+        if not text:
+            return None
+        if not re.match(r'^\d*\.?\d{0,2}$', text) or text == '.':
+            raise ValueError(f"{name} must be a positive number with at most 2 decimal places")
+        return float(text)
+
+    def add_rule(self):
+        kind = self.kind_combo.get()
+        pattern = self.pattern_entry.get().strip()
+        category = self.category_combo.get().strip()
+        try:
+            if not category:
+                raise ValueError("Please choose a category")
+            low = self.read_amount(self.min_entry, "Min Amount")
+            high = self.read_amount(self.max_entry, "Max Amount")
+            if low is not None and high is not None and low > high:
+                raise ValueError("Min Amount cannot be more than Max Amount")
+            if kind == "Amount":
+                if low is None and high is None:
+                    raise ValueError("Amount rules need a Min Amount, a Max Amount or both")
+                pattern = ""
+            check_rule(kind, pattern)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=self.window)
+            return
+        try:
+            rule_id = self.app.db.rules.add(kind, pattern, category, low, high)
+        except Exception as e:
+            logging.error(f"Failed to add category rule: {str(e)}")
+            messagebox.showerror("Error", f"Failed to add category rule: {str(e)}", parent=self.window)
+            return
+        for entry in (self.pattern_entry, self.min_entry, self.max_entry):
+            entry.delete(0, tk.END)
+        self.load(rule_id)
+
+    def selected_rule(self):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showerror("Error", "Please select a rule", parent=self.window)
+            return None
+        return int(selected[0])
+
+    def move_rule(self, step):
+        rule_id = self.selected_rule()
+        if rule_id is None:
+            return
+        try:
+            if self.app.db.rules.move(rule_id, step):
+                self.load(rule_id)
+        except Exception as e:
+            logging.error(f"Failed to move category rule: {str(e)}")
+            messagebox.showerror("Error", f"Failed to move category rule: {str(e)}", parent=self.window)
+
+    def delete_rule(self):
+        rule_id = self.selected_rule()
+        if rule_id is None:
+            return
+        try:
+            self.app.db.rules.delete(rule_id)
+            self.load()
+        except Exception as e:
+            logging.error(f"Failed to delete category rule: {str(e)}")
+            messagebox.showerror("Error", f"Failed to delete category rule: {str(e)}", parent=self.window)
+
+    def apply_all(self):
+        if self.running:
+            return
+        if not self.tree.get_children():
+            messagebox.showerror("Error", "Add a rule first", parent=self.window)
+            return
+        if not messagebox.askyesno("Confirm", "Re-categorize every transaction that a rule matches?", parent=self.window):
+            return
+        self.running = True
+        self.apply_button.config(state='disabled')
+        self.status.config(text="Re-categorizing transactions...")
+        self.app.worker.submit(
+            'transactions.recategorize',
+            recategorize_all,
+            self.applied,
+            self.apply_failed,
+            on_progress=self.apply_progressed
+        )
+
+    def apply_progressed(self, progress):
+        scanned, total = progress
+        self.status.config(text=f"Checked {scanned:,} of {total:,} transactions...")
+
+    def applied(self, updated):
+        self.running = False
+        self.apply_button.config(state='normal')
+        if updated:
+            self.app.db.announce_change('transactions')
+        self.status.config(text=f"Re-categorized {updated:,} transactions")
+
+    def apply_failed(self, error):
+        self.running = False
+        self.apply_button.config(state='normal')
+        self.status.config(text="")
+        logging.error(f"Failed to re-categorize transactions: {str(error)}")
+        messagebox.showerror("Error", f"Failed to re-categorize transactions: {str(error)}", parent=self.window)
+
+    def close(self):
+        if self.running:
+            # Nothing is written until every row has been checked, but a cancel that arrives
+            # while the updates are being written lets them finish
+            self.running = False
+            self.app.worker.cancel('transactions.recategorize')
+            self.app.db.announce_change('transactions')
+        self.window.destroy()
+
+class TransactionsTab:
+    TYPES = ["Income", "Expense", "Savings"]
+
+    def __init__(self, app, frame):
+        self.app = app
+        self.frame = frame
         self.setup_ui()
         self.refresh()
 
@@ -71,9 +426,15 @@ class TransactionsTab:
         button_frame.pack(fill=tk.X, padx=12, pady=5)
         button_frame.columnconfigure(0, weight=1)
         button_frame.columnconfigure(1, weight=1)
+        button_frame.columnconfigure(2, weight=1)
+        button_frame.columnconfigure(3, weight=1)
 
         ttk.Button(button_frame, text="Add Transaction", style='TButton', command=self.add_transaction).grid(row=0, column=0, padx=5, pady=5, sticky="ew")
-        ttk.Button(button_frame, text="Delete Transaction", style='Accent.TButton', command=self.delete_transaction).grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Button(button_frame, text="Delete Selected", style='Accent.TButton', command=self.delete_selected).grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Button(button_frame, text="Import Statement", style='TButton', command=self.import_statement).grid(row=0, column=2, padx=5, pady=5, sticky="ew")
+        ttk.Button(button_frame, text="Category Rules", style='TButton', command=self.edit_rules).grid(row=0, column=3, padx=5, pady=5, sticky="ew")
+        self.import_dialog = None
+        self.rules_dialog = None
 
         # Filter Frame
         filter_frame = ttk.LabelFrame(self.card, text="Filter Transactions", style='Card.TFrame')
@@ -99,15 +460,50 @@ class TransactionsTab:
         )
         self.end_date.pack(side=tk.LEFT, padx=5)
 
+        ttk.Label(filter_frame, text="Search:", font=('Roboto', 12)).pack(side=tk.LEFT, padx=5)
+        self.search_entry = ttk.Entry(filter_frame, width=20, font=('Roboto', 12))
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind('<Return>', lambda event: self.refresh())
+        self.search_entry.bind('<KeyRelease>', self.on_search_typed)
+        self.search_after_id = None
+
         ttk.Button(filter_frame, text="Apply Filter", style='TButton', command=self.refresh).pack(side=tk.LEFT, padx=5)
         ttk.Button(filter_frame, text="Clear Filters", style='Accent.TButton', command=self.clear_filters).pack(side=tk.LEFT, padx=5)
 
-        # Transactions Treeview
-        self.transactions_tree = ttk.Treeview(
-            self.card, 
-            columns=("Date", "Amount", "Category", "Type", "Description"), 
-            show='headings'
+        # Totals follow the date pickers straight away; they come from the prefix sums, not a query
+        self.totals_label = ttk.Label(self.card, text="", font=('Roboto', 11), foreground=self.app.colors["text_secondary"])
+        self.totals_label.pack(fill=tk.X, padx=12)
+        self.start_date.bind('<<DateEntrySelected>>', lambda event: self.update_totals())
+        self.end_date.bind('<<DateEntrySelected>>', lambda event: self.update_totals())
+
+        # Batch edits of the selected rows; the last one can be undone
+        bulk_frame = ttk.LabelFrame(self.card, text="Selected Transactions", style='Card.TFrame')
+        bulk_frame.pack(fill=tk.X, padx=12, pady=5)
+        self.selection_label = ttk.Label(bulk_frame, text="None selected", width=14, font=('Roboto', 12))
+        self.selection_label.pack(side=tk.LEFT, padx=5)
+        self.bulk_category_combo = ttk.Combobox(bulk_frame, values=RulesDialog.CATEGORIES, width=14, font=('Roboto', 12))
+        self.bulk_category_combo.pack(side=tk.LEFT, padx=5)
+        ttk.Button(bulk_frame, text="Set Category", style='TButton', command=self.set_selected_category).pack(side=tk.LEFT, padx=5)
+        self.bulk_type_combo = ttk.Combobox(bulk_frame, values=self.TYPES, state='readonly', width=10, font=('Roboto', 12))
+        self.bulk_type_combo.pack(side=tk.LEFT, padx=5)
+        ttk.Button(bulk_frame, text="Set Type", style='TButton', command=self.set_selected_type).pack(side=tk.LEFT, padx=5)
+        self.undo_button = ttk.Button(bulk_frame, text="Undo", style='TButton', command=self.undo, state='disabled')
+        self.undo_button.pack(side=tk.RIGHT, padx=5)
+        self.bulk_status = ttk.Label(bulk_frame, text="", font=('Roboto', 11), foreground=self.app.colors["text_secondary"])
+        self.bulk_status.pack(side=tk.RIGHT, padx=5)
+        self.last_batch = None
+
+        # Transactions grid; only the rows on screen are kept in the Treeview
+        self.grid = VirtualGrid(
+            self.card,
+            self.app.worker,
+            'transactions.page',
+            columns=("Date", "Amount", "Category", "Type", "Description"),
+            item_id=lambda row: str(row.id),
+            values=lambda row: (row.date, row.amount, row.category, row.type, row.description),
+            on_error=self.refresh_failed
         )
+        self.transactions_tree = self.grid.tree
         self.transactions_tree.heading("Date", text="Date")
         self.transactions_tree.heading("Amount", text="Amount")
         self.transactions_tree.heading("Category", text="Category")
@@ -118,7 +514,8 @@ class TransactionsTab:
         self.transactions_tree.column("Category", width=120, anchor='center')
         self.transactions_tree.column("Type", width=100, anchor='center')
         self.transactions_tree.column("Description", width=200, anchor='center')
-        self.transactions_tree.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+        self.grid.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+        self.transactions_tree.bind('<<TreeviewSelect>>', lambda event: self.update_selection_label())
 
     def add_transaction(self):
         date = self.date_entry.get().strip()
@@ -165,63 +562,149 @@ class TransactionsTab:
                 messagebox.showerror("Error", "Please fill in all required fields (*)")
                 return
 
-            self.app.db.cursor.execute('''
-                INSERT INTO transactions (date, amount, category, type, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (date, amount, category, type_, description))
-            self.app.db.conn.commit()
-            self.refresh()
+            self.app.db.transactions.add(date, amount, category, type_, description)
             self.clear_inputs()
             messagebox.showinfo("Success", "Transaction added successfully")
         except Exception as e:
             logging.error(f"Failed to add transaction: {str(e)}")
             messagebox.showerror("Error", f"Failed to add transaction: {str(e)}")
 
-    def delete_transaction(self):
-        selected = self.transactions_tree.selection()
+    def import_statement(self):
+        if self.import_dialog is not None and self.import_dialog.running:
+            self.import_dialog.window.lift()
+            return
+        path = filedialog.askopenfilename(
+            parent=self.frame,
+            title="Import Statement",
+            filetypes=[("Bank statements", "*.csv *.ofx *.qfx *.qif"), ("All files", "*.*")]
+        )
+        if path:
+            self.import_dialog = ImportDialog(self.app, path)
+
+    def edit_rules(self):
+        if self.rules_dialog is not None and self.rules_dialog.window.winfo_exists():
+            self.rules_dialog.window.lift()
+            return
+        self.rules_dialog = RulesDialog(self.app)
+
+    def selected_transaction_ids(self):
+        selected = self.grid.selected_ids()
         if not selected:
-            messagebox.showerror("Error", "Please select a transaction to delete")
+            messagebox.showerror("Error", "Please select one or more transactions")
+        return sorted(int(transaction_id) for transaction_id in selected)
+
+    def update_selection_label(self):
+        count = len(self.grid.selected_ids())
+        self.selection_label.config(text=f"{count:,} selected" if count else "None selected")
+
+    def remember_batch(self, description, snapshot):
+        # Only the last batch can be undone; its snapshot holds every row as it was before
+        self.last_batch = (description, snapshot) if snapshot else None
+        self.undo_button.config(state='normal' if self.last_batch else 'disabled')
+        self.bulk_status.config(text=description if snapshot else "No transactions changed")
+
+    def delete_selected(self):
+        transaction_ids = self.selected_transaction_ids()
+        if not transaction_ids:
             return
         try:
-            item = self.transactions_tree.item(selected[0])
-            transaction_id = item['tags'][0] if item['tags'] else None
-            if not transaction_id:
-                messagebox.showerror("Error", "Unable to determine transaction ID")
-                return
-            self.app.db.cursor.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
-            if self.app.db.cursor.rowcount == 0:
-                messagebox.showerror("Error", "Transaction not found in database")
-                return
-            self.app.db.conn.commit()
-            self.refresh()
-            messagebox.showinfo("Success", "Transaction deleted successfully")
+            snapshot = self.app.db.transactions.delete_many(transaction_ids)
+        except Exception as e:
+            logging.error(f"Failed to delete transactions: {str(e)}")
+            messagebox.showerror("Error", f"Failed to delete transactions: {str(e)}")
+            return
+        self.grid.select(())
+        self.update_selection_label()
+        self.remember_batch(f"Deleted {len(snapshot):,} transactions", snapshot)
+
+    def update_selected(self, description, category=None, type_=None):
+        transaction_ids = self.selected_transaction_ids()
+        if not transaction_ids:
+            return
+        try:
+            snapshot = self.app.db.transactions.update_many(transaction_ids, category=category, type_=type_)
         except Exception as e:
-            logging.error(f"Failed to delete transaction: {str(e)}")
-            messagebox.showerror("Error", f"Failed to delete transaction: {str(e)}")
+            logging.error(f"Failed to update transactions: {str(e)}")
+            messagebox.showerror("Error", f"Failed to update transactions: {str(e)}")
+            return
+        self.remember_batch(f"{description} for {len(snapshot):,} transactions", snapshot)
+
+    def set_selected_category(self):
+        category = self.bulk_category_combo.get().strip()
+        if not category:
+            messagebox.showerror("Error", "Please choose a category")
+            return
+        self.update_selected(f"Set category to {category}", category=category)
+
+    def set_selected_type(self):
+        type_ = self.bulk_type_combo.get()
+        if not type_:
+            messagebox.showerror("Error", "Please choose a type")
+            return
+        self.update_selected(f"Set type to {type_}", type_=type_)
+
+    def undo(self):
+        if self.last_batch is None:
+            return
+        description, snapshot = self.last_batch
+        try:
+            self.app.db.transactions.restore(snapshot)
+        except Exception as e:
+            logging.error(f"Failed to undo batch edit: {str(e)}")
+            messagebox.showerror("Error", f"Failed to undo: {str(e)}")
+            return
+        self.last_batch = None
+        self.undo_button.config(state='disabled')
+        self.grid.select(str(row[0]) for row in snapshot)
+        self.update_selection_label()
+        self.bulk_status.config(text=f"Undone: {description}")
 
     def clear_filters(self):
         self.start_date.set_date("")
         self.end_date.set_date("")
+        self.search_entry.delete(0, tk.END)
         self.refresh()
 
+    def on_search_typed(self, event):
+        # Search as the user types, once they pause
+        if self.search_after_id is not None:
+            self.frame.after_cancel(self.search_after_id)
+        self.search_after_id = self.frame.after(250, self.search_changed)
+
+    def search_changed(self):
+        self.search_after_id = None
+        if self.search_entry.get().strip() != getattr(self.grid.source, 'text', ''):
+            self.refresh()
+
     def refresh(self):
-        try:
-            for item in self.transactions_tree.get_children():
-                self.transactions_tree.delete(item)
-            start_date = self.start_date.get() or "1900-01-01"
-            end_date = self.end_date.get() or "9999-12-31"
-            self.app.db.cursor.execute('''
-                SELECT id, date, amount, category, type, description
-                FROM transactions
-                WHERE date BETWEEN ? AND ?
-                ORDER BY date DESC
-            ''', (start_date, end_date))
-            for row in self.app.db.cursor.fetchall():
-                id_, date, amount, category, type_, description = row
-                self.transactions_tree.insert('', tk.END, values=(date, amount, category, type_, description), tags=(str(id_),))
-        except Exception as e:
-            logging.error(f"Failed to refresh transactions: {str(e)}")
-            messagebox.showerror("Error", f"Failed to refresh transactions: {str(e)}")
+        start_date = self.start_date.get() or "1900-01-01"
+        end_date = self.end_date.get() or "9999-12-31"
+        text = self.search_entry.get().strip()
+        source = TransactionSearch(text, start_date, end_date) if text else TransactionRange(start_date, end_date)
+        # Stay at the same scroll position when only the data changed
+        same_filter = getattr(self.grid.source, 'filters', None) == source.filters
+        self.grid.set_source(source, keep_position=same_filter)
+        self.update_totals()
+
+    def update_totals(self):
+        start_date = self.start_date.get() or "1900-01-01"
+        end_date = self.end_date.get() or "9999-12-31"
+        self.app.worker.submit(
+            'transactions.totals',
+            lambda repos: repos.analytics.type_totals(start_date, end_date),
+            self.show_totals,
+            lambda e: logging.error(f"Failed to total transactions: {str(e)}")
+        )
+
+    def show_totals(self, totals):
+        income, expense = totals.get("Income", 0), totals.get("Expense", 0)
+        parts = [f"{type_} ${amount:,.2f}" for type_, amount in sorted(totals.items())]
+        parts.append(f"Net ${income - expense:,.2f}")
+        self.totals_label.config(text="   ".join(parts))
+
+    def refresh_failed(self, error):
+        logging.error(f"Failed to refresh transactions: {str(error)}")
+        messagebox.showerror("Error", f"Failed to refresh transactions: {str(error)}")
 
     def clear_inputs(self):
         self.date_entry.set_date(datetime.now())  # Reset to today's date
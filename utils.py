@@ -1,4 +1,8 @@
 import random
+import calendar
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from datetime import date, datetime
 from tkinter import ttk
 
 def get_motivational_quote():
@@ -11,6 +15,206 @@ def get_motivational_quote():
     ]
     return random.choice(quotes)
 
+def shift_month(month, delta):
+    """Return the 'YYYY-MM' month that is delta months away from month."""
+    year, mon = map(int, month.split('-'))
+    index = year * 12 + (mon - 1) + delta
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def month_range(month):
+    """Return the half-open [start, end) date bounds of a 'YYYY-MM' month for index-friendly filters."""
+    return f"{month}-01", f"{shift_month(month, 1)}-01"
+
+# Days are numbered like CAST(julianday(date(date)) AS INTEGER) in SQLite
+JULIAN_OFFSET = 1721424
+
+def day_number(iso_date):
+    return date.fromisoformat(iso_date).toordinal() + JULIAN_OFFSET
+
+def day_range(start_date, end_date):
+    return day_number(start_date), day_number(end_date)
+
+def split_date_range(start_date, end_date):
+    """Split an inclusive 'YYYY-MM-DD' range into whole months and the partial days at either end.
+
+    Returns (first_month, last_month, edges): the whole months are first_month..last_month
+    inclusive (both None when there are none) and edges lists the inclusive (start, end)
+    date pairs left over.
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    if start > end:
+        return None, None, []
+    start_last_day = calendar.monthrange(start.year, start.month)[1]
+    end_is_last_day = end.day == calendar.monthrange(end.year, end.month)[1]
+    first = start.year * 12 + start.month - 1 + (0 if start.day == 1 else 1)
+    last = end.year * 12 + end.month - 1 - (0 if end_is_last_day else 1)
+    if first > last:
+        return None, None, [(start_date, end_date)]
+    edges = []
+    if start.day != 1:
+        edges.append((start_date, start.replace(day=start_last_day).isoformat()))
+    if not end_is_last_day:
+        edges.append((end.replace(day=1).isoformat(), end_date))
+    return f"{first // 12:04d}-{first % 12 + 1:02d}", f"{last // 12:04d}-{last % 12 + 1:02d}", edges
+
+class LruCache:
+    """Bounded mapping that evicts the least recently used entry and counts hits and misses."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the value cached under key, or None on a miss."""
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+            "evictions": self.evictions, "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+def _longest_increasing_run(positions):
+    """Indexes into positions of one longest strictly increasing subsequence."""
+    tails, tail_indexes, previous = [], [], [None] * len(positions)
+    for index, position in enumerate(positions):
+        slot = bisect_left(tails, position)
+        if slot == len(tails):
+            tails.append(position)
+            tail_indexes.append(index)
+        else:
+            tails[slot] = position
+            tail_indexes[slot] = index
+        previous[index] = tail_indexes[slot - 1] if slot else None
+    run = []
+    index = tail_indexes[-1] if tail_indexes else None
+    while index is not None:
+        run.append(index)
+        index = previous[index]
+    return set(run)
+
+class TreeviewSync:
+    """Keeps a flat Treeview in step with a result set keyed by database id.
+
+    apply() compares the new rows with what the tree shows and only deletes, inserts,
+    updates or moves the items that differ, so selection, focus and scroll position
+    survive a refresh and a small change costs a handful of Tk calls. Items that keep
+    their relative order are never moved; only rows outside the longest run of
+    unchanged order are.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.shown = {}
+
+    def apply(self, rows):
+        """rows: iterable of (item_id, values, tags) in display order."""
+        rows = [(str(item_id), tuple(values), tuple(tags)) for item_id, values, tags in rows]
+        wanted = {item_id for item_id, _, _ in rows}
+        current = self.tree.get_children()
+        removed = [item_id for item_id in current if item_id not in wanted]
+        if removed:
+            self.tree.delete(*removed)
+            for item_id in removed:
+                self.shown.pop(item_id, None)
+        old_position = {item_id: index for index, item_id in enumerate(current) if item_id in wanted}
+
+        kept = [item_id for item_id, _, _ in rows if item_id in old_position]
+        in_order = _longest_increasing_run([old_position[item_id] for item_id in kept])
+        stay = {kept[index] for index in in_order}
+
+        # Place each inserted or moved item straight after its predecessor in the new order
+        previous = None
+        for item_id, values, tags in rows:
+            if item_id not in old_position or item_id not in stay:
+                if item_id in old_position:
+                    self.tree.detach(item_id)
+                index = self.tree.index(previous) + 1 if previous is not None else 0
+                if item_id in old_position:
+                    self.tree.move(item_id, '', index)
+                else:
+                    self.tree.insert('', index, iid=item_id, values=values, tags=tags)
+            if item_id in old_position and self.shown.get(item_id) != (values, tags):
+                self.tree.item(item_id, values=values, tags=tags)
+            self.shown[item_id] = (values, tags)
+            previous = item_id
+
+    def append(self, rows):
+        """Add rows after the current items without diffing; used while a result streams in."""
+        for item_id, values, tags in rows:
+            item_id, values, tags = str(item_id), tuple(values), tuple(tags)
+            self.tree.insert('', 'end', iid=item_id, values=values, tags=tags)
+            self.shown[item_id] = (values, tags)
+
+    def clear(self):
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self.shown = {}
+
+class TreeviewLoader:
+    """Fills a TreeviewSync from a streamed result a few hundred rows per idle tick.
+
+    The first tick is small so the first screen of rows shows up straight away; later
+    ticks insert ROWS_PER_TICK rows, leaving the event loop free in between.
+    """
+    FIRST_TICK_ROWS = 50
+    ROWS_PER_TICK = 300
+
+    def __init__(self, sync, to_item):
+        self.sync = sync
+        self.to_item = to_item
+        self.pending = deque()
+        self.tick_id = None
+        self.loaded = 0
+
+    def start(self):
+        """Drop whatever is loading and empty the tree for a new result."""
+        self.cancel()
+        self.sync.clear()
+        self.loaded = 0
+
+    def add(self, rows):
+        """Queue a batch of rows, e.g. from DatabaseWorker.stream()."""
+        self.pending.extend(rows)
+        if self.tick_id is None:
+            self.tick_id = self.sync.tree.after_idle(self.tick)
+
+    def cancel(self):
+        if self.tick_id is not None:
+            self.sync.tree.after_cancel(self.tick_id)
+            self.tick_id = None
+        self.pending.clear()
+
+    def tick(self):
+        self.tick_id = None
+        count = self.FIRST_TICK_ROWS if self.loaded == 0 else self.ROWS_PER_TICK
+        batch = [self.to_item(self.pending.popleft()) for _ in range(min(count, len(self.pending)))]
+        self.sync.append(batch)
+        self.loaded += len(batch)
+        if self.pending:
+            self.tick_id = self.sync.tree.after_idle(self.tick)
+
 def create_progress_bar(progress, color='#008080'):
     """Create a progress bar widget with specified color."""
     frame = ttk.Frame()
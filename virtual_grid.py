@@ -0,0 +1,233 @@
+import logging
+import tkinter as tk
+from tkinter import ttk
+from collections import OrderedDict
+from utils import TreeviewSync
+
+class VirtualGrid:
+    """Treeview that only ever holds the rows that are on screen.
+
+    Rows are loaded on the database worker in fixed-size blocks from a data source with:
+        key(row) -> the sort key of a row, passed back to page() as `after`
+        count(repos) -> number of rows
+        page(repos, after, offset, limit) -> rows in display order, skipping offset rows
+            that follow the key `after` (or from the first row when after is None)
+        page_from_end(repos, offset, limit) -> the same, with offset counted from the last row
+    Each loaded block remembers the key of its last row, so scrolling on to the next block
+    is a pure keyset query. A jump to a block that has not been seen starts from the
+    nearest known key, or from the end of the range if that is closer, and skips the
+    remaining rows with OFFSET. Only a few blocks are cached, so memory stays flat.
+    """
+    BLOCK_SIZE = 100
+    CACHED_BLOCKS = 8
+    WHEEL_ROWS = 3
+
+    def __init__(self, master, worker, job_key, columns, item_id, values, on_error=None):
+        self.worker = worker
+        self.job_key = job_key
+        self.item_id = item_id
+        self.values = values
+        self.on_error = on_error
+        self.frame = ttk.Frame(master)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show='headings')
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.sync = TreeviewSync(self.tree)
+        self.source = None
+        self.total = 0
+        self.counted = False
+        self.top = 0
+        self.visible = 10
+        self.blocks = OrderedDict()
+        self.anchors = {}
+        self.loading = set()
+        self.selected = set()
+
+        self.tree.bind('<Configure>', self.on_configure)
+        self.tree.bind('<MouseWheel>', self.on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll_by(-self.WHEEL_ROWS))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_by(self.WHEEL_ROWS))
+        self.tree.bind('<Prior>', lambda event: self.scroll_by(-self.visible))
+        self.tree.bind('<Next>', lambda event: self.scroll_by(self.visible))
+        self.tree.bind('<Up>', lambda event: self.on_arrow(-1))
+        self.tree.bind('<Down>', lambda event: self.on_arrow(1))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_source(self, source, keep_position=False):
+        """Show rows from source; the count and the first visible blocks load in one worker job."""
+        self.source = source
+        self.counted = False
+        self.blocks.clear()
+        self.anchors = {}
+        self.loading = set()
+        if not keep_position:
+            self.top = 0
+            self.selected = set()
+        self._request(self._wanted_blocks())
+
+    def selected_ids(self):
+        """Item ids of every selected row, including those scrolled out of view."""
+        return (self.selected - set(self.tree.get_children())) | set(self.tree.selection())
+
+    def select(self, item_ids):
+        """Select exactly these rows; the ones not on screen are selected when they scroll in."""
+        self.selected = set(item_ids)
+        self.tree.selection_set([item for item in self.tree.get_children() if item in self.selected])
+
+    def scroll_to(self, top):
+        self.top = max(0, min(top, self.total - self.visible))
+        self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def render(self):
+        """Show rows top..top+visible if their blocks are cached, and queue any blocks that are missing."""
+        self._update_scrollbar()
+        last = min(self.top + self.visible, self.total)
+        needed = range(self.top // self.BLOCK_SIZE, (max(last, 1) - 1) // self.BLOCK_SIZE + 1)
+        if all(index in self.blocks for index in needed) or self.total == 0:
+            rows = []
+            for index in needed:
+                if index in self.blocks:
+                    self.blocks.move_to_end(index)
+                    start = index * self.BLOCK_SIZE
+                    block = self.blocks[index]
+                    rows.extend(block[max(self.top - start, 0):max(last - start, 0)])
+            self._show_rows(rows)
+        self._request(self._wanted_blocks())
+
+    def on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self.scroll_to(round(float(args[1]) * self.total))
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            self.scroll_by(int(args[1]) * step)
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS reports small deltas
+        notches = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll_by(-notches * self.WHEEL_ROWS)
+
+    def on_arrow(self, step):
+        """Scroll when the arrow keys move past the first or last visible row."""
+        children = self.tree.get_children()
+        if not children:
+            return None
+        edge = children[0] if step < 0 else children[-1]
+        if self.tree.focus() != edge:
+            return None
+        self.scroll_by(step)
+        children = self.tree.get_children()
+        if children:
+            edge = children[0] if step < 0 else children[-1]
+            self.tree.focus(edge)
+            self.tree.selection_set(edge)
+        return "break"
+
+    def on_configure(self, event):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else None
+        header = bbox[1] if bbox else row_height
+        visible = max(1, (event.height - header) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.scroll_to(self.top)
+
+    def _wanted_blocks(self):
+        """Blocks for the visible rows plus about a screen of buffer either side."""
+        first = max(self.top - self.visible, 0) // self.BLOCK_SIZE
+        last = (self.top + 2 * self.visible) // self.BLOCK_SIZE
+        if self.total:
+            last = min(last, (self.total - 1) // self.BLOCK_SIZE)
+        return [index for index in range(first, last + 1) if index not in self.blocks]
+
+    def _plan(self, wanted, anchors, total):
+        """Decide how to reach each wanted block: (index, after, offset, from_end)."""
+        plan = []
+        for index in sorted(wanted):
+            if index == 0 or index in anchors:
+                plan.append((index, anchors.get(index), 0, None))
+                continue
+            nearest = max([known for known in anchors if known < index], default=0)
+            skip = (index - nearest) * self.BLOCK_SIZE
+            end_row = min((index + 1) * self.BLOCK_SIZE, total)
+            if total - end_row < skip:
+                plan.append((index, None, 0, total - end_row))
+            else:
+                plan.append((index, anchors.get(nearest), skip, None))
+        return plan
+
+    def _load(self, repos, source, plan, total):
+        """Run a plan on the worker; consecutive blocks continue from the block before them."""
+        loaded = {}
+        for index, after, offset, from_end in plan:
+            previous = loaded.get(index - 1)
+            if previous:
+                rows = source.page(repos, source.key(previous[-1]), 0, self.BLOCK_SIZE)
+            elif from_end is not None:
+                limit = min((index + 1) * self.BLOCK_SIZE, total) - index * self.BLOCK_SIZE
+                rows = source.page_from_end(repos, from_end, limit) if limit > 0 else []
+            else:
+                rows = source.page(repos, after, offset, self.BLOCK_SIZE)
+            loaded[index] = rows
+        return loaded
+
+    def _request(self, wanted):
+        if self.source is None or not wanted or set(wanted) <= self.loading:
+            return
+        source, anchors = self.source, dict(self.anchors)
+        total = self.total if self.counted else None
+        self.loading = set(wanted)
+
+        def load(repos):
+            # A newer request supersedes this one, so until the source has a count every request counts it
+            counted = source.count(repos) if total is None else total
+            return counted, self._load(repos, source, self._plan(wanted, anchors, counted), counted)
+        self.worker.submit(self.job_key, load, lambda result: self._loaded(source, *result),
+                           lambda error: self._failed(source, error))
+
+    def _loaded(self, source, total, loaded):
+        if source is not self.source:
+            return
+        self.total = total
+        self.counted = True
+        self.loading = set()
+        for index, rows in loaded.items():
+            self.blocks[index] = rows
+            self.blocks.move_to_end(index)
+            if len(rows) == self.BLOCK_SIZE:
+                self.anchors[index + 1] = source.key(rows[-1])
+        while len(self.blocks) > self.CACHED_BLOCKS:
+            self.blocks.popitem(last=False)
+        self.scroll_to(self.top)
+
+    def _failed(self, source, error):
+        if source is not self.source:
+            return
+        # Let the next scroll or refresh ask for the blocks again
+        self.loading = set()
+        if self.on_error:
+            self.on_error(error)
+        else:
+            logging.error(f"Failed to load rows: {str(error)}")
+
+    def _show_rows(self, rows):
+        current = self.tree.get_children()
+        # Remember selected rows that scroll out of view so they are selected again when they return
+        self.selected = (self.selected - set(current)) | set(self.tree.selection())
+        self.sync.apply((self.item_id(row), self.values(row), (self.item_id(row),)) for row in rows)
+        shown = [item for item in self.tree.get_children() if item in self.selected]
+        if set(shown) != set(self.tree.selection()):
+            self.tree.selection_set(shown)
+
+    def _update_scrollbar(self):
+        if self.total <= self.visible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / self.total, (self.top + self.visible) / self.total)